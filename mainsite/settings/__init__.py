@@ -590,11 +590,19 @@ set_option("IRR_LOOKUP_CACHE_TTL", 300)
 # per-query timeout (seconds) used when a server dict omits its own "timeout"
 set_option("IRR_LOOKUP_DEFAULT_TIMEOUT", 5)
 
+# queries sent ahead of their answers on one IRRd connection by the batch lookup
+set_option("IRR_LOOKUP_PIPELINE_DEPTH", 100)
+
 # #1973: downloaded IRR dumps used by batch cleanup/checker jobs. The fetch
 # command refreshes this cache; interactive editor/save checks use irr.py.
 set_option("IRR_BULK_DUMP_DIR", os.path.join(API_CACHE_ROOT, "irr"))
 set_option("IRR_BULK_DUMP_MAX_AGE_HOURS", 24)
 set_option("IRR_BULK_DUMP_TIMEOUT", 30)
+# Number of sources the fetch downloads at once
+set_option("IRR_BULK_FETCH_WORKERS", 4)
+# Directory of NRTM journals ({source}.nrtm, appended to by a mirror process) the
+# fetch carries the bulk index forward from between full dumps; empty disables
+set_option("IRR_BULK_DELTA_DIR", "")
 # Compressed and expanded safety bounds for a single registry dump: sanity
 # ceilings against a pathological or hostile response, not a tight fit. Measured
 # 2026-07-30 the largest is radb.db.gz at 25 MB compressed / 411 MB expanded, so
@@ -603,6 +611,9 @@ set_option("IRR_BULK_DUMP_TIMEOUT", 30)
 set_option("IRR_BULK_DUMP_MAX_BYTES", 2 * 1024 * 1024 * 1024)
 set_option("IRR_BULK_DUMP_MAX_UNCOMPRESSED_BYTES", 16 * 1024 * 1024 * 1024)
 
+# Number of processes the bulk IRR index parses dump files in
+set_option("IRR_BULK_INDEX_WORKERS", 4)
+
 # #1973/#1974: which NetworkContact roles receive the irr_as_set outreach mail
 # (ambiguous / unresolvable value, and the single-set cap nudge) sent by
 # pdb_irr_as_set_cleanup / pdb_irr_as_set_notify. Matched case-insensitively
@@ -1425,6 +1436,14 @@ else:
     ELASTICSEARCH_DSL_AUTOSYNC = False
     ELASTICSEARCH_DSL_AUTO_REFRESH = False
 
+# Engine behind the main search bar, autocomplete and the name_search API
+# filter. Without an elasticsearch cluster, searches are served from an
+# in-process index built from the database.
+if ELASTICSEARCH_URL:
+    set_option("SEARCH_BACKEND", "peeringdb_server.search_v2.ElasticsearchBackend")
+else:
+    set_option("SEARCH_BACKEND", "peeringdb_server.search_local.LocalSearchBackend")
+
 # Elasticsearch score boost configuration
 set_option("ES_MATCH_PHRASE_BOOST", 10.0)
 set_option("ES_MATCH_PHRASE_PREFIX_BOOST", 5.0)
@@ -1495,6 +1514,13 @@ set_bool("RDAP_SELF_BOOTSTRAP", True)
 # put it under the main cache dir
 set_option("RDAP_BOOTSTRAP_DIR", os.path.join(BASE_DIR, "api-cache", "rdap-bootstrap"))
 set_bool("RDAP_IGNORE_RECURSE_ERRORS", True)
+# how long (seconds) RDAP ASN answers are cached in the "negative" cache, and
+# how long a registry not-found is
+set_option("RDAP_CACHE_TTL", 3600)
+set_option("RDAP_NEGATIVE_CACHE_TTL", 300)
+# how long (seconds) a lookup waits for the answer to the same ASN being looked
+# up by another worker before asking the registry itself
+set_option("RDAP_CACHE_LOOKUP_WAIT", 15)
 
 ## PeeringDB
 
@@ -1516,6 +1542,10 @@ set_option("SEARCH_RESULTS_LIMIT", 1000)
 # (autocomplete on the main search bar)
 set_option("SEARCH_RESULTS_AUTOCOMPLETE_LIMIT", 40)
 
+# how long (seconds) search and autocomplete results are cached; any change
+# to an indexed object invalidates them early. 0 disables the cache
+set_option("SEARCH_RESULT_CACHE_TTL", 60)
+
 # boost org,net,fac,ix matches over secondary entites (1.0 == no boost)
 set_option("SEARCH_MAIN_ENTITY_BOOST", 1.5)
 
@@ -1798,6 +1828,26 @@ set_option("IXF_RESEND_FAILED_EMAILS", False)
 # Set value for IX-F fetch timeout
 set_option("IXF_FETCH_TIMEOUT", 30)
 
+# Number of IX-F exports the importer downloads concurrently
+set_option("IXF_FETCH_WORKERS", 8)
+
+# Number of processes the importer imports ixlans in
+set_option("IXF_IMPORT_WORKERS", 1)
+
+# Skip the import of IX-F data that has not changed since the last import
+# when the peeringdb data it applies to has not changed either
+set_option("IXF_SKIP_UNCHANGED_IMPORT", True)
+
+# Reject IX-F exports larger than this many bytes (0 = no limit)
+set_option("IXF_FETCH_MAX_SIZE", 50 * 1024 * 1024)
+
+# Reject IX-F exports with more than this many members (0 = no limit)
+set_option("IXF_MAX_MEMBERS", 10000)
+
+# Seconds the member list of an ixlan is cached for in the IX-F export,
+# changes to its netixlans, networks or contacts drop it right away
+set_option("IXF_EXPORT_CACHE_TIMEOUT", 3600)
+
 # Setting for number of days before deleting childless Organizations
 set_option("ORG_CHILDLESS_DELETE_DURATION", 90)
 
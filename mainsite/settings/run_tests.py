@@ -43,6 +43,8 @@ CAPTCHA_TEST_MODE = True
 # a dedicated opt-in test exercises the live check against real IRR servers.
 IRR_AS_SET_VERIFY_EXISTENCE = False
 GLOBAL_STATS_CACHE_DURATION = 0
+# tests reindex and search the same terms repeatedly, opt in where needed
+SEARCH_RESULT_CACHE_TTL = 0
 CLIENT_COMPAT = {
     "client": {"min": (0, 6), "max": (0, 6, 5)},
     "backends": {"django_peeringdb": {"min": (0, 6), "max": (0, 6, 5)}},
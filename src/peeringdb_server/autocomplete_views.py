@@ -10,13 +10,15 @@ import json
 from itertools import chain
 from operator import attrgetter
 
+import structlog
 from dal import autocomplete
 from django import http
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import IntegerField, Q, Value
+from django.db.models import Case, IntegerField, Q, Value, When
 from django.db.models.functions import Lower
 from django.utils import html
 from django.utils.encoding import smart_str
+from elasticsearch import ApiError, TransportError
 from grappelli.views.related import AutocompleteLookup as GrappelliAutocomplete
 from grappelli.views.related import get_autocomplete_search_fields, get_label
 from reversion.models import Version
@@ -33,14 +35,19 @@ from peeringdb_server.models import (
     NetworkFacility,
     Organization,
 )
+from peeringdb_server.search_v2 import search_ids
+
+log = structlog.get_logger("django")
 
 
 class PDBAdminGrappelliAutocomplete(GrappelliAutocomplete):
+    # max. number of results returned
+    limit = 250
+
     def get_data(self):
-        # limit qs to 250 items
         return [
             {"value": self.get_return_value(f, f.pk), "label": get_label(f)}
-            for f in self.get_queryset()[:250]
+            for f in self.get_queryset()[: self.limit]
         ]
 
 
@@ -49,8 +56,15 @@ class GrappelliHandlerefAutocomplete(PDBAdminGrappelliAutocomplete):
     Make sure that the auto-complete fields managed
     by grappelli in django admin exclude soft-deleted
     objects.
+
+    Lookups on models that are part of the search index are answered
+    from the search backend and ranked by it, instead of scanning the
+    table with `icontains` for every search field.
     """
 
+    # reftags of the models that are part of the search index
+    indexed_tags = ("fac", "ix", "net", "org", "campus", "carrier")
+
     def adjust_search_field_for_anchors(self, search_field, anchor_start, anchor_end):
         if not anchor_start and not anchor_end:
             return search_field
@@ -66,14 +80,19 @@ class GrappelliHandlerefAutocomplete(PDBAdminGrappelliAutocomplete):
             return f"{name}__istartswith"
         return f"{name}__iendswith"
 
-    def get_searched_queryset(self, qs):
-        model = self.model
-        term = self.GET["term"]
-
+    def adjust_term(self, term):
+        """
+        Returns the term as adjusted by the model's
+        `autocomplete_term_adjust` hook, if it has one.
+        """
         try:
-            term = model.autocomplete_term_adjust(term)
+            return self.model.autocomplete_term_adjust(term)
         except AttributeError:
-            pass
+            return term
+
+    def get_searched_queryset(self, qs):
+        model = self.model
+        term = self.adjust_term(self.GET["term"])
 
         search_fields = get_autocomplete_search_fields(self.model)
 
@@ -104,7 +123,6 @@ class GrappelliHandlerefAutocomplete(PDBAdminGrappelliAutocomplete):
                     search_field = self.adjust_search_field_for_anchors(
                         search_field, anchor_start, anchor_end
                     )
-                    print("SEARCH_FIELD", search_field, smart_str(search_field), term)
                     term_query |= Q(**{smart_str(search_field): smart_str(word)})
                 search &= term_query
             qs = qs.filter(search)
@@ -112,14 +130,71 @@ class GrappelliHandlerefAutocomplete(PDBAdminGrappelliAutocomplete):
             qs = model.objects.none()
         return qs
 
-    def get_queryset(self):
-        qs = super().get_queryset()
+    def get_ranked_ids(self, term):
+        """
+        Returns the ids of the objects matching `term` according to the
+        search backend, best match first.
+
+        Returns None if the model is not part of the search index, if
+        the term is anchored or if the search backend is unavailable, in
+        which case the lookup falls back to the search fields of the model.
+        """
+        tag = getattr(getattr(self.model, "HandleRef", None), "tag", None)
 
-        # Add support for ^ and $ regex anchors and add it to the top qs results
+        if tag not in self.indexed_tags:
+            return None
+
+        term = term.strip()
+
+        if not term or term[0] == "^" or term[-1] == "$":
+            return None
+
+        try:
+            return search_ids(term, tag)[: self.limit]
+        except (ApiError, TransportError):
+            log.exception("admin_autocomplete_search_error", term=term)
+            return None
+
+    def get_ranked_queryset(self, term, ranked_ids):
+        """
+        Returns the objects in `ranked_ids` ordered by their rank.
+
+        The search index only holds objects with status `ok`, so
+        objects whose name starts with the term are included as well,
+        ranked after the search results, and so is the object whose id
+        is the term, as with the search fields of the model.
+        """
+        qs = self.get_filtered_queryset(self.model._default_manager.get_queryset())
+
+        term = term.strip()
+        search = Q(id__in=ranked_ids) | Q(name__istartswith=term) | Q(id__iexact=term)
+
+        rank = Case(
+            *[When(id=_id, then=Value(i)) for i, _id in enumerate(ranked_ids)],
+            default=Value(len(ranked_ids)),
+            output_field=IntegerField(),
+        )
+
+        return (
+            qs.filter(search).annotate(search_rank=rank).order_by("search_rank", "name")
+        )
+
+    def get_queryset(self):
+        # ranked by the search index where it covers the model, terms
+        # anchored with ^ or $ go through the search fields instead
+        # (see `get_searched_queryset`)
         query = self.GET["term"]
         if len(query) < 2:
             return []
 
+        term = self.adjust_term(query)
+        ranked_ids = self.get_ranked_ids(term)
+
+        if ranked_ids is None:
+            qs = super().get_queryset()
+        else:
+            qs = self.get_ranked_queryset(term, ranked_ids)
+
         if hasattr(self.model, "HandleRef"):
             qs = qs.exclude(status="deleted")
 
@@ -13,6 +13,7 @@ import urllib.parse
 import urllib.request
 
 from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpResponse, JsonResponse
 from django.utils.html import escape
 from django.utils.translation import gettext_lazy as _
@@ -26,6 +27,7 @@ from peeringdb_server.models import (
     InternetExchange,
     IXLan,
     Network,
+    NetworkContact,
     NetworkFacility,
     NetworkIXLan,
 )
@@ -34,10 +36,109 @@ from peeringdb_server.rest import REFTAG_MAP as RestViewSets
 from peeringdb_server.util import add_kmz_overlay_watermark, generate_balloonstyle_text
 
 
+def export_ixf_member_lists(ixlans):
+    """
+    Returns a dict mapping ixlan id to the IX-F export member list of
+    each of the specified ixlans.
+
+    Member lists are cached per ixlan, the ones missing from the cache
+    are built from three queries - netixlans, their networks and the
+    public contacts of those networks - regardless of the size
+    of the exchange.
+    """
+    keys = {ixlan.id: IXLan.ixf_export_cache_key(ixlan.id) for ixlan in ixlans}
+    cached = cache.get_many(list(keys.values()))
+    member_lists = {
+        ixlan_id: cached[key] for ixlan_id, key in keys.items() if key in cached
+    }
+    missing = [ixlan_id for ixlan_id in keys if ixlan_id not in member_lists]
+
+    if not missing:
+        return member_lists
+
+    netixlans = list(
+        NetworkIXLan.handleref.filter(ixlan_id__in=missing, status="ok")
+        .select_related("ixlan", "network")
+        .order_by("id")
+    )
+
+    contacts = collections.defaultdict(list)
+    for poc in NetworkContact.handleref.filter(
+        network_id__in={netixlan.network_id for netixlan in netixlans},
+        status="ok",
+        visible="Public",
+    ).order_by("id"):
+        contacts[poc.network_id].append(poc)
+
+    connections = collections.defaultdict(dict)
+    for netixlan in netixlans:
+        connections[netixlan.ixlan_id].setdefault(netixlan.asn, []).append(netixlan)
+
+    for ixlan_id in missing:
+        member_list = []
+        for asn, _netixlans in connections[ixlan_id].items():
+            net = _netixlans[0].network
+            member_list.append(
+                {
+                    "asnum": asn,
+                    "member_type": "peering",
+                    "name": net.name,
+                    "url": net.website,
+                    "contact_email": [poc.email for poc in contacts[net.id]],
+                    "contact_phone": [poc.phone for poc in contacts[net.id]],
+                    "peering_policy": net.policy_general.lower(),
+                    "peering_policy_url": net.policy_url,
+                    "connection_list": [
+                        export_ixf_connection(netixlan) for netixlan in _netixlans
+                    ],
+                }
+            )
+        member_lists[ixlan_id] = member_list
+
+    cache.set_many(
+        {keys[ixlan_id]: member_lists[ixlan_id] for ixlan_id in missing},
+        timeout=settings.IXF_EXPORT_CACHE_TIMEOUT,
+    )
+
+    return member_lists
+
+
+def export_ixf_connection(netixlan):
+    """
+    Returns the IX-F export connection of a netixlan.
+    """
+    vlan_list = [{}]
+    connection = {
+        "ixp_id": netixlan.ixlan.ix_id,
+        "state": "active",
+        "if_list": [{"if_speed": netixlan.speed}],
+        "vlan_list": vlan_list,
+    }
+
+    if netixlan.ipaddr4:
+        vlan_list[0]["ipv4"] = {
+            "address": f"{netixlan.ipaddr4}",
+            "routeserver": netixlan.is_rs_peer,
+            "max_prefix": netixlan.network.info_prefixes4,
+            "as_macro": netixlan.network.irr_as_set,
+        }
+    if netixlan.ipaddr6:
+        vlan_list[0]["ipv6"] = {
+            "address": f"{netixlan.ipaddr6}",
+            "routeserver": netixlan.is_rs_peer,
+            "max_prefix": netixlan.network.info_prefixes6,
+            "as_macro": netixlan.network.irr_as_set,
+        }
+
+    return connection
+
+
 def export_ixf_ix_members(ixlans, pretty=False):
     member_list = []
     ixp_list = []
 
+    ixlans = list(ixlans)
+
     for ixlan in ixlans:
         if ixlan.ix not in ixp_list:
             ixp_list.append(ixlan.ix)
@@ -49,55 +150,10 @@ def export_ixf_ix_members(ixlans, pretty=False):
         "ixp_list": [{"ixp_id": ixp.id, "shortname": ixp.name} for ixp in ixp_list],
     }
 
+    member_lists = export_ixf_member_lists(ixlans)
+
     for ixlan in ixlans:
-        asns = []
-        for netixlan in ixlan.netixlan_set_active.all():
-            if netixlan.asn in asns:
-                continue
-            connection_list = []
-            member = {
-                "asnum": netixlan.asn,
-                "member_type": "peering",
-                "name": netixlan.network.name,
-                "url": netixlan.network.website,
-                "contact_email": [
-                    poc.email
-                    for poc in netixlan.network.poc_set_active.filter(visible="Public")
-                ],
-                "contact_phone": [
-                    poc.phone
-                    for poc in netixlan.network.poc_set_active.filter(visible="Public")
-                ],
-                "peering_policy": netixlan.network.policy_general.lower(),
-                "peering_policy_url": netixlan.network.policy_url,
-                "connection_list": connection_list,
-            }
-            member_list.append(member)
-            asns.append(netixlan.asn)
-            for _netixlan in ixlan.netixlan_set_active.filter(asn=netixlan.asn):
-                vlan_list = [{}]
-                connection = {
-                    "ixp_id": _netixlan.ixlan.ix_id,
-                    "state": "active",
-                    "if_list": [{"if_speed": _netixlan.speed}],
-                    "vlan_list": vlan_list,
-                }
-                connection_list.append(connection)
-
-                if _netixlan.ipaddr4:
-                    vlan_list[0]["ipv4"] = {
-                        "address": f"{_netixlan.ipaddr4}",
-                        "routeserver": _netixlan.is_rs_peer,
-                        "max_prefix": _netixlan.network.info_prefixes4,
-                        "as_macro": _netixlan.network.irr_as_set,
-                    }
-                if _netixlan.ipaddr6:
-                    vlan_list[0]["ipv6"] = {
-                        "address": f"{_netixlan.ipaddr6}",
-                        "routeserver": _netixlan.is_rs_peer,
-                        "max_prefix": _netixlan.network.info_prefixes6,
-                        "as_macro": _netixlan.network.irr_as_set,
-                    }
+        member_list.extend(member_lists[ixlan.id])
 
     if pretty:
         return json.dumps(rv, indent=2)
@@ -108,7 +164,7 @@ def export_ixf_ix_members(ixlans, pretty=False):
 def view_export_ixf_ix_members(request, ix_id):
     return HttpResponse(
         export_ixf_ix_members(
-            IXLan.objects.filter(ix_id=ix_id, status="ok"),
+            IXLan.objects.filter(ix_id=ix_id, status="ok").select_related("ix"),
             pretty="pretty" in request.GET,
         ),
         content_type="application/json",
@@ -118,7 +174,7 @@ def view_export_ixf_ix_members(request, ix_id):
 def view_export_ixf_ixlan_members(request, ixlan_id):
     return HttpResponse(
         export_ixf_ix_members(
-            IXLan.objects.filter(id=ixlan_id, status="ok"),
+            IXLan.objects.filter(id=ixlan_id, status="ok").select_related("ix"),
             pretty="pretty" in request.GET,
         ),
         content_type="application/json",
@@ -1,6 +1,12 @@
 """
 RDAP lookup and validation.
 
+ASN lookups are cached in the "negative" (Redis) cache, shared by every
+worker and command: answers for RDAP_CACHE_TTL, not-found for
+RDAP_NEGATIVE_CACHE_TTL. A lookup for an ASN another thread or process is
+already looking up waits for that answer instead of asking the registry
+again, so a burst of signups for one ASN makes one request.
+
 Network validation.
 
 Prefix renumbering.
@@ -8,17 +14,23 @@ Prefix renumbering.
 
 from __future__ import annotations
 
+import contextlib
 import ipaddress
+import threading
+import time
+from collections.abc import Iterator
 from typing import TYPE_CHECKING
 
 import rdap
 from django.conf import settings as django_settings
+from django.core.cache import caches
 from django.utils.translation import gettext_lazy as _
 from rdap.exceptions import RdapException, RdapNotFoundError
 
 from peeringdb_server import settings
 
 if TYPE_CHECKING:
+    from django.core.cache.backends.base import BaseCache
     from django.http import HttpRequest
 
 RdapAsn = rdap.RdapAsn  # noqa
@@ -125,6 +137,62 @@ class BogonAsn(rdap.RdapAsn):
         }
 
 
+class CachedRdapAsn(rdap.RdapAsn):
+    """
+    An RdapAsn restored from the RDAP cache, with what parsing it found
+    (entity lookups included) so nothing is requested again.
+    """
+
+    def __init__(self, data: dict, parsed: dict, rir: str | None) -> None:
+        super().__init__(data)
+        self._parsed = parsed
+        self._rir = rir
+
+    def get_rir(self) -> str | None:
+        return self._rir
+
+
+class _AsnLock:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.users = 0
+
+
+# per ASN locks, so threads of one process looking up the same ASN make
+# one request between them; a lock is dropped once nobody uses it
+_asn_locks: dict[int, _AsnLock] = {}
+_asn_locks_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _asn_lock(asn: int) -> Iterator[None]:
+    with _asn_locks_lock:
+        asn_lock = _asn_locks.setdefault(asn, _AsnLock())
+        asn_lock.users += 1
+    try:
+        with asn_lock.lock:
+            yield
+    finally:
+        with _asn_locks_lock:
+            asn_lock.users -= 1
+            if not asn_lock.users:
+                del _asn_locks[asn]
+
+
+def _rdap_cache() -> BaseCache:
+    return caches["negative"]
+
+
+def _asn_cache_key(asn: int) -> str:
+    return f"rdap:asn:{asn}"
+
+
+def _from_cache_entry(entry: dict) -> rdap.RdapAsn:
+    if "not_found" in entry:
+        raise RdapNotFoundError(entry["not_found"])
+    return CachedRdapAsn(entry["data"], entry["parsed"], entry["rir"])
+
+
 class RdapLookup(rdap.RdapClient):
     """
     Does RDAP lookups against defined URL.
@@ -155,7 +223,79 @@ class RdapLookup(rdap.RdapClient):
                 # Issue 995: Block registering private ASN ranges
                 # raise RdapInvalidRange if ASN is in private or reserved range
                 raise RdapInvalidRange()
-        return super().get_asn(asn)
+        return self.get_asn_cached(int(asn))
+
+    def get_asn_cached(self, asn: int) -> rdap.RdapAsn:
+        """
+        Answer from the RDAP cache, or look the ASN up and cache the answer.
+
+        When another process holds the lookup marker for the ASN its answer
+        is waited for, up to RDAP_CACHE_LOOKUP_WAIT seconds, before asking
+        the registry anyway. The marker is only removed by the lookup that
+        set it.
+        """
+        cache = _rdap_cache()
+        key = _asn_cache_key(asn)
+        marker = f"{key}:lookup"
+        wait = django_settings.RDAP_CACHE_LOOKUP_WAIT
+
+        with _asn_lock(asn):
+            entry = cache.get(key)
+            if entry is not None:
+                return _from_cache_entry(entry)
+
+            marked = cache.add(marker, True, timeout=wait)
+            if not marked:
+                deadline = time.monotonic() + wait
+                while entry is None and time.monotonic() < deadline:
+                    time.sleep(0.1)
+                    entry = cache.get(key)
+                    if entry is None and cache.get(marker) is None:
+                        break
+                if entry is not None:
+                    return _from_cache_entry(entry)
+                # the other lookup gave up or is still running, take over
+                # the marker if it is gone
+                marked = cache.add(marker, True, timeout=wait)
+
+            try:
+                return self.lookup_asn(asn)
+            finally:
+                if marked:
+                    cache.delete(marker)
+
+    def lookup_asn(self, asn: int) -> rdap.RdapAsn:
+        """
+        Look the ASN up in RDAP and cache the answer.
+
+        Only a registry not-found is cached as negative; errors that may
+        go away (timeouts, rate limits) are not cached at all.
+        """
+        cache = _rdap_cache()
+        key = _asn_cache_key(asn)
+        try:
+            result = super().get_asn(asn)
+        except RdapNotFoundError as exc:
+            if type(exc) is RdapNotFoundError:
+                cache.set(
+                    key,
+                    {"not_found": str(exc)},
+                    timeout=django_settings.RDAP_NEGATIVE_CACHE_TTL,
+                )
+            raise
+
+        try:
+            # parse now so the entity lookups it makes are cached too
+            entry = {
+                "data": result.data,
+                "parsed": result.parsed(),
+                "rir": result.get_rir(),
+            }
+        except Exception:
+            # left to fail where the caller reads the result, as uncached
+            return result
+        cache.set(key, entry, timeout=django_settings.RDAP_CACHE_TTL)
+        return result
 
 
 def rir_status_is_ok(rir_status: str) -> bool:
@@ -16,6 +16,15 @@ multi-source query per mirror and falls back to pinned checks if a response is t
 unrecognized. Results are cached in the "negative" (Redis) cache for
 settings.IRR_LOOKUP_CACHE_TTL seconds.
 
+The sweep commands resolve thousands of names at once through sources_for_many,
+which keeps one connection per mirror open in IRRd's multiple-command (`!!`) mode,
+pipelines the queries on it and talks to all mirrors concurrently.
+
+The save path checks every token of a value through exists_in_many, one cache
+round-trip for the whole value. pdb_irr_as_set_fetch keeps that cache warm for the
+values networks already publish (warm_exists_cache), so an editor re-saving a
+network with a known as-set does not wait on the pool.
+
 Every outbound path fails open: a query that errors, times out, or returns an
 unrecognized response yields an "unknown" result — exists_in returns None and
 sources_for returns ok=False — and never raises. A third-party IRR outage must
@@ -31,6 +40,7 @@ server's !s-lc mirror list (also the basis of coverage_report()).
 import re
 import socket
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
 from django.core.cache import caches
@@ -48,6 +58,9 @@ LookupResult = namedtuple("LookupResult", ["sources", "ok"])
 _NO_ENTRIES_PREFIX = "%"
 _MAX_RESPONSE_BYTES = 8192
 
+# a mirror that could not be asked about a name at all (see _combine_sources)
+_UNANSWERED = object()
+
 # A safe object key: the tokens we look up are already format-validated upstream,
 # but irr.py is a library — reject anything that could break out of the whois
 # command line (whitespace / control chars) before it hits a socket.
@@ -105,6 +118,76 @@ def _send(server, payload):
             pass
 
 
+class IRRdClient:
+    """
+    A persistent port-43 connection to one IRRd server in multiple-command
+    (`!!`) mode, so any number of queries share one TCP connection and can be
+    sent ahead of their answers.
+
+    In that mode IRRd ends every RIPE-style response with two empty lines, which
+    is what splits the pipelined answers apart again. Network failures raise
+    OSError (incl. socket.timeout) like _send.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.sock = None
+        self.buffer = b""
+
+    def __enter__(self):
+        timeout = _timeout(self.server)
+        self.sock = socket.create_connection(
+            (self.server["host"], self.server.get("port", 43)), timeout=timeout
+        )
+        self.sock.settimeout(timeout)
+        self.sock.sendall(b"!!\n")
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def send(self, queries):
+        """Send `queries` in one write, without waiting for any answer."""
+        payload = "".join(f"{query}\n" for query in queries)
+        self.sock.sendall(payload.encode("ascii", "ignore"))
+
+    def read_response(self):
+        """
+        The next RIPE-style response, as (text, truncated).
+
+        Only the leading _MAX_RESPONSE_BYTES are kept, as in _send; the rest of a
+        large object is read off the connection and dropped, and `truncated` is
+        True.
+        """
+        head = b""
+        truncated = False
+        while True:
+            if not head:
+                # leftover newlines of the previous response's terminator
+                self.buffer = self.buffer.lstrip(b"\n")
+            end = self.buffer.find(b"\n\n\n")
+            if end != -1:
+                response, self.buffer = self.buffer[:end], self.buffer[end + 3 :]
+                break
+            if len(head) + len(self.buffer) > _MAX_RESPONSE_BYTES:
+                # keep the tail, the terminator may straddle two reads
+                head = (head + self.buffer[:-2])[:_MAX_RESPONSE_BYTES]
+                self.buffer = self.buffer[-2:]
+                truncated = True
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("connection closed by the IRRd server")
+            self.buffer += data
+
+        response = head + response
+        if len(response) >= _MAX_RESPONSE_BYTES:
+            truncated = True
+        return response[:_MAX_RESPONSE_BYTES].decode("utf-8", "replace"), truncated
+
+
 def _server_sources(server):
     """
     The set of IRR sources a server mirrors, via IRRd's !s-lc command (response
@@ -164,14 +247,25 @@ def _sources_on_server(server, mirrored_sources, object_class, name):
     bounded response is truncated (large member lists) or unrecognized, return
     None so sources_for falls back to the existing source-pinned checks.
     """
-    source_list = ",".join(sorted(mirrored_sources))
     try:
-        text = _send(server, f"-s {source_list} -T {object_class} {name}")
+        text = _send(server, _sources_query(mirrored_sources, object_class, name))
     except OSError:
         return None
     if len(text.encode("utf-8")) >= _MAX_RESPONSE_BYTES:
         return None
+    return _response_sources(text)
+
 
+def _sources_query(mirrored_sources, object_class, name):
+    """The exact-name query across every source a mirror carries."""
+    return f"-s {','.join(sorted(mirrored_sources))} -T {object_class} {name}"
+
+
+def _response_sources(text):
+    """
+    The sources named in an exact-name response, an empty frozenset for "no
+    entries", or None when the response is not recognized.
+    """
     found_sources = {
         match.group(1).upper()
         for match in re.finditer(r"^source:\s*(\S+)", text, flags=re.MULTILINE | re.I)
@@ -204,7 +298,7 @@ def exists_in(source, name, object_class=None):
         return None
     object_class = object_class or _object_class(name)
 
-    cache_key = f"irr:exists:{source}:{object_class}:{name}"
+    cache_key = _exists_cache_key(source, object_class, name)
     cached = _cache().get(cache_key)
     if cached is not None:
         return cached
@@ -234,6 +328,85 @@ def exists_in(source, name, object_class=None):
     return None
 
 
+def _exists_cache_key(source, object_class, name):
+    return f"irr:exists:{source}:{object_class}:{name}"
+
+
+def exists_in_many(checks):
+    """
+    exists_in for many (source, name) pairs at once: {(SOURCE, NAME) -> True,
+    False or None}, upper-cased.
+
+    Every cached answer is read in one round-trip -- an exists_in result, or a
+    complete sources_for result for the name, which answers it too. Only pairs
+    neither covers go to the pool, one exists_in each.
+    """
+    results = {}
+    # cache key -> the pairs it answers; a name's sources key answers every
+    # source it is checked in
+    keys = {}
+    for source, name in checks:
+        source = source.upper()
+        name = name.upper()
+        if (source, name) in results:
+            continue
+        if source not in IRR_SOURCE or not _SAFE_KEY.match(name):
+            results[(source, name)] = None
+            continue
+        object_class = _object_class(name)
+        keys.setdefault(_exists_cache_key(source, object_class, name), []).append(
+            (source, name)
+        )
+        keys.setdefault(_sources_cache_key(object_class, name), []).append(
+            (source, name)
+        )
+        results[(source, name)] = _UNANSWERED
+
+    for cache_key, cached in _cache().get_many(list(keys)).items():
+        for source, name in keys[cache_key]:
+            if isinstance(cached, list):
+                results[(source, name)] = source in cached
+            else:
+                results[(source, name)] = cached
+
+    for (source, name), result in results.items():
+        if result is _UNANSWERED:
+            results[(source, name)] = exists_in(source, name)
+    return results
+
+
+def warm_exists_cache(checks, index, sources):
+    """
+    Cache a positive exists_in answer for every (source, name) in `checks` the
+    bulk `index` holds in that source; returns how many were written.
+
+    Only positive answers are written. A name missing from a dump may be missing
+    because the dump is stale, and a cached False would make the save path reject
+    a working as-set, so absence is always left to the pool. Only `sources` are
+    warmed: the ones the caller just refreshed, or confirmed current, so no answer
+    comes from a dump that has stopped refreshing.
+
+    Cached for IRR_LOOKUP_CACHE_TTL seconds, as a live answer is: a warmed
+    entry must not keep an as-set deleted upstream accepted for longer than
+    a live lookup would.
+    """
+    sources = {source.upper() for source in sources}
+
+    entries = {}
+    for source, name in checks:
+        source = source.upper()
+        name = name.upper()
+        if source not in IRR_SOURCE or source not in sources:
+            continue
+        if not _SAFE_KEY.match(name) or source not in index.get(name, ()):
+            continue
+        entries[_exists_cache_key(source, _object_class(name), name)] = True
+
+    if entries:
+        _cache().set_many(entries, timeout=settings.IRR_LOOKUP_CACHE_TTL)
+    return len(entries)
+
+
 def sources_for(name, object_class=None):
     """
     Which IRR_SOURCE registries hold object `name`.
@@ -252,28 +425,52 @@ def sources_for(name, object_class=None):
         return LookupResult(frozenset(), False)
     object_class = object_class or _object_class(name)
 
-    cache_key = f"irr:sources:{object_class}:{name}"
-    cached = _cache().get(cache_key)
+    cached = _cache().get(_sources_cache_key(object_class, name))
     if cached is not None:
         return LookupResult(frozenset(cached), True)
 
-    # Usually this is one bounded exact-name query per configured mirror. Track
-    # which registries received a definitive multi-source answer; only unresolved
-    # coverage falls back to the more expensive source-pinned path.
+    # Usually this is one bounded exact-name query per configured mirror.
+    answers = [
+        (mirrored, _sources_on_server(server, mirrored, object_class, name))
+        for server, mirrored in _mirrors()
+    ]
+    return _combine_sources(name, object_class, answers)
+
+
+def _mirrors():
+    """
+    (server, IRR_SOURCE registries it mirrors) for every configured server
+    whose mirror list is known and carries at least one of them.
+    """
+    known = set(IRR_SOURCE)
+    mirrors = []
+    for server in settings.IRR_LOOKUP_SERVERS:
+        mirrored = set(_server_sources(server) or ()) & known
+        if mirrored:
+            mirrors.append((server, mirrored))
+    return mirrors
+
+
+def _combine_sources(name, object_class, answers):
+    """
+    The LookupResult of `name` from the answer of every mirror, as
+    (mirrored sources, sources found) pairs. A found value of None means the
+    mirror's response was unusable, so its registries go to the pinned
+    fallback; _UNANSWERED means the mirror could not be asked at all.
+
+    Complete results are cached.
+    """
+    # Track which registries received a definitive multi-source answer; only
+    # unresolved coverage falls back to the more expensive source-pinned path.
     reachable = set()
     checked = set()
     unresolved = set()
     found = set()
     known = set(IRR_SOURCE)
-    for server in settings.IRR_LOOKUP_SERVERS:
-        mirrored = _server_sources(server)
-        if not mirrored:
-            continue
-        mirrored = set(mirrored) & known
-        if not mirrored:
-            continue
+    for mirrored, result in answers:
         reachable |= mirrored
-        result = _sources_on_server(server, mirrored, object_class, name)
+        if result is _UNANSWERED:
+            continue
         if result is None:
             unresolved |= mirrored
             continue
@@ -300,10 +497,102 @@ def sources_for(name, object_class=None):
         return LookupResult(frozenset(found), False)
 
     result = LookupResult(frozenset(found), True)
-    _cache().set(cache_key, sorted(found), timeout=settings.IRR_LOOKUP_CACHE_TTL)
+    _cache().set(
+        _sources_cache_key(object_class, name),
+        sorted(found),
+        timeout=settings.IRR_LOOKUP_CACHE_TTL,
+    )
     return result
 
 
+def _sources_cache_key(object_class, name):
+    return f"irr:sources:{object_class}:{name}"
+
+
+def _sources_on_server_many(server, mirrored_sources, queries):
+    """
+    {name -> sources found} for every (object_class, name) in `queries` on one
+    mirror, pipelined on a single multiple-command connection in batches of
+    IRR_LOOKUP_PIPELINE_DEPTH. A value of None marks an unusable response, as
+    in _sources_on_server.
+
+    Names the connection failed before answering are left out: the mirror is
+    down or stalled, and asking it again once per name through the pinned
+    fallback is the hours-long sweep this exists to avoid.
+    """
+    depth = max(settings.IRR_LOOKUP_PIPELINE_DEPTH, 1)
+    results = {}
+    try:
+        with IRRdClient(server) as client:
+            for start in range(0, len(queries), depth):
+                batch = queries[start : start + depth]
+                client.send(
+                    _sources_query(mirrored_sources, object_class, name)
+                    for object_class, name in batch
+                )
+                for _object_class, name in batch:
+                    text, truncated = client.read_response()
+                    results[name] = None if truncated else _response_sources(text)
+    except OSError:
+        pass
+    return results
+
+
+def sources_for_many(names, object_class=None):
+    """
+    sources_for for many names at once: {NAME -> LookupResult}, names upper-cased.
+
+    Cached results are read in one round-trip. The rest are asked of every mirror
+    concurrently, each over one persistent connection with the queries pipelined,
+    so a sweep of thousands of names costs a few round-trips per batch instead of
+    a connection per name and mirror. Results carry the same meaning as from
+    sources_for and complete ones are cached the same way.
+
+    Intended for the sweep commands.
+    """
+    names = list(dict.fromkeys(name.upper() for name in names))
+    results = {
+        name: LookupResult(frozenset(), False)
+        for name in names
+        if not _SAFE_KEY.match(name)
+    }
+    queries = [
+        (object_class or _object_class(name), name)
+        for name in names
+        if name not in results
+    ]
+
+    cache_keys = {_sources_cache_key(_class, name): name for _class, name in queries}
+    for cache_key, cached in _cache().get_many(list(cache_keys)).items():
+        results[cache_keys[cache_key]] = LookupResult(frozenset(cached), True)
+    queries = [query for query in queries if query[1] not in results]
+    if not queries:
+        return results
+
+    mirrors = _mirrors()
+    if mirrors:
+        with ThreadPoolExecutor(max_workers=len(mirrors)) as executor:
+            answers = list(
+                executor.map(
+                    lambda mirror: _sources_on_server_many(*mirror, queries),
+                    mirrors,
+                )
+            )
+    else:
+        answers = []
+
+    for _class, name in queries:
+        results[name] = _combine_sources(
+            name,
+            _class,
+            [
+                (mirrored, server_answers.get(name, _UNANSWERED))
+                for (_server, mirrored), server_answers in zip(mirrors, answers)
+            ],
+        )
+    return results
+
+
 def coverage_report():
     """
     IRR_SOURCE coverage audit: map each PeeringDB IRR source to the configured
@@ -14,15 +14,28 @@ replaced. A failed refresh keeps a valid older cache. The interactive save-path
 editor use the live irr.py pool instead — this is only for the batch sweeps.
 """
 
+import array
+import bisect
+import fcntl
+import functools
 import gzip
+import hashlib
+import heapq
+import itertools
 import logging
+import multiprocessing
 import os
+import pathlib
 import re
+import sqlite3
 import tempfile
 import time
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import TypedDict
 from urllib import request
+from urllib.error import HTTPError
 
 from django.conf import settings
 
@@ -34,7 +47,17 @@ logger = logging.getLogger(__name__)
 # aut-nums — the token types irr_as_set can hold)
 _OBJECT_CLASSES = ("as-set", "route-set", "aut-num")
 
-_ATTR_RE = re.compile(r"^([a-z0-9-]+):\s*(.*)$")
+# the attributes parse_rpsl reads: the object classes and the source
+_ATTR_PREFIXES = tuple(f"{attr}:" for attr in _OBJECT_CLASSES + ("source",))
+
+# The persistent index load_index opens instead of re-parsing the dumps. A
+# dotfile, so the dump glob skips it. Bump the format when its layout changes
+# so an index written by an older release is rebuilt rather than misread.
+_INDEX_FILENAME = ".index.sqlite3"
+_INDEX_FORMAT = 3
+
+# bit of each IRR source in the source bitmasks of the index
+_SOURCE_BITS = {source: 1 << i for i, source in enumerate(IRR_SOURCE)}
 
 
 class DumpSource(TypedDict):
@@ -156,13 +179,31 @@ DUMP_SOURCES += tuple(
 
 FetchOutcome = namedtuple("FetchOutcome", ["source", "status", "files", "reason"])
 
+# One NRTM operation: ADD or DEL of the object `key` of `source` at `serial`. Key
+# and source are None for an object of a class the index does not hold, which
+# still takes up its serial.
+JournalEntry = namedtuple("JournalEntry", ["serial", "operation", "key", "source"])
+
+# What apply_deltas did with one source's journal:
+#
+#   applied      the index moved forward to `serial`
+#   current      the journal held nothing past the serial the index is at
+#   gap          the journal skips serials after `serial`; only a full dump
+#                brings the source further
+#   unavailable  the index has no numeric serial of the source to continue from
+DeltaOutcome = namedtuple("DeltaOutcome", ["source", "status", "serial", "reason"])
+
+_NRTM_START = re.compile(r"^%START Version: *(\d+) +\S+ +(\d+)-(\d+)")
+_NRTM_OPERATION = re.compile(r"^(ADD|DEL)(?: +(\d+))? *$")
+
 
 class BulkFetchError(Exception):
     """A dump refresh failed and no usable cache is available."""
 
 
-def _open_url(url):
-    req = request.Request(url, headers={"User-Agent": "PeeringDB IRR bulk checker"})
+def _open_url(url, headers=None):
+    headers = {"User-Agent": "PeeringDB IRR bulk checker", **(headers or {})}
+    req = request.Request(url, headers=headers)
     return request.urlopen(req, timeout=settings.IRR_BULK_DUMP_TIMEOUT)
 
 
@@ -269,11 +310,56 @@ def _staging_dir(dump_dir):
     return path
 
 
+@contextmanager
+def _fetch_lock(dump_dir):
+    """
+    Hold an exclusive lock on the staging directory for the length of a fetch.
+
+    Partial downloads are staged under fixed names so the next run can resume
+    them, which makes two overlapping runs (a full fetch is minutes) write into
+    the same files. The second run is refused instead.
+    """
+    fd = os.open(_staging_dir(dump_dir), os.O_RDONLY)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as exc:
+            raise BulkFetchError(
+                f"another IRR dump fetch is running in {dump_dir}"
+            ) from exc
+        yield
+    finally:
+        os.close(fd)
+
+
+def _staged_path(destination):
+    """
+    Where the download of `destination` is staged, and resumed from: the same
+    name in the staging dir, so _dump_problem still reads it by its suffix.
+    """
+    staging = _staging_dir(os.path.dirname(destination))
+    return os.path.join(staging, os.path.basename(destination))
+
+
+def _discard_staged(staged):
+    """Drop a staged download and the validator it would be resumed with."""
+    for path in (staged, f"{staged}.validator"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
 def _clear_staging(dump_dir):
-    """Drop partial downloads a previously killed run left staged."""
+    """
+    Drop what a previously killed run left staged, except the partial downloads
+    the next download of the same file resumes: those with a validator.
+    """
     staging = _staging_dir(dump_dir)
     for name in os.listdir(staging):
         path = os.path.join(staging, name)
+        if os.path.exists(f"{path}.validator") or (
+            name.endswith(".validator") and os.path.exists(path[: -len(".validator")])
+        ):
+            continue
         try:
             if os.path.isfile(path):
                 os.remove(path)
@@ -281,44 +367,129 @@ def _clear_staging(dump_dir):
             logger.warning("IRR bulk: could not clear staged %s: %s", path, exc)
 
 
+def _expected_size(response, offset):
+    """
+    The size the staged file should end up at, from Content-Range on a resumed
+    response and Content-Length on a whole one; None when the server does not
+    say (FTP, chunked transfers).
+    """
+    headers = getattr(response, "headers", None) or {}
+    if offset:
+        total = headers.get("Content-Range", "").rpartition("/")[2]
+    else:
+        total = headers.get("Content-Length", "")
+    return int(total) if total.isdigit() else None
+
+
+def _open_download(url, staged):
+    """
+    Open `url` for the download staged at `staged`: (response, offset), where
+    offset is how much of the staged file the response continues.
+
+    A staged file with a validator (the ETag or Last-Modified of the response it
+    came from) is resumed with Range + If-Range. A server that ignores the range,
+    or whose copy changed since (If-Range does not match), answers 200 with the
+    whole file, and the offset drops back to 0.
+    """
+    validator_path = f"{staged}.validator"
+    offset = os.path.getsize(staged) if os.path.isfile(staged) else 0
+    validator = _read_local_serial(validator_path) if offset else None
+    if not validator:
+        return _open_url(url), 0
+
+    try:
+        response = _open_url(url, {"Range": f"bytes={offset}-", "If-Range": validator})
+    except HTTPError as exc:
+        if exc.code != 416:
+            raise
+        # nothing left past the staged bytes, so they are not a prefix of the
+        # remote copy either; start over
+        _discard_staged(staged)
+        return _open_url(url), 0
+
+    content_range = (getattr(response, "headers", None) or {}).get("Content-Range", "")
+    if getattr(response, "status", None) == 206 and content_range.startswith(
+        f"bytes {offset}-"
+    ):
+        return response, offset
+    return response, 0
+
+
 def _download_to_temp(url, destination):
-    filename = os.path.basename(destination)
-    fd, tmp_path = tempfile.mkstemp(
-        prefix=f"{filename}.",
-        suffix=".gz" if destination.endswith(".gz") else ".tmp",
-        dir=_staging_dir(os.path.dirname(destination)),
-    )
-    os.close(fd)
-    total = 0
-    complete = False
+    """
+    Download `url` into the staging area and return the staged path.
+
+    A transfer cut short keeps what it received, so the next run asks for the
+    rest (see _open_download) instead of starting the multi-GB dump over. FTP
+    mirrors send no validator and never resume.
+
+    Before the staged file is handed back it is checked against the size the
+    server announced and then fully decompressed, which verifies the gzip CRC32
+    and length trailer of the whole file -- that is what catches a resumed file
+    whose two halves do not belong together. A file failing either check, or
+    breaching a size ceiling, is discarded rather than kept for resuming.
+    """
+    staged = _staged_path(destination)
+    validator_path = f"{staged}.validator"
+    discard = True
     try:
-        with _open_url(url) as response, open(tmp_path, "wb") as handle:
-            while True:
-                chunk = response.read(1024 * 1024)
-                if not chunk:
-                    break
-                total += len(chunk)
-                if total > settings.IRR_BULK_DUMP_MAX_BYTES:
-                    raise BulkFetchError(
-                        f"download {url} exceeds IRR_BULK_DUMP_MAX_BYTES "
-                        f"({settings.IRR_BULK_DUMP_MAX_BYTES} bytes)"
-                    )
-                handle.write(chunk)
+        response, offset = _open_download(url, staged)
+        with response:
+            expected = _expected_size(response, offset)
+            if not offset:
+                headers = getattr(response, "headers", None) or {}
+                validator = headers.get("ETag") or headers.get("Last-Modified")
+                if validator:
+                    _write_text_atomic(validator_path, validator)
+                elif os.path.exists(validator_path):
+                    os.remove(validator_path)
+            total = offset
+            with open(staged, "ab" if offset else "wb") as handle:
+                # from here on a broken transfer leaves a resumable prefix
+                discard = not os.path.exists(validator_path)
+                while True:
+                    chunk = response.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+                    if total > settings.IRR_BULK_DUMP_MAX_BYTES:
+                        discard = True
+                        raise BulkFetchError(
+                            f"download {url} exceeds IRR_BULK_DUMP_MAX_BYTES "
+                            f"({settings.IRR_BULK_DUMP_MAX_BYTES} bytes)"
+                        )
+                    handle.write(chunk)
+        if expected is not None and total < expected:
+            raise BulkFetchError(
+                f"download {url} ended after {total} of {expected} bytes"
+            )
+        discard = True
+        if expected is not None and total != expected:
+            raise BulkFetchError(
+                f"download {url} is {total} bytes, the server announced {expected}"
+            )
         # full validation: this is freshly downloaded bytes, the one place the
         # expanded-size ceiling is worth paying for
-        problem = _dump_problem(tmp_path, full=True)
+        problem = _dump_problem(staged, full=True)
         if problem is not None:
             raise BulkFetchError(f"download {url} is unusable: {problem}")
-        complete = True
-        return tmp_path
+        discard = False
+        return staged
     except (OSError, EOFError, UnicodeError) as exc:
         raise BulkFetchError(f"could not fetch {url}: {exc}") from exc
     finally:
-        if os.path.exists(tmp_path) and not complete:
-            os.remove(tmp_path)
+        if discard:
+            _discard_staged(staged)
+
+
+def _serial_number(value):
+    """A serial marker as an int, None when it is missing or not numeric."""
+    if value is None or not value.isdigit():
+        return None
+    return int(value)
 
 
-def _fetch_source(spec, dump_dir, max_age_hours, force):
+def _fetch_source(spec, dump_dir, max_age_hours, force, journal_serial=None):
     source = spec["name"]
     files = tuple(spec["files"])
     paths = _source_paths(spec, dump_dir)
@@ -343,6 +514,19 @@ def _fetch_source(spec, dump_dir, max_age_hours, force):
             and _all_valid(paths)
         ):
             return FetchOutcome(source, "fresh", paths, "serial unchanged")
+        # the journal already carried the index to the published serial, so the
+        # older dump it sits on is not worth replacing
+        published = _serial_number(remote_serial)
+        if (
+            not force
+            and published is not None
+            and journal_serial is not None
+            and journal_serial >= published
+            and _all_valid(paths)
+        ):
+            return FetchOutcome(
+                source, "fresh", paths, f"index at serial {journal_serial} via journal"
+            )
 
     # Age is the fallback whenever no serial comparison could be made: no
     # CURRENTSERIAL published, or its endpoint is failing. Without the second case
@@ -359,9 +543,10 @@ def _fetch_source(spec, dump_dir, max_age_hours, force):
         for (filename, url), path in zip(files, paths):
             staged.append((_download_to_temp(url, path), path))
     except BulkFetchError as exc:
+        # the complete files go too: they are only consistent with the rest of
+        # this source's set as downloaded now
         for tmp_path, _path in staged:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
+            _discard_staged(tmp_path)
         if _all_valid(paths):
             reason = f"refresh failed; retained valid cache: {exc}"
             logger.warning("IRR bulk %s: %s", source, reason)
@@ -370,14 +555,14 @@ def _fetch_source(spec, dump_dir, max_age_hours, force):
             raise BulkFetchError(f"{serial_error}; {exc}") from exc
         raise
 
-    # Promotion is the one filesystem step outside the download try/except. Two
-    # overlapping runs (a full fetch is ~7 min) clear each other's staging, so the
-    # loser finds its temp file gone here — as a bare OSError that would escape the
-    # per-source isolation in fetch_dumps, which only catches BulkFetchError, and
-    # abort every source behind it.
+    # Promotion is the one filesystem step outside the download try/except. A
+    # failure here (a full disk, a staging dir removed under the run) is a bare
+    # OSError that would escape the per-source isolation in fetch_dumps, which
+    # only catches BulkFetchError, and abort every source behind it.
     try:
         for tmp_path, path in staged:
             os.replace(tmp_path, path)
+            _discard_staged(tmp_path)
         if remote_serial is not None:
             _write_text_atomic(serial_path, remote_serial)
     except OSError as exc:
@@ -509,13 +694,28 @@ def plan_fetch(dump_dir=None, source_names=None, force=False, max_age_hours=None
     return outcomes
 
 
-def fetch_dumps(dump_dir=None, source_names=None, force=False, max_age_hours=None):
+def fetch_dumps(
+    dump_dir=None, source_names=None, force=False, max_age_hours=None, delta_dir=None
+):
     """
     Refresh configured IRR dumps and return one FetchOutcome per source.
 
     Serial markers avoid unchanged downloads where registries publish them;
     otherwise file age is used. Every file is staged and validated before it
-    replaces the cache. A failed refresh retains a complete valid cache.
+    replaces the cache. A failed refresh retains a complete valid cache, and an
+    interrupted download is resumed by the next run where the server allows it.
+
+    Sources are fetched concurrently, IRR_BULK_FETCH_WORKERS at a time; they are
+    on different servers, so a slow registry no longer holds up the others.
+    Raises BulkFetchError when another fetch holds the dump dir.
+
+    The persistent index load_index opens is rebuilt afterwards if any dump
+    changed.
+
+    With a journal directory (`delta_dir`, default IRR_BULK_DELTA_DIR) the index
+    is first carried forward by apply_deltas, and a source whose journal reaches
+    its published serial keeps its dump: full dumps are then only downloaded to
+    bootstrap a source or to get past a gap in its journal.
     """
     dump_dir = dump_dir or settings.IRR_BULK_DUMP_DIR
     if not dump_dir:
@@ -524,12 +724,16 @@ def fetch_dumps(dump_dir=None, source_names=None, force=False, max_age_hours=Non
     max_age_hours = _resolved_max_age(max_age_hours)
 
     os.makedirs(dump_dir, exist_ok=True)
-    _clear_staging(dump_dir)
 
-    outcomes = []
-    for spec in specs:
+    def fetch(spec):
         try:
-            outcomes.append(_fetch_source(spec, dump_dir, max_age_hours, force))
+            return _fetch_source(
+                spec,
+                dump_dir,
+                max_age_hours,
+                force,
+                journal_serials.get(spec["name"]),
+            )
         except BulkFetchError as exc:
             # One unfetchable source must not abort the sources behind it: on a cold
             # start there is no cache to fall back to, so a single flaky registry
@@ -538,7 +742,36 @@ def fetch_dumps(dump_dir=None, source_names=None, force=False, max_age_hours=Non
             # "failed" into a non-zero exit; dump_health still blocks --commit.
             paths = _source_paths(spec, dump_dir)
             logger.warning("IRR bulk %s: refresh failed: %s", spec["name"], exc)
-            outcomes.append(FetchOutcome(spec["name"], "failed", paths, str(exc)))
+            return FetchOutcome(spec["name"], "failed", paths, str(exc))
+
+    with _fetch_lock(dump_dir):
+        _clear_staging(dump_dir)
+        journal_serials = {
+            outcome.source: outcome.serial
+            for outcome in apply_deltas(dump_dir, delta_dir)
+            if outcome.serial is not None
+        }
+        workers = max(1, min(settings.IRR_BULK_FETCH_WORKERS, len(specs)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(fetch, specs))
+
+        # Build the persistent index now, while the run is expected to take a
+        # while, so the batch commands open it instead of re-parsing every dump.
+        # A no-op when nothing changed since the last build; after a rebuild the
+        # journals are applied again on top of the new dumps.
+        try:
+            load_index(dump_dir)
+            apply_deltas(dump_dir, delta_dir)
+            _mark_journal_current(
+                dump_dir,
+                [
+                    outcome.source
+                    for outcome in outcomes
+                    if outcome.reason.endswith("via journal")
+                ],
+            )
+        except (OSError, EOFError, sqlite3.Error) as exc:
+            logger.warning("IRR bulk: could not build index in %s: %s", dump_dir, exc)
     return outcomes
 
 
@@ -552,6 +785,10 @@ def parse_rpsl(lines):
     `lines` is an iterable — an open file handle, or `text.splitlines()` for an
     in-memory dump. Not a whole-dump string: expanded these run to hundreds of MB,
     which is the point of streaming here.
+
+    Only lines starting with one of the four attributes we read are split at
+    all; every other line costs a prefix check. Comments and continuation lines
+    can never start with one, so they need no test of their own.
     """
     if isinstance(lines, str):
         raise TypeError(
@@ -567,21 +804,16 @@ def parse_rpsl(lines):
         return None
 
     for line in lines:
-        line = line.rstrip("\r\n")
-        if not line.strip():
+        if not line or line.isspace():
             obj = flush()
             if obj:
                 yield obj
             cls = key = source = None
             continue
-        # comments and RPSL continuation lines (leading whitespace) carry no
-        # attribute we need
-        if line[0] in "#%" or line[0].isspace():
+        if not line.startswith(_ATTR_PREFIXES):
             continue
-        match = _ATTR_RE.match(line)
-        if not match:
-            continue
-        attr, value = match.group(1), match.group(2).strip()
+        attr, _sep, value = line.partition(":")
+        value = value.strip()
         if cls is None and attr in _OBJECT_CLASSES:
             cls = attr
             key = value.split()[0] if value else None
@@ -593,28 +825,312 @@ def parse_rpsl(lines):
         yield obj
 
 
-def build_index(paths):
-    """Build {PRIMARY_KEY -> {SOURCE, …}} from a list of dump file paths."""
-    index = {}
+def _index_dump(path):
+    """
+    {SOURCE -> {PRIMARY_KEY, …}} for one dump file, only for sources PeeringDB
+    recognizes; a dump may carry RIPE-NONAUTH / RPKI pseudo-sources we don't
+    track.
+
+    Keyed by source because that is what crosses the process boundary in
+    build_index: a dump holds one or two sources, so this pickles a handful of
+    key sets rather than a set per key.
+    """
     known = set(IRR_SOURCE)
+    keys = {}
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as handle:
+        for _cls, key, source in parse_rpsl(handle):
+            if source in known:
+                keys.setdefault(source, set()).add(key)
+    return keys
+
+
+def source_mask(sources):
+    """The bitmask of `sources` over the IRR_SOURCE ordering."""
+    return sum(_SOURCE_BITS[source] for source in set(sources))
+
+
+@functools.cache
+def mask_sources(mask):
+    """The sources a bitmask made by source_mask stands for (frozenset)."""
+    return frozenset(source for source, bit in _SOURCE_BITS.items() if mask & bit)
+
+
+class BulkIndex:
+    """
+    {PRIMARY_KEY -> {SOURCE, …}} in the shape the batch commands can afford
+    to hold: the keys in one sorted list and, alongside in an array, the
+    sources holding each as a bitmask over IRR_SOURCE.
+
+    A dict of sets costs a set object per key on top of the key itself, which
+    for the few million keys of a full dump set is hundreds of MB; this costs
+    a list slot and four bytes. Lookups bisect the key list.
+
+    Answers the same get / [] / in as a dict, so sources_for_bulk takes either.
+    """
+
+    def __init__(self, keys, masks):
+        self.keys = keys
+        self.masks = masks
+
+    @classmethod
+    def from_sources(cls, keys_by_source):
+        """
+        Build from {SOURCE -> {PRIMARY_KEY, …}}, merging the sorted key set of
+        every source in one pass rather than through an intermediate dict.
+        """
+        keys = []
+        masks = array.array("I")
+        merged = heapq.merge(
+            *(
+                zip(sorted(source_keys), itertools.repeat(_SOURCE_BITS[source]))
+                for source, source_keys in keys_by_source.items()
+            )
+        )
+        for key, bit in merged:
+            if keys and keys[-1] == key:
+                masks[-1] |= bit
+            else:
+                keys.append(key)
+                masks.append(bit)
+        return cls(keys, masks)
+
+    def mask(self, key):
+        """The source bitmask of `key`, 0 when no source holds it."""
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.masks[i]
+        return 0
+
+    def get(self, key, default=None):
+        mask = self.mask(key)
+        return mask_sources(mask) if mask else default
+
+    def __getitem__(self, key):
+        mask = self.mask(key)
+        if not mask:
+            raise KeyError(key)
+        return mask_sources(mask)
+
+    def __contains__(self, key):
+        return bool(self.mask(key))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __eq__(self, other):
+        if not isinstance(other, BulkIndex):
+            return NotImplemented
+        return self.keys == other.keys and self.masks == other.masks
+
+    def items(self):
+        """(PRIMARY_KEY, source bitmask) pairs in key order."""
+        return zip(self.keys, self.masks)
+
+
+def build_index(paths, workers=None):
+    """
+    Build the BulkIndex of a list of dump file paths.
+
+    The dumps are independent, so they are parsed in up to `workers` processes
+    (default IRR_BULK_INDEX_WORKERS) and the per-source key sets merged here.
+    """
+    if workers is None:
+        workers = settings.IRR_BULK_INDEX_WORKERS
+    workers = min(workers, len(paths))
+
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            parsed = list(executor.map(_index_dump, paths))
+    else:
+        parsed = [_index_dump(path) for path in paths]
+
+    keys_by_source = {}
+    for keys in parsed:
+        for source, source_keys in keys.items():
+            keys_by_source.setdefault(source, set()).update(source_keys)
+    return BulkIndex.from_sources(keys_by_source)
+
+
+def _dump_paths(dump_dir):
+    """
+    Every *.db / *.db.gz dump under `dump_dir`, sorted by name.
+
+    Dotfiles are skipped — the serial markers, the persistent index and .staging/
+    live here too.
+    """
+    return [
+        os.path.join(dump_dir, name)
+        for name in sorted(os.listdir(dump_dir))
+        if name.endswith((".db", ".db.gz", ".gz")) and not name.startswith(".")
+    ]
+
+
+def _index_path(dump_dir):
+    """Where the persistent index built from the dumps in `dump_dir` lives."""
+    return os.path.join(dump_dir, _INDEX_FILENAME)
+
+
+def _index_signature(dump_dir, paths):
+    """
+    What an index built from `paths` right now would be built from: the serial
+    marker of every source plus the name, size and mtime of every dump file.
+
+    The serials alone are not enough — a source without a CURRENTSERIAL, or a run
+    whose serial endpoint failed, replaces its dump without moving a marker.
+    """
+    parts = [f"format {_INDEX_FORMAT}"]
+    for name in sorted(os.listdir(dump_dir)):
+        if name.startswith(".") and name.endswith(".serial"):
+            serial = _read_local_serial(os.path.join(dump_dir, name))
+            parts.append(f"serial {name} {serial}")
     for path in paths:
-        opener = gzip.open if path.endswith(".gz") else open
-        with opener(path, "rt", encoding="utf-8", errors="replace") as handle:
-            for _cls, key, source in parse_rpsl(handle):
-                # only index sources PeeringDB recognizes; a dump may carry
-                # RIPE-NONAUTH / RPKI pseudo-sources we don't track
-                if source in known:
-                    index.setdefault(key, set()).add(source)
-    return index
+        stat = os.stat(path)
+        parts.append(f"dump {os.path.basename(path)} {stat.st_size} {stat.st_mtime_ns}")
+    return "\n".join(parts)
+
+
+class PersistentIndex:
+    """
+    Read-only view of the on-disk index written by _write_index.
+
+    Answers the same get / [] / in as the dict build_index returns, so every
+    sources_for_bulk caller takes either. Lookups go to SQLite with the file
+    memory-mapped, which is what makes opening it a matter of milliseconds
+    rather than the full re-parse of every dump.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        uri = f"{pathlib.Path(path).resolve().as_uri()}?mode=ro"
+        self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self.connection.execute(f"PRAGMA mmap_size={os.path.getsize(path)}")
+
+    def meta(self, name):
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def meta_prefixed(self, prefix):
+        """{SUFFIX -> value} of every meta row named `prefix` + SUFFIX."""
+        rows = self.connection.execute(
+            "SELECT name, value FROM meta WHERE substr(name, 1, ?) = ?",
+            (len(prefix), prefix),
+        )
+        return {name[len(prefix) :]: value for name, value in rows}
+
+    def serials(self):
+        """{SOURCE -> serial} the index holds each source at."""
+        return self.meta_prefixed("serial:")
+
+    def get(self, key, default=None):
+        row = self.connection.execute(
+            "SELECT sources FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return default
+        return mask_sources(row[0])
+
+    def __getitem__(self, key):
+        sources = self.get(key)
+        if sources is None:
+            raise KeyError(key)
+        return sources
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+def _open_index(dump_dir, signature):
+    """
+    The persistent index of `dump_dir` when it was built from exactly the dumps
+    `signature` describes, otherwise None.
+    """
+    path = _index_path(dump_dir)
+    if not os.path.isfile(path):
+        return None
+    try:
+        index = PersistentIndex(path)
+        if index.meta("signature") == signature:
+            return index
+        index.close()
+    except sqlite3.Error as exc:
+        logger.warning("IRR bulk: could not open index %s: %s", path, exc)
+    return None
+
+
+def _write_index(index, dump_dir, signature):
+    """
+    Write the BulkIndex `index` to the persistent index file of `dump_dir`,
+    sources as the same bitmask.
+
+    Built under a temporary name and moved into place, so a reader never sees a
+    half-written index and a killed build leaves the previous one in use.
+    """
+    path = _index_path(dump_dir)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f"{_INDEX_FILENAME}.", suffix=".tmp", dir=dump_dir
+    )
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(tmp_path)
+        try:
+            connection.execute("PRAGMA journal_mode=OFF")
+            connection.execute(
+                "CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID"
+            )
+            connection.execute(
+                "CREATE TABLE entries (key TEXT PRIMARY KEY, sources INTEGER) "
+                "WITHOUT ROWID"
+            )
+            connection.executemany(
+                "INSERT INTO entries (key, sources) VALUES (?, ?)", index.items()
+            )
+            connection.execute(
+                "INSERT INTO meta (name, value) VALUES ('signature', ?)", (signature,)
+            )
+            # where apply_deltas continues each source from: its dump's serial
+            connection.executemany(
+                "INSERT INTO meta (name, value) VALUES (?, ?)",
+                [
+                    (f"serial:{spec['name']}", serial)
+                    for spec in DUMP_SOURCES
+                    if (
+                        serial := _read_local_serial(
+                            _serial_path(spec["name"], dump_dir)
+                        )
+                    )
+                    is not None
+                ],
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 def load_index(dump_dir=None):
     """
-    Build the index from every *.db / *.db.gz under `dump_dir` (default
+    The index of every *.db / *.db.gz under `dump_dir` (default
     settings.IRR_BULK_DUMP_DIR). Returns None when no dump dir is configured or it
     holds no dumps — callers then report syntactic buckets only.
 
-    Dotfiles are skipped — the serial markers and .staging/ live here too.
+    Opens the persistent index fetch_dumps leaves next to the dumps when it was
+    built from the dumps present now (same serials, sizes and mtimes). Otherwise
+    the dumps are parsed again (~19s) and the index file rewritten for the next
+    caller; a dump dir that cannot be written to only costs that caching.
 
     The index reflects whatever files are present, of whatever age, so a caller
     that writes off it (pdb_irr_as_set_cleanup --commit) must check dump_health()
@@ -623,14 +1139,243 @@ def load_index(dump_dir=None):
     dump_dir = dump_dir or getattr(settings, "IRR_BULK_DUMP_DIR", "")
     if not dump_dir or not os.path.isdir(dump_dir):
         return None
-    paths = [
-        os.path.join(dump_dir, name)
-        for name in sorted(os.listdir(dump_dir))
-        if name.endswith((".db", ".db.gz", ".gz")) and not name.startswith(".")
-    ]
+    paths = _dump_paths(dump_dir)
     if not paths:
         return None
-    return build_index(paths)
+
+    signature = _index_signature(dump_dir, paths)
+    index = _open_index(dump_dir, signature)
+    if index is not None:
+        return index
+
+    index = build_index(paths)
+    try:
+        _write_index(index, dump_dir, signature)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning("IRR bulk: could not write index in %s: %s", dump_dir, exc)
+    return index
+
+
+def parse_nrtm(lines):
+    """
+    Yield a JournalEntry for every operation in an NRTM stream, versions 1 and 3.
+
+    `lines` is an iterable of lines, as for parse_rpsl. A stream may be several
+    %START ... %END blocks one after the other, as a mirror appending every
+    answer to one file leaves it. Version 1 operations carry no serial of their
+    own and are numbered up from the first serial of the %START range.
+    """
+    next_serial = None
+    operation = serial = None
+    body = []
+
+    def flush():
+        if operation is None:
+            return None
+        obj = next(parse_rpsl(body), None)
+        if obj is None:
+            return JournalEntry(serial, operation, None, None)
+        _cls, key, source = obj
+        return JournalEntry(serial, operation, key, source)
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        start = _NRTM_START.match(line)
+        match = _NRTM_OPERATION.match(line)
+        if start or match or line.startswith("%END"):
+            entry = flush()
+            if entry:
+                yield entry
+            operation = serial = None
+            body = []
+        if start:
+            next_serial = int(start.group(2))
+        elif match:
+            operation = match.group(1)
+            if match.group(2):
+                serial = int(match.group(2))
+            elif next_serial is not None:
+                serial = next_serial
+            else:
+                raise ValueError(f"NRTM operation without a serial: {line!r}")
+            next_serial = serial + 1
+        elif operation is not None:
+            body.append(line)
+
+    entry = flush()
+    if entry:
+        yield entry
+
+
+def _journal_path(delta_dir, source):
+    """Where the NRTM journal of `source` is read from."""
+    return os.path.join(delta_dir, f"{source.lower()}.nrtm")
+
+
+def _apply_journal(connection, source, path):
+    """
+    Apply the journal at `path` to the index open on `connection`, from the
+    serial the index holds `source` at, and return the DeltaOutcome.
+
+    Operations up to that serial are skipped, so a journal file only ever grows
+    and trimming it is left to whatever writes it. The source's bit is set on
+    ADD and cleared on DEL, and the serial moves with them in one transaction;
+    applying stops at the first serial that does not follow on.
+    """
+    row = connection.execute(
+        "SELECT value FROM meta WHERE name = ?", (f"serial:{source}",)
+    ).fetchone()
+    start = _serial_number(row[0] if row else None)
+    if start is None:
+        return DeltaOutcome(
+            source, "unavailable", None, "index holds no serial to continue from"
+        )
+
+    bit = _SOURCE_BITS[source]
+    current = start
+    gap = None
+    with connection, open(path, encoding="utf-8", errors="replace") as handle:
+        for entry in parse_nrtm(handle):
+            if entry.serial <= current:
+                continue
+            if entry.serial != current + 1:
+                gap = entry.serial
+                break
+            current = entry.serial
+            if entry.key is None or entry.source != source:
+                continue
+            if entry.operation == "ADD":
+                connection.execute(
+                    "INSERT INTO entries (key, sources) VALUES (?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET sources = sources | ?",
+                    (entry.key, bit, bit),
+                )
+            else:
+                connection.execute(
+                    "UPDATE entries SET sources = sources & ? WHERE key = ?",
+                    (~bit, entry.key),
+                )
+                connection.execute(
+                    "DELETE FROM entries WHERE key = ? AND sources = 0", (entry.key,)
+                )
+        connection.execute(
+            "UPDATE meta SET value = ? WHERE name = ?",
+            (str(current), f"serial:{source}"),
+        )
+
+    if gap is not None:
+        return DeltaOutcome(
+            source, "gap", current, f"journal jumps from {current} to {gap}"
+        )
+    if current > start:
+        return DeltaOutcome(
+            source, "applied", current, f"{current - start} serial(s) applied"
+        )
+    return DeltaOutcome(source, "current", current, "nothing past the index serial")
+
+
+@contextmanager
+def _writable_index(dump_dir):
+    """
+    A read-write connection to the persistent index of `dump_dir`, None when
+    there is no index built from the dumps present now.
+
+    Writes go through SQLite's own journal, so a PersistentIndex open elsewhere
+    sees the index either before or after them.
+    """
+    paths = _dump_paths(dump_dir) if os.path.isdir(dump_dir) else []
+    index = _open_index(dump_dir, _index_signature(dump_dir, paths)) if paths else None
+    if index is None:
+        yield None
+        return
+    index.close()
+    connection = sqlite3.connect(_index_path(dump_dir))
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+
+def apply_deltas(dump_dir=None, delta_dir=None):
+    """
+    Carry the persistent index forward from NRTM journals and return one
+    DeltaOutcome per DUMP_SOURCES source that has one.
+
+    Each source's journal is read from `delta_dir` (default
+    IRR_BULK_DELTA_DIR) as {source}.nrtm, where a mirror process keeps
+    appending what it receives; nothing is fetched here. Only an index built
+    from the dumps present now is changed, so this never triggers the full
+    parse load_index falls back to; an empty list is returned without one.
+    """
+    dump_dir = dump_dir or settings.IRR_BULK_DUMP_DIR
+    delta_dir = delta_dir or settings.IRR_BULK_DELTA_DIR
+    if not dump_dir or not delta_dir or not os.path.isdir(delta_dir):
+        return []
+
+    outcomes = []
+    with _writable_index(dump_dir) as connection:
+        if connection is None:
+            return []
+        for spec in DUMP_SOURCES:
+            path = _journal_path(delta_dir, spec["name"])
+            if not os.path.isfile(path):
+                continue
+            try:
+                outcome = _apply_journal(connection, spec["name"], path)
+            except (OSError, ValueError) as exc:
+                outcome = DeltaOutcome(
+                    spec["name"], "unavailable", None, f"unreadable journal: {exc}"
+                )
+            if outcome.status != "current":
+                logger.info(
+                    "IRR bulk %s journal: %s (%s)",
+                    outcome.source,
+                    outcome.status,
+                    outcome.reason,
+                )
+            outcomes.append(outcome)
+    return outcomes
+
+
+def _mark_journal_current(dump_dir, sources):
+    """
+    Record that the journal had `sources` at their published serial just now,
+    which dump_health takes in place of the age of their dumps.
+    """
+    if not sources:
+        return
+    with _writable_index(dump_dir) as connection:
+        if connection is None:
+            return
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                [(f"journal-current:{source}", str(time.time())) for source in sources],
+            )
+
+
+def index_serials(dump_dir=None):
+    """
+    A short fingerprint of the data load_index would answer from right now, or ""
+    when there is no index.
+
+    Moves whenever a source's serial marker or any dump file changes, or a
+    journal carries the index forward, so a caller can store it next to a
+    verdict and tell whether that verdict was reached against the same data.
+    """
+    dump_dir = dump_dir or getattr(settings, "IRR_BULK_DUMP_DIR", "")
+    if not dump_dir or not os.path.isdir(dump_dir):
+        return ""
+    paths = _dump_paths(dump_dir)
+    if not paths:
+        return ""
+    signature = _index_signature(dump_dir, paths)
+    index = _open_index(dump_dir, signature)
+    if index is not None:
+        for source, serial in sorted(index.serials().items()):
+            signature += f"\nindex {source} {serial}"
+        index.close()
+    return hashlib.sha1(signature.encode("utf-8")).hexdigest()
 
 
 def dump_health(dump_dir=None, max_age_hours=None):
@@ -642,6 +1387,10 @@ def dump_health(dump_dir=None, max_age_hours=None):
     (default IRR_BULK_DUMP_MAX_AGE_HOURS). Both empty means every source in
     DUMP_SOURCES is covered by a readable, current dump.
 
+    A source kept current by its journal (see fetch_dumps) counts as fresh for
+    as long as the journal last had it at the published serial, however old
+    the dump underneath.
+
     IDNIC is intentionally absent from DUMP_SOURCES (no self-serve dump) and so
     is never reported here; batch misses for it are confirmed live instead.
     """
@@ -649,13 +1398,23 @@ def dump_health(dump_dir=None, max_age_hours=None):
     if max_age_hours is None:
         max_age_hours = settings.IRR_BULK_DUMP_MAX_AGE_HOURS
 
+    journal_current = {}
+    paths = _dump_paths(dump_dir) if dump_dir and os.path.isdir(dump_dir) else []
+    index = _open_index(dump_dir, _index_signature(dump_dir, paths)) if paths else None
+    if index is not None:
+        journal_current = index.meta_prefixed("journal-current:")
+        index.close()
+    cutoff = time.time() - max_age_hours * 3600
+
     missing = []
     stale = []
     for spec in DUMP_SOURCES:
         paths = [os.path.join(dump_dir, filename) for filename, _url in spec["files"]]
         if not _all_valid(paths):
             missing.append(spec["name"])
-        elif not _all_fresh(paths, max_age_hours):
+        elif not _all_fresh(paths, max_age_hours) and not (
+            float(journal_current.get(spec["name"], 0)) >= cutoff
+        ):
             stale.append(spec["name"])
     return missing, stale
 
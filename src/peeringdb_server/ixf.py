@@ -9,21 +9,26 @@ Handles notifications of networks and exchanges as part of that process.
 A substantial part of the import logic is handled through models.py::IXFMemberData
 """
 
+import contextlib
 import datetime
+import hashlib
 import ipaddress
 import json
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from smtplib import SMTPException
 
 import django
 import requests
 import reversion
+import structlog
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.mail.message import EmailMultiAlternatives
-from django.db import transaction
-from django.db.models import Q
+from django.db import connections, transaction
+from django.db.models import Count, Max, Q
 from django.template import loader
 from django.utils.html import strip_tags
 from django.utils.translation import gettext_lazy as _
@@ -38,12 +43,16 @@ from peeringdb_server.models import (
     IXLanIXFMemberImportAttempt,
     IXLanIXFMemberImportLog,
     IXLanIXFMemberImportLogEntry,
+    IXLanPrefix,
     Network,
     NetworkIXLan,
     NetworkProtocolsDisabled,
     User,
     ValidationErrorEncoder,
 )
+from peeringdb_server.prefix_index import PrefixIndex
+
+log = structlog.get_logger("django")
 
 REASON_ENTRY_GONE_FROM_REMOTE = _(
     "The entry for (asn and IPv4 and IPv6) does not exist "
@@ -63,6 +72,20 @@ REASON_IP_REASSIGNED_TO_DIFFERENT_ASN = _(
     "The IP address has been reassigned to a different ASN in the exchange's IX-F data"
 )
 
+# IX-F schema versions the importer is known to process (major version
+# 0 or 1), exports declaring another version are imported all the same
+SCHEMA_VERSION = re.compile(r"^[01]\.\d+$")
+
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class InvalidIXFExport(ValueError):
+    """
+    This error is raised when an IX-F export is rejected while it
+    is being downloaded or decoded, for example because it exceeds
+    the configured size limits or does not follow the IX-F schema.
+    """
+
 
 class MultipleVlansInPrefix(ValueError):
     """
@@ -186,7 +209,9 @@ class Importer:
 
     def reset(self, ixlan=None, save=False, asn=None):
         self.reset_log()
-        self.ixf_ids = []
+        # (asn, ipaddr4, ipaddr6) tuples found in the IX-F data, a dict
+        # is used as an insertion ordered set
+        self.ixf_ids = {}
         self.actions_taken = {
             "add": [],
             "delete": [],
@@ -195,7 +220,9 @@ class Importer:
         }
         self.pending_save = []
         self.deletions = {}
-        self.asns = []
+        self.deletions_by_ip = {}
+        self.pending_save_by_ip = {}
+        self.asns = set()
         self.ixlan = ixlan
         self.vlan = None
         self.save = save
@@ -206,6 +233,55 @@ class Importer:
         self.protocol_conflict = 0
         self.emails = 0
         self._facility_cache = {}
+        self.networks = {}
+        self.prefixes = []
+        self.prefix_index = PrefixIndex()
+        self.netixlans_ip4 = {}
+        self.netixlans_ip6 = {}
+        self.ixf_member_data = {}
+        self.timings = {}
+        self.queries = 0
+        self._phases = []
+
+    def count_query(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper counting the queries made during
+        an import (see `phase`).
+        """
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Context manager that records the time spent and the number of
+        database queries made in an import phase to `timings`.
+
+        Time and queries of a nested phase are only attributed to the
+        nested phase.
+
+        Arguments:
+            - name <str>
+        """
+
+        nested = {"time": 0.0, "queries": 0}
+        self._phases.append(nested)
+        start = time.perf_counter()
+        queries = self.queries
+        try:
+            yield
+        finally:
+            self._phases.pop()
+            elapsed = time.perf_counter() - start
+            num_queries = self.queries - queries
+
+            if self._phases:
+                self._phases[-1]["time"] += elapsed
+                self._phases[-1]["queries"] += num_queries
+
+            timing = self.timings.setdefault(name, {"time": 0.0, "queries": 0})
+            timing["time"] += elapsed - nested["time"]
+            timing["queries"] += num_queries - nested["queries"]
 
     def fetch(self, url, timeout=5):
         """
@@ -225,29 +301,348 @@ class Importer:
         if not url:
             return {"pdb_error": _("IX-F import url not specified")}
 
+        # if we have the previous export cached, send a conditional
+        # request so an unchanged export is not downloaded again
+
+        cached = cache.get(self.cache_key(url))
+        meta = cache.get(self.cache_meta_key(url)) if cached else None
+        headers = {}
+
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            result = requests.get(url, timeout=timeout, headers=headers, stream=True)
+        except Exception as exc:
+            return {"pdb_error": exc}
+
         try:
-            result = requests.get(url, timeout=timeout)
+            if result.status_code == 304 and meta:
+                return cached
+
+            if result.status_code != 200:
+                return {"pdb_error": f"Got HTTP status {result.status_code}"}
+
+            content = self.read_content(result)
+        except InvalidIXFExport as exc:
+            return {"pdb_error": f"{exc}"}
         except Exception as exc:
             return {"pdb_error": exc}
+        finally:
+            result.close()
+
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        # export content is identical to the cached one, no need
+        # to parse and sanitize it again
 
-        if result.status_code != 200:
-            return {"pdb_error": f"Got HTTP status {result.status_code}"}
+        if meta and meta.get("hash") == content_hash:
+            self.cache_meta(url, result, content_hash)
+            return cached
 
         try:
-            data = result.json()
+            data = self.decode(
+                content,
+                encoding=requests.utils.get_encoding_from_headers(result.headers),
+            )
+        except InvalidIXFExport as exc:
+            return {"pdb_error": f"{exc}"}
         except Exception:
             data = {"pdb_error": _("No JSON could be parsed")}
             return data
 
-        data = self.sanitize(data)
+        with self.phase("sanitize"):
+            data = self.sanitize(data)
+        data["pdb_hash"] = content_hash
 
         # locally cache result
 
         if data and not data.get("pdb_error"):
             cache.set(self.cache_key(url), data, timeout=None)
+            self.cache_meta(url, result, content_hash)
+
+        return data
+
+    def read_content(self, result):
+        """
+        Read the body of a streamed IX-F export response.
+
+        Aborts as soon as the export exceeds IXF_FETCH_MAX_SIZE bytes, so
+        oversized exports are never held in memory.
+
+        Arguments:
+            - result <requests.Response>
+
+        Returns bytes
+        """
+
+        max_size = settings.IXF_FETCH_MAX_SIZE
+        error = _("IX-F export exceeds the maximum size of {} bytes").format(max_size)
+
+        content_length = result.headers.get("Content-Length")
+        if max_size and content_length and content_length.isdigit():
+            if int(content_length) > max_size:
+                raise InvalidIXFExport(error)
+
+        chunks = []
+        size = 0
+
+        for chunk in result.iter_content(chunk_size=65536):
+            size += len(chunk)
+            if max_size and size > max_size:
+                raise InvalidIXFExport(error)
+            chunks.append(chunk)
+
+        return b"".join(chunks)
+
+    def decode(self, content, encoding=None):
+        """
+        Decode an IX-F export.
+
+        The top level object is decoded one property at a time and the
+        `member_list` one member at a time, so members are validated as
+        they are decoded and a broken or oversized export is rejected
+        without decoding the rest of it.
+
+        This bounds the work spent on an export, not its memory: the
+        whole body, at most IXF_FETCH_MAX_SIZE bytes, is held and turned
+        into text first, since the unchanged export check hashes all of
+        it and the encoding may have to be detected from all of it.
+
+        Raises InvalidIXFExport on schema errors and ValueError if the
+        content is not valid json.
+
+        Arguments:
+            - content <bytes|str>
+
+        Keyword arguments:
+            - encoding <str|None>: encoding declared by the response
+
+        Returns dict
+        """
+
+        if isinstance(content, bytes):
+            # a byte order mark is tolerated whatever the encoding
+            content = self.decode_text(content, encoding).removeprefix("\ufeff")
+
+        decoder = json.JSONDecoder()
+        data = {}
+
+        idx = JSON_WHITESPACE.match(content).end()
+        if content[idx : idx + 1] != "{":
+            raise InvalidIXFExport(_("IX-F export is not a JSON object"))
+        idx = JSON_WHITESPACE.match(content, idx + 1).end()
+
+        if content[idx : idx + 1] == "}":
+            idx += 1
+        else:
+            while True:
+                key, idx = decoder.raw_decode(content, idx)
+                if not isinstance(key, str):
+                    raise ValueError("Expecting property name")
+
+                idx = JSON_WHITESPACE.match(content, idx).end()
+                if content[idx : idx + 1] != ":":
+                    raise ValueError("Expecting ':' delimiter")
+                idx = JSON_WHITESPACE.match(content, idx + 1).end()
+
+                if key == "member_list" and content[idx : idx + 1] == "[":
+                    value, idx = self.decode_member_list(decoder, content, idx)
+                else:
+                    value, idx = decoder.raw_decode(content, idx)
+                    if key == "version":
+                        self.validate_version(value)
+
+                data[key] = value
+
+                idx = JSON_WHITESPACE.match(content, idx).end()
+                delimiter = content[idx : idx + 1]
+                idx = JSON_WHITESPACE.match(content, idx + 1).end()
+
+                if delimiter == "}":
+                    break
+                if delimiter != ",":
+                    raise ValueError("Expecting ',' delimiter")
+
+        if content[JSON_WHITESPACE.match(content, idx).end() :]:
+            raise ValueError("Extra data")
 
         return data
 
+    def decode_member_list(self, decoder, content, idx):
+        """
+        Decode the `member_list` array of an IX-F export starting at
+        `idx`, validating each member as it is decoded.
+
+        Raises InvalidIXFExport once the number of members exceeds
+        IXF_MAX_MEMBERS.
+
+        Returns tuple (member_list <list>, end index <int>)
+        """
+
+        max_members = settings.IXF_MAX_MEMBERS
+        member_list = []
+        index = 0
+
+        idx = JSON_WHITESPACE.match(content, idx + 1).end()
+
+        if content[idx : idx + 1] == "]":
+            return member_list, idx + 1
+
+        while True:
+            member, idx = decoder.raw_decode(content, idx)
+            self.validate_member(member, index)
+            if self.valid_member_asn(member, index):
+                member_list.append(member)
+            index += 1
+
+            if max_members and len(member_list) > max_members:
+                raise InvalidIXFExport(
+                    _("IX-F export exceeds the maximum of {} members").format(
+                        max_members
+                    )
+                )
+
+            idx = JSON_WHITESPACE.match(content, idx).end()
+            delimiter = content[idx : idx + 1]
+            idx = JSON_WHITESPACE.match(content, idx + 1).end()
+
+            if delimiter == "]":
+                return member_list, idx
+            if delimiter != ",":
+                raise ValueError("Expecting ',' delimiter")
+
+    def decode_text(self, content, encoding=None):
+        """
+        Turn the body of an IX-F export into text the way
+        `requests.Response.json` does: with the encoding declared by the
+        response, otherwise the utf-8, -16 or -32 variant detected from
+        the first bytes, falling back to character set detection.
+
+        Arguments:
+            - content <bytes>
+            - encoding <str|None>: encoding declared by the response
+
+        Returns str
+        """
+
+        if not encoding and len(content) > 3:
+            detected = requests.utils.guess_json_utf(content)
+            if detected:
+                try:
+                    return content.decode(detected)
+                except UnicodeDecodeError:
+                    pass
+
+        if not encoding:
+            encoding = requests.compat.chardet.detect(content)["encoding"]
+
+        try:
+            return str(content, encoding or "utf-8", errors="replace")
+        except (LookupError, TypeError):
+            return str(content, errors="replace")
+
+    def validate_version(self, version):
+        """
+        Log a warning if the IX-F schema version is not one the importer
+        is known to process. The export is imported regardless.
+        """
+
+        if not isinstance(version, str) or not SCHEMA_VERSION.match(version):
+            log.warning("ixf_unexpected_schema_version", version=version)
+
+    def validate_member(self, member, index):
+        """
+        Raise InvalidIXFExport if a `member_list` entry does not have
+        the structure the importer relies on.
+        """
+
+        if not isinstance(member, dict):
+            raise InvalidIXFExport(
+                _("member_list[{}]: member is not an object").format(index)
+            )
+
+        connection_list = member.get("connection_list", [])
+
+        if not isinstance(connection_list, list) or not all(
+            isinstance(conn, dict) for conn in connection_list
+        ):
+            raise InvalidIXFExport(
+                _("member_list[{}]: connection_list is not a list of objects").format(
+                    index
+                )
+            )
+
+        for conn in connection_list:
+            if not isinstance(conn.get("vlan_list") or [], list):
+                raise InvalidIXFExport(
+                    _("member_list[{}]: vlan_list is not a list").format(index)
+                )
+
+    def valid_member_asn(self, member, index):
+        """
+        Return whether the `asnum` of a `member_list` entry is usable.
+
+        A member whose `asnum` is not an integer is logged and skipped,
+        the rest of the export is still imported.
+        """
+
+        asn = member.get("asnum")
+
+        if asn is not None and (not isinstance(asn, int) or isinstance(asn, bool)):
+            log.warning("ixf_member_skipped", index=index, asnum=asn)
+            return False
+
+        return True
+
+    def prefetch(self, urls, timeout=5, max_workers=8):
+        """
+        Retrieve ixf member export data from multiple urls concurrently.
+
+        Each url is retrieved and sanitized through `fetch`, so successful
+        results are also stored in the local IX-F cache.
+
+        Return dict mapping url to a (data, timings) tuple holding the
+        data returned by `fetch` and the timings of its `fetch` and
+        `sanitize` phases, to be passed on to `update`. Urls that caused
+        an unexpected error during retrieval are left out so `update` can
+        retry them and report the error.
+
+        Arguments:
+            - urls <list>
+
+        Keyword arguments:
+            - timeout <float>: max time to spend on each request
+            - max_workers <int>: max number of concurrent requests
+        """
+
+        urls = list(dict.fromkeys(url for url in urls if url))
+
+        def _fetch(url):
+            importer = Importer()
+            try:
+                with connections["default"].execute_wrapper(importer.count_query):
+                    with importer.phase("fetch"):
+                        data = importer.fetch(url, timeout=timeout)
+                return url, (data, importer.timings)
+            except Exception:
+                return url, None
+            finally:
+                # threads get their own database connections
+                # (database cache backends), close them
+                connections.close_all()
+
+        if not urls:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            results = executor.map(_fetch, urls)
+
+        return {url: result for url, result in results if result is not None}
+
     def cache_key(self, url):
         """
         Return the django cache key to use for caching IX-F data.
@@ -259,6 +654,40 @@ class Importer:
 
         return f"IXF-CACHE-{url}"
 
+    def cache_meta_key(self, url):
+        """
+        Return the django cache key to use for caching the HTTP
+        validators and content hash of IX-F data.
+
+        Argument:
+
+            url <str>
+        """
+
+        return f"IXF-CACHE-META-{url}"
+
+    def cache_meta(self, url, result, content_hash):
+        """
+        Locally cache the ETag and Last-Modified headers and the
+        content hash of an IX-F export response.
+
+        Arguments:
+
+            url <str>
+            result <requests.Response>
+            content_hash <str>
+        """
+
+        cache.set(
+            self.cache_meta_key(url),
+            {
+                "etag": result.headers.get("ETag"),
+                "last_modified": result.headers.get("Last-Modified"),
+                "hash": content_hash,
+            },
+            timeout=None,
+        )
+
     def fetch_cached(self, url):
         """
         Return locally cached IX-F data.
@@ -532,17 +961,22 @@ class Importer:
 
         return data
 
-    def update(self, ixlan, save=True, data=None, timeout=5, asn=None):
+    def update(self, ixlan, save=True, data=None, timeout=5, asn=None, timings=None):
         """
         Sync netixlans under this ixlan from ixf member export json data (specs
         can be found at https://github.com/euro-ix/json-schemas).
 
+        The time spent and queries made in each phase of the import are
+        collected in `timings`.
+
         Arguments:
             - ixlan (IXLan): ixlan object to update from ixf
 
         Keyword Arguments:
             - save (bool): commit changes to db
             - asn (int): only process changes for this ASN
+            - timings (dict): timings of the phases `data` was retrieved
+              in, as returned by `prefetch`, counted towards this import
 
         Returns:
             - success (bool)
@@ -550,14 +984,36 @@ class Importer:
 
         self.reset(ixlan=ixlan, save=save, asn=asn)
 
+        elapsed = 0.0
+        for name, timing in (timings or {}).items():
+            self.timings[name] = dict(timing)
+            elapsed += timing["time"]
+            self.queries += timing["queries"]
+
+        start = time.perf_counter()
+
+        try:
+            with connections["default"].execute_wrapper(self.count_query):
+                return self._update(ixlan, save, data, timeout)
+        finally:
+            self.timings["total"] = {
+                "time": elapsed + time.perf_counter() - start,
+                "queries": self.queries,
+            }
+            self.save_timings()
+
+    def _update(self, ixlan, save, data, timeout):
         # if data is not provided, retrieve it either from cache or
         # from the remote resource
         try:
             if data is None:
-                if self.cache_only:
-                    data = self.fetch_cached(ixlan.ixf_ixp_member_list_url)
-                else:
-                    data = self.fetch(ixlan.ixf_ixp_member_list_url, timeout=timeout)
+                with self.phase("fetch"):
+                    if self.cache_only:
+                        data = self.fetch_cached(ixlan.ixf_ixp_member_list_url)
+                    else:
+                        data = self.fetch(
+                            ixlan.ixf_ixp_member_list_url, timeout=timeout
+                        )
         except Exception as exc:
             # any errors happening during retrieval and sanitization are fatal
             # and will be logged and the import will be aborted
@@ -578,9 +1034,14 @@ class Importer:
         if self.skip_import:
             return True
 
+        if self.is_unchanged(data):
+            self.update_unchanged(data)
+            return True
+
         try:
             # parse the ixf data
-            self.parse(data)
+            with self.phase("parse"):
+                self.parse(data)
         except MultipleVlansInPrefix as exc:
             # multiple vlans found for prefixes specified on the ixlan
             # we fail the import and notify the ix
@@ -609,26 +1070,35 @@ class Importer:
 
         with transaction.atomic():
             # process any netixlans that need to be deleted
-            self.process_deletions()
+            with self.phase("process_deletions"):
+                self.process_deletions()
 
             # process creation of new netixlans and updates
             # of existing netixlans. This needs to happen
             # after process_deletions in order to avoid potential
             # ip conflicts
-            self.process_saves()
+            with self.phase("process_saves"):
+                self.process_saves()
+
+        with self.phase("cleanup_ixf_member_data"):
+            self.cleanup_ixf_member_data()
 
-        self.cleanup_ixf_member_data()
+        with self.phase("notify_stale_netixlans"):
+            self.notify_stale_netixlans()
 
-        self.notify_stale_netixlans()
+        with self.phase("cleanup_aged_proposals"):
+            self.cleanup_aged_proposals()
 
-        self.cleanup_aged_proposals()
+            # create tickets for unresolved proposals
+            # This function is currently disabled as per issue #860
+            self.ticket_aged_proposals()
 
-        # create tickets for unresolved proposals
-        # This function is currently disabled as per issue #860
-        self.ticket_aged_proposals()
+        with self.phase("refresh_proposed_actions"):
+            self.refresh_proposed_actions()
 
         # archive the import so we can roll it back later if needed
-        self.archive()
+        with self.phase("archive"):
+            self.archive()
 
         if self.invalid_ip_errors:
             self.notify_error(
@@ -637,7 +1107,8 @@ class Importer:
 
         if save:
             # update exchange's ixf fields
-            self.update_ix()
+            with self.phase("update_ix"):
+                self.update_ix()
 
             if (
                 not self.protocol_conflict
@@ -648,16 +1119,147 @@ class Importer:
 
             self.save_log()
 
+            self.store_import_state(data)
+
         return True
 
-    def update_ix(self):
+    def import_state_key(self):
+        """
+        Return the django cache key to use for storing the state
+        of the last import of the ixlan.
+        """
+
+        return f"IXF-IMPORT-STATE-{self.ixlan.id}"
+
+    def import_state(self, data):
+        """
+        Return the state of the IX-F data and of the peeringdb data
+        the import of it depends on.
+
+        Arguments:
+
+            data <dict>: IX-F data as returned by `fetch`
+        """
+
+        ixlan = self.ixlan
+        asns = {member.get("asnum") for member in data.get("member_list", [])}
+
+        def _state(qset):
+            return qset.aggregate(updated=Max("updated"), count=Count("id"))
+
+        return {
+            "hash": data.get("pdb_hash"),
+            "ixlan": ixlan.updated,
+            "ix": ixlan.ix.updated,
+            "ixpfx": _state(IXLanPrefix.objects.filter(ixlan_id=ixlan.id)),
+            "netixlan": _state(NetworkIXLan.objects.filter(ixlan_id=ixlan.id)),
+            "ixf_member_data": _state(IXFMemberData.objects.filter(ixlan_id=ixlan.id)),
+            "net": _state(Network.objects.filter(asn__in=asns)),
+        }
+
+    def store_import_state(self, data):
+        """
+        Remember the state of a completed import so an import of
+        the same IX-F data can be skipped (see `is_unchanged`).
+
+        Arguments:
+
+            data <dict>: IX-F data as returned by `fetch`
+        """
+
+        if self.asn or not data.get("pdb_hash"):
+            return
+
+        cache.set(self.import_state_key(), self.import_state(data), timeout=None)
+
+    def is_unchanged(self, data):
+        """
+        Return True if neither the IX-F data nor any of the peeringdb data
+        the import depends on have changed since the last import of
+        this ixlan.
+
+        Arguments:
+
+            data <dict>: IX-F data as returned by `fetch`
+        """
+
+        if not settings.IXF_SKIP_UNCHANGED_IMPORT:
+            return False
+
+        if not self.save or self.asn or not data.get("pdb_hash"):
+            return False
+
+        state = cache.get(self.import_state_key())
+
+        return state is not None and state == self.import_state(data)
+
+    def update_unchanged(self, data):
+        """
+        Handle an import of unchanged IX-F data.
+
+        Parsing the data and processing the changes is skipped, proposals
+        are marked as seen in the current IX-F data and the time based
+        processing of stale netixlans and aged proposals still happens.
+
+        Arguments:
+
+            data <dict>: IX-F data as returned by `fetch`
+        """
+
+        IXFMemberData.objects.filter(ixlan_id=self.ixlan.id).update(
+            fetched=datetime.datetime.now(datetime.UTC)
+        )
+
+        with self.phase("notify_stale_netixlans"):
+            self.notify_stale_netixlans()
+
+        with self.phase("cleanup_aged_proposals"):
+            self.cleanup_aged_proposals()
+            self.ticket_aged_proposals()
+
+        with self.phase("refresh_proposed_actions"):
+            self.refresh_proposed_actions(invalidated_only=True)
+
+        with self.phase("archive"):
+            self.archive()
+
+        with self.phase("update_ix"):
+            self.update_ix(net_count=False)
+
+        self.save_log()
+
+        self.store_import_state(data)
+
+    def refresh_proposed_actions(self, invalidated_only=False):
+        """
+        Store the actions implied by the ixlan's IXFMemberData
+        objects once the import has processed them, so the proposals
+        listed on the network page don't need to be evaluated
+        on every view.
+
+        Keyword Arguments:
+            - invalidated_only (bool): only evaluate entries whose
+              proposed action has been invalidated since the last import
+        """
+
+        if not self.save:
+            return
+
+        qset = IXFMemberData.objects.filter(ixlan_id=self.ixlan.id)
+
+        if invalidated_only:
+            qset = qset.filter(proposed_action__isnull=True)
+
+        IXFMemberData.refresh_proposed_actions(qset)
+
+    def update_ix(self, net_count=True):
         """
         Determine if any data was changed during this import
         and update the exchange's ixf_last_import timestamp
         if so.
 
         Set the ixf_net_count value if it has changed
-        from before.
+        from before, unless `net_count` is False.
         """
 
         ix = self.ixlan.ix
@@ -669,7 +1271,7 @@ class Importer:
 
         # Count unique ASNs in pending_save instead of total entries
         ixf_net_count = len(set(ixf_member.asn for ixf_member in self.pending_save))
-        if ixf_net_count != ix.ixf_net_count:
+        if net_count and ixf_net_count != ix.ixf_net_count:
             ix.ixf_net_count = ixf_net_count
 
         # we do not want these updates to affect the
@@ -693,22 +1295,63 @@ class Importer:
         for speed and is_rs_peer (#793).
         """
 
-        for other in self.pending_save:
-            if other.asn == ixf_member_data.asn:
-                if (
-                    other.init_ipaddr4
-                    and other.init_ipaddr4 == ixf_member_data.init_ipaddr4
-                ) or (
-                    other.init_ipaddr6
-                    and other.init_ipaddr6 == ixf_member_data.init_ipaddr6
-                ):
-                    if not other.modify_speed:
-                        other.speed = ixf_member_data.speed
+        ipaddr4 = ixf_member_data.init_ipaddr4
+        ipaddr6 = ixf_member_data.init_ipaddr6
 
-                    if not other.modify_is_rs_peer:
-                        other.is_rs_peer = ixf_member_data.is_rs_peer
+        # first entry in pending_save sharing either address
+        matches = [
+            self.pending_save_by_ip.get((ixf_member_data.asn, 4, ipaddr4))
+            if ipaddr4
+            else None,
+            self.pending_save_by_ip.get((ixf_member_data.asn, 6, ipaddr6))
+            if ipaddr6
+            else None,
+        ]
+        matches = [match for match in matches if match]
 
-                    break
+        if not matches:
+            return
+
+        _, other = min(matches, key=lambda match: match[0])
+
+        if not other.modify_speed:
+            other.speed = ixf_member_data.speed
+
+        if not other.modify_is_rs_peer:
+            other.is_rs_peer = ixf_member_data.is_rs_peer
+
+    def _build_pending_save_by_ip(self):
+        """
+        Build a {(asn, protocol, ip): (index, ixf_member_data)} lookup of
+        the entries in self.pending_save, keeping the first entry for
+        each address. Called once before the process_deletions loop.
+        """
+        mapping = {}
+        for index, ixf_member in enumerate(self.pending_save):
+            if ixf_member.init_ipaddr4:
+                mapping.setdefault(
+                    (ixf_member.asn, 4, ixf_member.init_ipaddr4), (index, ixf_member)
+                )
+            if ixf_member.init_ipaddr6:
+                mapping.setdefault(
+                    (ixf_member.asn, 6, ixf_member.init_ipaddr6), (index, ixf_member)
+                )
+        return mapping
+
+    def track_deletion(self, ixf_member_data):
+        """
+        Record a proposed deletion in self.deletions and index it by
+        (asn, protocol, ip) in self.deletions_by_ip for the lookups of
+        consolidate_delete_add.
+        """
+        self.deletions[ixf_member_data.ixf_id] = ixf_member_data
+        asn = ixf_member_data.asn
+        for protocol, ipaddr in (
+            (4, ixf_member_data.ipaddr4),
+            (6, ixf_member_data.ipaddr6),
+        ):
+            if ipaddr:
+                self.deletions_by_ip[(asn, protocol, ipaddr)] = ixf_member_data
 
     @reversion.create_revision()
     @transaction.atomic()
@@ -789,7 +1432,10 @@ class Importer:
         if self.asn:
             netixlan_qset = netixlan_qset.filter(asn=self.asn)
 
+        netixlan_qset = netixlan_qset.select_related("network")
+
         ip_to_asn = self._build_ip_to_asn()
+        self.pending_save_by_ip = self._build_pending_save_by_ip()
 
         for netixlan in netixlan_qset:
             if netixlan.ixf_id not in self.ixf_ids:
@@ -809,7 +1455,7 @@ class Importer:
                 # for speed and is_rs_peer (#793)
                 self.fix_consolidated_modify(ixf_member_data)
 
-                self.deletions[ixf_member_data.ixf_id] = ixf_member_data
+                self.track_deletion(ixf_member_data)
 
                 if self._ip_reassigned_in_feed(netixlan, ip_to_asn):
                     self._apply_reassignment_delete(ixf_member_data)
@@ -882,34 +1528,64 @@ class Importer:
             return
 
         persist_log = IXLanIXFMemberImportLog.objects.create(ixlan=self.ixlan)
-        for action in ["delete", "modify", "add"]:
-            for info in self.actions_taken[action]:
-                netixlan = info["netixlan"]
-                version_before = info["version"]
 
-                versions = reversion.models.Version.objects.get_for_object(netixlan)
+        taken = [
+            (action, info)
+            for action in ["delete", "modify", "add"]
+            for info in self.actions_taken[action]
+        ]
 
-                if version_before:
-                    versions = versions.filter(id__gt=version_before.id)
-                    version_after = versions.last()
-                else:
-                    version_after = versions.first()
+        if not taken:
+            return
 
-                if not version_after:
-                    continue
+        # retrieve the versions of all touched netixlans with a single
+        # query, ordered oldest to newest
 
-                # push for data change notification (#403)
-                DataChangeNotificationQueue.push(
-                    "ixf", action, netixlan, version_before, version_after, **info
-                )
+        versions = {}
+        for version in (
+            reversion.models.Version.objects.get_for_model(NetworkIXLan)
+            .filter(object_id__in={str(info["netixlan"].id) for _, info in taken})
+            .order_by("id")
+        ):
+            versions.setdefault(version.object_id, []).append(version)
+
+        changes = []
+        entries = []
+
+        for action, info in taken:
+            netixlan = info["netixlan"]
+            version_before = info["version"]
 
-                persist_log.entries.create(
-                    netixlan=netixlan,
-                    version_before=version_before,
-                    action=action,
-                    reason=info.get("reason"),
-                    version_after=version_after,
+            candidates = versions.get(str(netixlan.id), [])
+
+            if version_before:
+                # first version created after version_before
+                version_after = next(
+                    (v for v in candidates if v.id > version_before.id), None
                 )
+            else:
+                # most recent version
+                version_after = candidates[-1] if candidates else None
+
+            if not version_after:
+                continue
+
+            # push for data change notification (#403)
+            changes.append((action, netixlan, version_before, version_after, info))
+
+            entry = IXLanIXFMemberImportLogEntry(
+                log=persist_log,
+                netixlan=netixlan,
+                version_before=version_before,
+                action=action,
+                reason=info.get("reason"),
+                version_after=version_after,
+            )
+            entry.strip_string_fields()
+            entries.append(entry)
+
+        DataChangeNotificationQueue.push_many("ixf", changes)
+        IXLanIXFMemberImportLogEntry.objects.bulk_create(entries)
 
     def parse(self, data):
         """
@@ -919,9 +1595,113 @@ class Importer:
             - data <dict>: result from fetch()
         """
         self.switch_map = self.build_switch_map(data)
+        self.preload(data.get("member_list", []))
         with transaction.atomic():
             self.parse_members(data.get("member_list", []))
 
+    def preload(self, member_list):
+        """
+        Load the peeringdb objects referenced by the ixf member list
+        up front, so parsing the members does not need to query them
+        one at a time.
+
+        Loads the networks, netixlans (by ip address) and IXFMemberData
+        instances (by asn) referenced in the member list as well as
+        the active prefixes of the ixlan.
+
+        Arguments:
+            - member_list <list>
+        """
+
+        asns = set()
+        ipaddr4 = set()
+        ipaddr6 = set()
+
+        for member in member_list:
+            asn = member.get("asnum")
+
+            if self.asn and asn != self.asn:
+                continue
+
+            asns.add(asn)
+
+            for connection in member.get("connection_list", []):
+                for vlan in connection.get("vlan_list", []):
+                    for addrs, version, cls in (
+                        (ipaddr4, "ipv4", ipaddress.IPv4Address),
+                        (ipaddr6, "ipv6", ipaddress.IPv6Address),
+                    ):
+                        address = (vlan.get(version) or {}).get("address")
+                        if not address:
+                            continue
+                        try:
+                            addrs.add(cls(f"{address}"))
+                        except (ipaddress.AddressValueError, ValueError):
+                            # reported during parse_vlans
+                            continue
+
+        self.networks = {net.asn: net for net in Network.objects.filter(asn__in=asns)}
+
+        self.prefixes = list(self.ixlan.ixpfx_set_active)
+        self.prefix_index = PrefixIndex()
+        for pfx in self.prefixes:
+            self.prefix_index.add(pfx.prefix, pfx)
+
+        # first netixlan (by id) for each ip address
+
+        self.netixlans_ip4 = {}
+        self.netixlans_ip6 = {}
+
+        qset = NetworkIXLan.objects.filter(status="ok").filter(
+            Q(ipaddr4__in=ipaddr4) | Q(ipaddr6__in=ipaddr6)
+        )
+
+        for netixlan in qset.order_by("id"):
+            if netixlan.ipaddr4:
+                self.netixlans_ip4.setdefault(f"{netixlan.ipaddr4}", netixlan)
+            if netixlan.ipaddr6:
+                self.netixlans_ip6.setdefault(f"{netixlan.ipaddr6}", netixlan)
+
+        self.ixf_member_data = {asn: [] for asn in asns}
+
+        for ixf_member_data in IXFMemberData.objects.filter(asn__in=asns):
+            self.ixf_member_data[ixf_member_data.asn].append(ixf_member_data)
+
+    def test_ip_address(self, addr):
+        """
+        Test that the ip address exists in one of the active prefixes
+        of the ixlan, as loaded by `preload`.
+        """
+
+        if not addr:
+            return False
+        try:
+            candidates = self.prefix_index.containing(addr)
+        except ValueError:
+            return False
+        return any(pfx.test_ip_address(addr) for pfx in candidates)
+
+    def netixlan_for_ip(self, version, addr):
+        """
+        Return the first active netixlan using the ip address, as
+        loaded by `preload`.
+
+        Arguments:
+            - version <int>: 4 or 6
+            - addr <ipaddress.IPv4Address|ipaddress.IPv6Address|None>
+        """
+
+        if addr is None:
+            # matches netixlans without an address for the protocol,
+            # those are not preloaded
+            return NetworkIXLan.objects.filter(
+                status="ok", **{f"ipaddr{version}": None}
+            ).first()
+
+        if version == 4:
+            return self.netixlans_ip4.get(f"{addr}")
+        return self.netixlans_ip6.get(f"{addr}")
+
     def parse_members(self, member_list):
         """
         Parse the `member_list` section of the ixf schema.
@@ -943,11 +1723,10 @@ class Importer:
                 continue
 
             # keep track of asns we find in the IX-F data
-            if asn not in self.asns:
-                self.asns.append(asn)
+            self.asns.add(asn)
 
-            if Network.objects.filter(asn=asn).exists():
-                network = Network.objects.get(asn=asn)
+            network = self.networks.get(asn)
+            if network:
                 if network.status != "ok":
                     self.log_peer(
                         asn,
@@ -1071,8 +1850,8 @@ class Importer:
                 )
                 continue
 
-            ipv4_valid_for_ixlan = self.ixlan.test_ipv4_address(ipv4_addr)
-            ipv6_valid_for_ixlan = self.ixlan.test_ipv6_address(ipv6_addr)
+            ipv4_valid_for_ixlan = self.test_ip_address(ipv4_addr)
+            ipv6_valid_for_ixlan = self.test_ip_address(ipv6_addr)
 
             if (
                 ipv4_addr
@@ -1145,6 +1924,8 @@ class Importer:
                         ixlan=self.ixlan,
                         save=False,
                         validate_network_protocols=False,
+                        net=network,
+                        candidates=self.ixf_member_data.get(asn),
                     ),
                     "protocol-conflict",
                     ac=False,
@@ -1154,23 +1935,19 @@ class Importer:
                     ipaddr6=ipv6_addr,
                 )
 
-            self.ixf_ids.append(ixf_id)
+            self.ixf_ids[ixf_id] = True
 
             if not network.ipv6_support:
-                self.ixf_ids.append((asn, ixf_id[1], None))
-                netixlan = NetworkIXLan.objects.filter(
-                    status="ok", ipaddr4=ixf_id[1]
-                ).first()
+                self.ixf_ids[(asn, ixf_id[1], None)] = True
+                netixlan = self.netixlan_for_ip(4, ixf_id[1])
                 if netixlan:
-                    self.ixf_ids.append((asn, ixf_id[1], netixlan.ipaddr6))
+                    self.ixf_ids[(asn, ixf_id[1], netixlan.ipaddr6)] = True
 
             if not network.ipv4_support:
-                self.ixf_ids.append((asn, None, ixf_id[2]))
-                netixlan = NetworkIXLan.objects.filter(
-                    status="ok", ipaddr6=ixf_id[2]
-                ).first()
+                self.ixf_ids[(asn, None, ixf_id[2])] = True
+                netixlan = self.netixlan_for_ip(6, ixf_id[2])
                 if netixlan:
-                    self.ixf_ids.append((asn, netixlan.ipaddr4, ixf_id[2]))
+                    self.ixf_ids[(asn, netixlan.ipaddr4, ixf_id[2])] = True
 
             if connection.get("state", "active") == "inactive":
                 operational = False
@@ -1194,6 +1971,8 @@ class Importer:
                     data=json.dumps(member),
                     ixlan=self.ixlan,
                     save=self.save,
+                    net=network,
+                    candidates=self.ixf_member_data.get(asn),
                 )
 
                 if not ixf_member_data.ipaddr4 and not ixf_member_data.ipaddr6:
@@ -1397,24 +2176,12 @@ class Importer:
                 )
 
     def consolidate_delete_add(self, ixf_member_data):
-        ip4_deletion = None
-        ip6_deletion = None
-
-        for ixf_id, deletion in self.deletions.items():
-            if deletion.asn == ixf_member_data.asn:
-                if (
-                    deletion.ipaddr4
-                    and deletion.ipaddr4 == ixf_member_data.init_ipaddr4
-                ):
-                    ip4_deletion = deletion
-                if (
-                    deletion.ipaddr6
-                    and deletion.ipaddr6 == ixf_member_data.init_ipaddr6
-                ):
-                    ip6_deletion = deletion
-
-            if ip4_deletion and ip6_deletion:
-                break
+        ip4_deletion = self.deletions_by_ip.get(
+            (ixf_member_data.asn, 4, ixf_member_data.init_ipaddr4)
+        )
+        ip6_deletion = self.deletions_by_ip.get(
+            (ixf_member_data.asn, 6, ixf_member_data.init_ipaddr6)
+        )
 
         if not ip4_deletion and not ip6_deletion:
             return
@@ -1482,6 +2249,30 @@ class Importer:
             ixlan=self.ixlan, defaults={"info": "\n".join(json.dumps(self.log))}
         )
 
+    def save_timings(self):
+        """
+        Emit the import phase timings as a structured log and
+        store them with the attempt log.
+        """
+
+        if not self.ixlan:
+            return
+
+        log.info(
+            "ixf_import_timings",
+            ixlan_id=self.ixlan.id,
+            **{
+                f"{name}_{key}": round(value, 3) if key == "time" else value
+                for name, timing in self.timings.items()
+                for key, value in timing.items()
+            },
+        )
+
+        if self.save:
+            IXLanIXFMemberImportAttempt.objects.filter(ixlan=self.ixlan).update(
+                timings=self.timings
+            )
+
     def reset_log(self):
         """
         Reset the attempt log.
@@ -540,8 +540,9 @@ class Command(PeeringDBBaseCommand):
 
         dump_dir = options.get("dump_dir")
 
-        # Health first: load_index expands every dump (measured ~19s / 700MB), so a
-        # dump set that cannot be written from should be rejected before paying it.
+        # Health first: load_index expands every dump (measured ~19s / 700MB) when
+        # the fetch left no current index, so a dump set that cannot be written
+        # from should be rejected before paying it.
         if commit:
             self._check_index_health(dump_dir, options.get("allow_stale_index"))
 
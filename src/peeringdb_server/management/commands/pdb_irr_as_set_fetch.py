@@ -19,6 +19,14 @@ remaining sources are refreshed either way. The command then exits non-zero,
 because the run otherwise looks successful while a registry silently stops
 refreshing and pdb_irr_as_set_cleanup --commit auto-prefixes from an ageing index.
 
+A --commit run finishes by warming the live lookup cache from the index: every
+source-pinned token a published irr_as_set uses that the index holds in its pinned
+registry is cached as existing (irr.warm_exists_cache), so the save path answers a
+re-save of a known value without waiting on the pool, for as long as a live
+answer is cached. Only sources this run refreshed or found current are warmed,
+so neither one that failed nor one --source left out is, and a token the index
+lacks is left to the pool.
+
 Usage:
   manage pdb_irr_as_set_fetch [--source SOURCE] [--force] [--commit]
                               [--dump-dir PATH] [--max-age-hours HOURS]
@@ -26,8 +34,13 @@ Usage:
 
 from django.core.management.base import CommandError
 
-from peeringdb_server import irr_bulk
+from peeringdb_server import irr, irr_bulk
+from peeringdb_server import models as pdb_models
 from peeringdb_server.management.commands.pdb_base_command import PeeringDBBaseCommand
+from peeringdb_server.validators import (
+    irr_as_set_pinned_source,
+    tokenize_irr_as_set,
+)
 
 
 class Command(PeeringDBBaseCommand):
@@ -96,6 +109,17 @@ class Command(PeeringDBBaseCommand):
         unhealthy = [
             outcome for outcome in outcomes if outcome.status in ("stale", "failed")
         ]
+
+        warmed = self.warm_lookup_cache(
+            options["dump_dir"],
+            [
+                outcome.source
+                for outcome in outcomes
+                if outcome.status in ("fresh", "updated")
+            ],
+        )
+        self.stdout.write(f"warmed {warmed} IRR existence answer(s) from the index")
+
         if unhealthy:
             raise CommandError(
                 "IRR dump refresh failed for "
@@ -106,3 +130,26 @@ class Command(PeeringDBBaseCommand):
                 + " -- pdb_irr_as_set_cleanup --commit will refuse the resulting "
                 "index while any source is stale or missing."
             )
+
+    def warm_lookup_cache(self, dump_dir, sources):
+        """
+        Cache an existence answer from the index for every token of every
+        published irr_as_set pinned to one of `sources`. Returns how many were
+        cached.
+        """
+        index = irr_bulk.load_index(dump_dir)
+        if index is None:
+            return 0
+
+        checks = set()
+        values = (
+            pdb_models.Network.objects.filter(status="ok")
+            .exclude(irr_as_set="")
+            .values_list("irr_as_set", flat=True)
+        )
+        for value in values.iterator():
+            for token in tokenize_irr_as_set(value):
+                source, name = irr_as_set_pinned_source(token)
+                if source is not None:
+                    checks.add((source, name))
+        return irr.warm_exists_cache(checks, index, sources)
@@ -16,7 +16,22 @@ default, --commit, --dump-dir, --allow-stale-index.
 Every status=ok network with a value is swept on every run, rather than tracking
 which rows were saved during a lookup outage. That covers the save path's
 fail-open accepts with no extra field to keep in sync, and it is the only design
-that also covers rows written by a non-clean() writer.
+that also covers rows written by a non-clean() writer. The one row a run passes
+over is a standing `ok` the index reached on its own, whose value and dump-index
+serials are both still the ones that verdict was about (irr_as_set_verified_value
+/ _serials): the same value checked against the same data cannot come out
+differently, so it is not classified again. It is still verified as of this run,
+which is what the record shows irr_as_set_verified as, so those rows are stamped
+with one grouped update per chunk instead of ~18.5k row writes. --full
+re-verifies those too. A verdict the live pool had to confirm is about data the
+dumps do not hold, so it is re-checked like every other verdict, which also keeps
+moved/gone reminders and `unknown` retries working.
+
+--commit writes each chunk of networks (ordered by ASN) in its own transaction
+and then records the chunk's last ASN as a cursor in the cache. A run that is
+killed part-way keeps what it committed, and the next --commit run resumes after
+that ASN instead of starting over; a run that reaches the end clears the cursor.
+--restart ignores it.
 
 Each prefixed token is resolved against the local bulk dump index first and goes
 to the live pool only when the index does not hold it in its pinned source. The
@@ -56,14 +71,17 @@ Usage:
   manage pdb_irr_as_set_status [--detail] [--dump-dir PATH] [--commit]
                                [--max-lookups N] [--max-notifications N]
                                [--renotify-after-days N] [--allow-stale-index]
+                               [--full] [--restart]
 """
 
 import logging
 from collections import namedtuple
 from datetime import timedelta
 
+from django.core.cache import cache
 from django.core.management.base import CommandError
 from django.db import transaction
+from django.db.models import Case, F, Value, When
 from django.utils import timezone
 
 from peeringdb_server import irr, irr_bulk
@@ -163,10 +181,17 @@ BUDGET_SPENT = "budget-spent"
 RETRACTED_STATE = {
     "irr_as_set_status": STATUS_UNKNOWN,
     "irr_as_set_verified": None,
+    "irr_as_set_verified_value": "",
+    "irr_as_set_verified_serials": "",
     "irr_as_set_missing_since": None,
     "irr_as_set_verify_notified": None,
 }
 
+# The ASN of the last network an interrupted --commit sweep committed. In the cache
+# with no timeout, like the IX-F import state: it is run bookkeeping, not data, and
+# losing it only costs a sweep from the start.
+CURSOR_CACHE_KEY = "IRR-AS-SET-STATUS-CURSOR"
+
 # One network's re-verification outcome. `moved_to` is the registries that do hold
 # a token missing from its pinned source, which is what makes the `moved` mail say
 # something useful instead of "your as-set does not exist". `lookups` is what the
@@ -192,6 +217,54 @@ def _id_chunks(ids, size=_ID_CHUNK):
         yield ids[start : start + size]
 
 
+def _network_chunks(networks, size=_ID_CHUNK):
+    """Yield the networks of an iterator in lists of up to `size`."""
+    chunk = []
+    for net in networks:
+        chunk.append(net)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _unchanged_since_verified(net, serials):
+    """
+    Whether `net` stands verified, by the index alone, for the value it holds
+    against the index data identified by `serials` -- nothing a re-check could
+    tell us.
+
+    Only `ok` qualifies: moved/gone rows are re-checked for recovery and reminders,
+    and `unknown` is what a retry is for. _apply_state records a fingerprint only
+    for an `ok` that cost no live lookup, and no index means no serials, so nothing
+    the pool vouched for is ever passed over.
+    """
+    return bool(
+        serials
+        and net.irr_as_set_status == STATUS_OK
+        and net.irr_as_set_verified_serials == serials
+        and net.irr_as_set_verified_value == net.irr_as_set
+    )
+
+
+def _live_names(networks, index):
+    """
+    The distinct names, in sweep order, that verifying `networks` sends to the
+    live pool: every pinned token the index does not hold in its pinned source,
+    the same test _verify_token applies.
+    """
+    names = {}
+    for net in networks:
+        for source, name in _source_pins(net.irr_as_set):
+            if source is None:
+                continue
+            if index is not None and source in irr_bulk.sources_for_bulk(name, index):
+                continue
+            names[name.upper()] = None
+    return list(names)
+
+
 def _retracted_lookup():
     """
     RETRACTED_STATE as queryset lookups, so the filter cannot drift from the update.
@@ -368,6 +441,23 @@ class Command(PeeringDBBaseCommand):
                 "the one-time cleanup campaign this defaults to on."
             ),
         )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help=(
+                "Re-verify networks whose `ok` verdict was reached for the same "
+                "value against the same dump serials, which are otherwise left "
+                "as they are."
+            ),
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help=(
+                "Sweep from the lowest ASN even if an earlier --commit run was "
+                "interrupted, instead of resuming after its last committed chunk."
+            ),
+        )
         parser.add_argument(
             "--allow-stale-index",
             action="store_true",
@@ -386,6 +476,7 @@ class Command(PeeringDBBaseCommand):
         max_lookups = options.get("max_lookups") or 0
         max_notifications = options.get("max_notifications") or 0
         renotify_after_days = options.get("renotify_after_days") or 0
+        full = options.get("full")
 
         if max_lookups < 0:
             raise CommandError("--max-lookups must be zero or greater.")
@@ -398,9 +489,9 @@ class Command(PeeringDBBaseCommand):
         # call pdb_irr_as_set_cleanup makes, for the same two reasons. Uncapped mail
         # over a large moved/gone population is one. Uncapped lookups is the other:
         # at ~3.4s per pool query, a sweep whose dumps do not cover the set is many
-        # hours, and because the state writes land after the loop a killed run
-        # commits nothing and repeats forever. Make the operator state the batch
-        # size.
+        # hours -- a run a deploy or a restart cuts short. The chunk commits and the
+        # resume cursor mean such a run is not wasted, but the budget is what makes
+        # each run finish. Make the operator state the batch size.
         if commit and not max_notifications:
             raise CommandError(
                 "--commit needs a positive --max-notifications: 0 uncaps the "
@@ -409,17 +500,20 @@ class Command(PeeringDBBaseCommand):
         if commit and not max_lookups:
             raise CommandError(
                 "--commit needs a positive --max-lookups: 0 uncaps the live pool "
-                "queries, and a run killed part-way commits nothing (default 1000)."
+                "queries, and a sweep of many hours is one a deploy or a restart "
+                "cuts short (default 1000)."
             )
 
         dump_dir = options.get("dump_dir")
 
-        # Health before load_index, which expands every dump (~19s): a dump set
-        # that only makes the run slower should be rejected before paying for it.
+        # Health before load_index, which expands every dump (~19s) unless the
+        # fetch left a current index: a dump set that only makes the run slower
+        # should be rejected before paying for it.
         if commit:
             self._check_index_health(dump_dir, options.get("allow_stale_index"))
 
         index = irr_bulk.load_index(dump_dir)
+        serials = irr_bulk.index_serials(dump_dir) if index is not None else ""
 
         networks = (
             pdb_models.Network.objects.filter(status="ok")
@@ -427,57 +521,118 @@ class Command(PeeringDBBaseCommand):
             .order_by("asn")
         )
 
+        # Only --commit moves the cursor, so only --commit resumes from it: a dry
+        # run always reports on the whole set.
+        resume_after = None
+        if commit and not options.get("restart"):
+            resume_after = cache.get(CURSOR_CACHE_KEY)
+        if resume_after is not None:
+            networks = networks.filter(asn__gt=resume_after)
+
         counts = dict.fromkeys(REPORT_STATUSES, 0)
+        unchanged = 0
         lookups = 0
-        # Ids, not instances, for the state write: the sweep is ~18.5k networks and
-        # holding one Network per row would undo the .iterator() below. Only the
-        # moved/gone rows keep their instance, because mailing needs the object.
-        state_ids = {status: [] for status in STATE_STATUSES}
-        notify_candidates = []  # (net, NetworkVerification)
-        # Whitespace-only rows: counted nowhere, but a verdict they still carry has to
-        # be retracted. Collected here because .strip() decides, not a SQL predicate.
-        valueless_ids = []
+        notified = 0
+
+        # live answers fetched for a chunk of networks in one pipelined batch
+        prefetched = {}
 
         def resolve(name):
             nonlocal lookups
             if max_lookups and lookups >= max_lookups:
                 return BUDGET_SPENT
             lookups += 1
-            return irr.sources_for(name)
+            result = prefetched.get(name.upper())
+            if result is None:
+                result = irr.sources_for(name)
+            return result
+
+        for chunk in _network_chunks(networks.iterator()):
+            # Ids, not instances, for the state write. Only the moved/gone rows keep
+            # their instance, because mailing needs the object.
+            state_ids = {status: [] for status in STATE_STATUSES}
+            verified_values = {}
+            notify_candidates = []  # (net, NetworkVerification)
+            # Whitespace-only rows: counted nowhere, but a verdict they still carry
+            # has to be retracted. Collected here because .strip() decides, not a
+            # SQL predicate.
+            valueless_ids = []
+            unchanged_ids = []
+
+            sweep = []
+            for net in chunk:
+                if not full and _unchanged_since_verified(net, serials):
+                    counts[STATUS_OK] += 1
+                    unchanged += 1
+                    unchanged_ids.append(net.id)
+                else:
+                    sweep.append(net)
+
+            # Every name the index cannot verify goes to the pool in one batch,
+            # rather than one connection per name and mirror as the loop below
+            # reaches it. Never more names than the budget has left, so the
+            # batch cannot spend what --max-lookups would have deferred.
+            names = _live_names(sweep, index)
+            if max_lookups:
+                names = names[: max(max_lookups - lookups, 0)]
+            prefetched = irr.sources_for_many(names) if names else {}
+
+            for net in sweep:
+                if not net.irr_as_set.strip():
+                    valueless_ids.append(net.id)
+                    continue
+
+                result = verify_network(net.irr_as_set, index, resolve)
+                counts[result.status] += 1
+
+                if result.status in state_ids:
+                    state_ids[result.status].append(net.id)
+                if result.status == STATUS_OK and not result.lookups:
+                    verified_values[net.id] = net.irr_as_set
+                if result.status in NOTIFY_STATUSES:
+                    notify_candidates.append((net, result))
+
+                if detail and result.status != STATUS_OK:
+                    self.stdout.write(
+                        f"[{result.status}] id:{net.id} asn:{net.asn} "
+                        f"irr_as_set:'{net.irr_as_set}' ({result.note})"
+                    )
 
-        for net in networks.iterator():
-            if not net.irr_as_set.strip():
-                valueless_ids.append(net.id)
+            if not commit:
                 continue
 
-            result = verify_network(net.irr_as_set, index, resolve)
-            counts[result.status] += 1
-
-            if result.status in state_ids:
-                state_ids[result.status].append(net.id)
-            if result.status in NOTIFY_STATUSES:
-                notify_candidates.append((net, result))
-
-            if detail and result.status != STATUS_OK:
-                self.stdout.write(
-                    f"[{result.status}] id:{net.id} asn:{net.asn} "
-                    f"irr_as_set:'{net.irr_as_set}' ({result.note})"
+            # Every live lookup for the chunk is already behind us, so unlike the
+            # cleanup command this transaction holds no third-party query open and
+            # the chunk's write-and-mail decision can live inside it.
+            with transaction.atomic():
+                self._apply_state(
+                    state_ids,
+                    valueless_ids,
+                    verified_values=verified_values,
+                    serials=serials,
+                    unchanged_ids=unchanged_ids,
                 )
+                # what is left of --max-notifications; _prepare_notifications
+                # reads 0 as uncapped, so a spent cap must not reach it
+                remaining = max_notifications - notified
+                if remaining > 0:
+                    pending = self._prepare_notifications(
+                        notify_candidates, remaining, renotify_after_days
+                    )
+                    self._schedule_notifications(pending)
+                    notified += len(pending)
+
+            # after the commit, so the cursor never points past an uncommitted chunk
+            cache.set(CURSOR_CACHE_KEY, chunk[-1].asn, timeout=None)
 
-        notified = 0
         if commit:
-            # Every live lookup is already behind us, so unlike the cleanup command
-            # this transaction holds no third-party query open and the whole
-            # write-and-mail decision can live inside it.
-            with transaction.atomic():
-                self._apply_state(state_ids, valueless_ids)
-                pending = self._prepare_notifications(
-                    notify_candidates, max_notifications, renotify_after_days
-                )
-                self._schedule_notifications(pending)
-            notified = len(pending)
+            self._retract_cleared()
+            # the sweep reached the end; the next run starts from the beginning
+            cache.delete(CURSOR_CACHE_KEY)
 
-        self._write_summary(counts, lookups, max_lookups, index is not None)
+        self._write_summary(
+            counts, lookups, max_lookups, index is not None, unchanged, resume_after
+        )
         if commit:
             self._write_commit_summary(
                 notified,
@@ -512,7 +667,15 @@ class Command(PeeringDBBaseCommand):
             "pdb_irr_as_set_fetch --commit, or pass --allow-stale-index to override."
         )
 
-    def _apply_state(self, state_ids, valueless_ids=None, now=None):
+    def _apply_state(
+        self,
+        state_ids,
+        valueless_ids=None,
+        now=None,
+        verified_values=None,
+        serials="",
+        unchanged_ids=None,
+    ):
         """
         Record each network's outcome inside the caller's transaction.
 
@@ -526,13 +689,20 @@ class Command(PeeringDBBaseCommand):
 
         Transitions, mirroring pdb_rir_status:
           ok            -> stamp irr_as_set_verified, clear irr_as_set_missing_since
-                           and irr_as_set_verify_notified
+                           and irr_as_set_verify_notified; with
+                           `verified_values` ({id: value} for the rows the index
+                           verified on its own), record the value and index
+                           `serials` the verdict was about, and clear them on
+                           the rest
+          unchanged     -> `unchanged_ids`, passed over as verified against the
+                           same value and `serials`: stamp irr_as_set_verified
+                           only, in one update per chunk
           moved / gone  -> set irr_as_set_missing_since only if it is not set yet
           unknown       -> status only, and not over a standing moved/gone; the
                            pool failing to answer is not evidence
           skipped       -> retract any standing verdict; see below
-          no value      -> retract too: `valueless_ids` plus every irr_as_set=""
-                           row, neither of which the sweep visits
+          no value      -> retract too: `valueless_ids`, which the sweep does not
+                           classify (_retract_cleared covers irr_as_set="")
 
         `missing_since` answers "since when" for the report and any future
         escalation, so it is not re-stamped while the value is still missing;
@@ -561,12 +731,35 @@ class Command(PeeringDBBaseCommand):
         networks = pdb_models.Network.objects
 
         for chunk in _id_chunks(state_ids.get(STATUS_OK)):
-            networks.filter(id__in=chunk).update(
+            fields = {
+                "irr_as_set_status": STATUS_OK,
+                "irr_as_set_verified": now,
+                "irr_as_set_missing_since": None,
+                "irr_as_set_verify_notified": None,
+            }
+            if verified_values is not None:
+                # The value the sweep classified, not F("irr_as_set"): an edit
+                # landing between the read and this write must not be recorded as
+                # verified, so it mismatches and is re-checked next run.
+                fields["irr_as_set_verified_value"] = Case(
+                    *(
+                        When(id=net_id, then=Value(verified_values.get(net_id, "")))
+                        for net_id in chunk
+                    ),
+                    default=Value(""),
+                )
+                fields["irr_as_set_verified_serials"] = serials
+            networks.filter(id__in=chunk).update(**fields)
+
+        for chunk in _id_chunks(unchanged_ids):
+            # Re-checked in the WHERE clause: a row edited since the sweep read it
+            # is no longer what was passed over, and keeps its old stamp.
+            networks.filter(
+                id__in=chunk,
                 irr_as_set_status=STATUS_OK,
-                irr_as_set_verified=now,
-                irr_as_set_missing_since=None,
-                irr_as_set_verify_notified=None,
-            )
+                irr_as_set_verified_serials=serials,
+                irr_as_set_verified_value=F("irr_as_set"),
+            ).update(irr_as_set_verified=now)
 
         for status in NOTIFY_STATUSES:
             for chunk in _id_chunks(state_ids.get(status)):
@@ -595,16 +788,21 @@ class Command(PeeringDBBaseCommand):
         for chunk in _id_chunks(state_ids.get(STATUS_SKIPPED)):
             self._retract(networks.filter(id__in=chunk))
 
-        # A network with no value is never swept -- the queryset excludes "" and the
-        # loop skips whitespace-only -- so its verdict would stand forever, and that
-        # is the row most likely to carry one: emptying the field is how some
-        # operators comply with the gone mail. Two updates from outside the per-row
-        # path, so the sweep's exclusion and therefore the report counts stay as they
-        # are.
-        self._retract(networks.filter(status="ok", irr_as_set=""))
         for chunk in _id_chunks(valueless_ids):
             self._retract(networks.filter(id__in=chunk))
 
+    def _retract_cleared(self):
+        """
+        Retract the verdict of every status=ok network with irr_as_set="".
+
+        A network with no value is never swept -- the queryset excludes "" and the
+        loop skips whitespace-only -- so its verdict would stand forever, and that
+        is the row most likely to carry one: emptying the field is how some
+        operators comply with the gone mail. Done from outside the per-row path, so
+        the sweep's exclusion and therefore the report counts stay as they are.
+        """
+        self._retract(pdb_models.Network.objects.filter(status="ok", irr_as_set=""))
+
     def _retract(self, qset):
         """
         Drop a verdict that is not about the value the network holds now: status back
@@ -726,16 +924,28 @@ class Command(PeeringDBBaseCommand):
 
         transaction.on_commit(_send)
 
-    def _write_summary(self, counts, lookups, max_lookups, has_index):
+    def _write_summary(
+        self, counts, lookups, max_lookups, has_index, unchanged=0, resume_after=None
+    ):
         swept = sum(counts.values())
         w = self.stdout.write
         w("")
         mode = "commit" if self.commit else "dry-run"
         w(f"=== irr_as_set re-verification report (status=ok, {mode}) ===")
         w(f"Networks with a value:       {swept}")
+        if resume_after is not None:
+            w(
+                f"  resumed after AS{resume_after}, where an earlier run stopped "
+                "(--restart to sweep from the start)"
+            )
         w("")
         w("Re-verification outcome:")
         w(f"  verified present:          {counts[STATUS_OK]}")
+        if unchanged:
+            w(
+                f"    unchanged since verified:  {unchanged}  (same value and "
+                "index serials; --full re-checks)"
+            )
         w(f"  moved to another registry: {counts[STATUS_MOVED]}")
         w(f"  gone from every registry:  {counts[STATUS_GONE]}")
         w(f"  pool could not answer:     {counts[STATUS_UNKNOWN]}  (retried next run)")
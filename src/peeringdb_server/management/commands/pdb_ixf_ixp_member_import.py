@@ -2,13 +2,16 @@
 Run the IX-F Importer.
 """
 
+import io
 import json
+import multiprocessing
 import sys
 import traceback
+from concurrent.futures import ProcessPoolExecutor
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import IntegrityError, OperationalError, connections, transaction
 
 from peeringdb_server import ixf
 from peeringdb_server.models import (
@@ -18,9 +21,44 @@ from peeringdb_server.models import (
     IXFMemberData,
     IXLan,
     Network,
+    NetworkIXLan,
 )
 
 
+def import_worker(options, ixlans):
+    """
+    Import a group of ixlans, one after the other, in a worker process.
+
+    Arguments:
+        - options <dict>: command state as returned by `Command.worker_options`
+        - ixlans <list>: (ixlan id, prefetched IX-F data and timings or
+          None) tuples
+
+    Returns dict with the command output, import log, notifications,
+    phase timings, runtime errors and conflicting ixlan ids collected
+    by the worker.
+    """
+
+    output = io.StringIO()
+    command = Command(stdout=output)
+    command.configure(**options)
+    for ixlan_id, prefetched in ixlans:
+        command.import_ixlan(
+            IXLan.objects.get(id=ixlan_id),
+            prefetched=prefetched,
+            defer_conflicts=True,
+        )
+
+    return {
+        "output": output.getvalue(),
+        "log": command.total_log,
+        "notifications": command.total_notifications,
+        "timings": command.total_timings,
+        "runtime_errors": command.runtime_errors,
+        "conflicts": command.conflicts,
+    }
+
+
 class Command(BaseCommand):
     help = "Updates netixlan instances for all ixlans that have their ixf_ixp_member_list_url specified"
     commit = False
@@ -49,6 +87,25 @@ class Command(BaseCommand):
         parser.add_argument(
             "--cache", action="store_true", help="Only use locally cached IX-F data"
         )
+        parser.add_argument(
+            "--fetch-workers",
+            type=int,
+            default=settings.IXF_FETCH_WORKERS,
+            help="Number of IX-F exports to download concurrently before the import",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.IXF_IMPORT_WORKERS,
+            help="Number of processes to import ixlans in",
+        )
+        parser.add_argument(
+            "--report-timings",
+            type=int,
+            default=0,
+            metavar="N",
+            help="Report where the time went for the N slowest ixlan imports",
+        )
         parser.add_argument(
             "--skip-import",
             action="store_true",
@@ -195,20 +252,314 @@ class Command(BaseCommand):
         resent_emails = importer.resend_emails()
         self.log(f"RE-SENT EMAILS: {len(resent_emails)}.")
 
-    def handle(self, *args, **options):
+    def prefetch(self, ixlans, max_workers):
+        """
+        Download and sanitize the IX-F exports of all ixlans concurrently
+        so slow exports don't hold up the import of the other ixlans.
+
+        Returns dict mapping member list url to a tuple of the IX-F data
+        and the timings of its download (see `ixf.Importer.prefetch`).
+        """
+
+        urls = [ixlan.ixf_ixp_member_list_url for ixlan in ixlans]
+
+        self.log(f"Prefetching data for {len(urls)} ixlans ({max_workers} workers)")
+
+        return ixf.Importer().prefetch(
+            urls, timeout=settings.IXF_FETCH_TIMEOUT, max_workers=max_workers
+        )
+
+    def configure(self, **options):
         self.commit = options.get("commit", False)
         self.debug = options.get("debug", False)
         self.preview = options.get("preview", False)
         self.cache = options.get("cache", False)
         self.skip_import = options.get("skip_import", False)
-        process_requested = options.get("process_requested", None)
-        ixlan_ids = options.get("ixlan")
-        asn = options.get("asn", 0)
+        self.process_requested = options.get("process_requested", None)
+        self.asn = options.get("asn", 0)
+
+        self.runtime_errors = []
+        self.conflicts = []
+        self.total_log = {"data": [], "errors": []}
+        self.total_notifications = []
+        self.total_timings = []
 
         # err and out should go to the same buffer (#967)
         if not self.preview:
             self.stderr = self.stdout
 
+    @property
+    def worker_options(self):
+        return {
+            "commit": self.commit,
+            "debug": self.debug,
+            "preview": self.preview,
+            "cache": self.cache,
+            "skip_import": self.skip_import,
+            "process_requested": self.process_requested,
+            "asn": self.asn,
+        }
+
+    def import_ixlan(self, ixlan, prefetched=None, defer_conflicts=False):
+        """
+        Run the import for a single ixlan in its own transaction.
+
+        Arguments:
+            - ixlan <IXLan>
+            - prefetched <tuple|None>: prefetched IX-F data and the
+              timings of its download
+            - defer_conflicts <bool>: if True, database conflicts are not
+              reported as errors, the ixlan id is collected in `conflicts`
+              instead so it can be imported again once no other worker
+              is writing
+        """
+
+        self.log(
+            f"Fetching data for -ixlan{ixlan.id} from {ixlan.ixf_ixp_member_list_url}"
+        )
+        data, timings = prefetched or (None, None)
+        success = None
+        deferred = False
+        try:
+            importer = ixf.Importer()
+            importer.skip_import = self.skip_import
+            importer.cache_only = self.cache
+            self.log(f"Processing {ixlan.ix.name} ({ixlan.id})")
+            with transaction.atomic():
+                success = importer.update(
+                    ixlan,
+                    save=self.commit,
+                    data=data,
+                    timings=timings,
+                    asn=self.asn,
+                    timeout=settings.IXF_FETCH_TIMEOUT,
+                )
+            self.log(json.dumps(importer.log), debug=True)
+            self.log(
+                "Success: {}, added: {}, updated: {}, deleted: {}".format(
+                    success,
+                    len(importer.actions_taken["add"]),
+                    len(importer.actions_taken["modify"]),
+                    len(importer.actions_taken["delete"]),
+                )
+            )
+            self.total_log["data"].extend(importer.log["data"])
+            self.total_log["errors"].extend(
+                [
+                    f"{ixlan.ix.name}({ixlan.id}): {err}"
+                    for err in importer.log["errors"]
+                ]
+            )
+            self.total_notifications += importer.notifications
+            self.total_timings.append(
+                {
+                    "ixlan_id": ixlan.id,
+                    "ix": ixlan.ix.name,
+                    "timings": importer.timings,
+                }
+            )
+
+        except (IntegrityError, OperationalError) as inst:
+            if not defer_conflicts:
+                self.store_runtime_error(inst, ixlan=ixlan)
+            else:
+                # ran into another worker despite the partitioning,
+                # the transaction has been rolled back
+                self.log(f"Deferring {ixlan.ix.name} ({ixlan.id}): {inst}")
+                self.conflicts.append(ixlan.id)
+                deferred = True
+        except Exception as inst:
+            self.store_runtime_error(inst, ixlan=ixlan)
+        finally:
+            if self.process_requested is not None and not deferred:
+                if success:
+                    ixlan.ix.ixf_import_request_status = "finished"
+                else:
+                    ixlan.ix.ixf_import_request_status = "error"
+                ixlan.ix.save_without_timestamp()
+
+    def member_asns(self, ixlans, prefetched):
+        """
+        Return dict mapping ixlan id to the ASNs whose rows (network,
+        netixlans, IX-F member data) importing that ixlan can write to.
+
+        These are the members in its IX-F data, the networks already
+        peering on it and the networks with IX-F member data on it.
+
+        Ixlans whose IX-F data is not known before the import, because
+        its download failed and will be retried, map to None.
+        """
+
+        ixlan_ids = [ixlan.id for ixlan in ixlans]
+        asns = {}
+
+        for ixlan in ixlans:
+            url = ixlan.ixf_ixp_member_list_url
+            if self.cache:
+                data = ixf.Importer().fetch_cached(url)
+            else:
+                data = prefetched.get(url, (None, None))[0]
+            if data is None:
+                asns[ixlan.id] = None
+                continue
+            asns[ixlan.id] = {
+                member["asnum"]
+                for member in data.get("member_list") or []
+                if isinstance(member, dict) and member.get("asnum")
+            }
+
+        for qset in (
+            NetworkIXLan.objects.filter(ixlan_id__in=ixlan_ids, status="ok"),
+            IXFMemberData.objects.filter(ixlan_id__in=ixlan_ids),
+        ):
+            for ixlan_id, asn in qset.values_list("ixlan_id", "asn"):
+                if asns[ixlan_id] is not None:
+                    asns[ixlan_id].add(asn)
+
+        return asns
+
+    def partition(self, ixlans, asns):
+        """
+        Split the ixlans into groups so no two groups share a member ASN.
+
+        Imports in different groups then never write the same network or
+        IX-F member data rows and can run concurrently, while the ixlans
+        of a group are imported one after the other.
+
+        Arguments:
+            - ixlans <list>
+            - asns <dict>: as returned by `member_asns`
+
+        Returns a list of ixlan groups, in the order of `ixlans`.
+        """
+
+        # union find over ixlan ids, joined through shared ASNs
+        parent = {ixlan.id: ixlan.id for ixlan in ixlans}
+
+        def root(ixlan_id):
+            while parent[ixlan_id] != ixlan_id:
+                parent[ixlan_id] = parent[parent[ixlan_id]]
+                ixlan_id = parent[ixlan_id]
+            return ixlan_id
+
+        first_seen = {}
+        for ixlan in ixlans:
+            for asn in asns[ixlan.id]:
+                other = first_seen.setdefault(asn, ixlan.id)
+                parent[root(ixlan.id)] = root(other)
+
+        groups = {}
+        for ixlan in ixlans:
+            groups.setdefault(root(ixlan.id), []).append(ixlan)
+        return list(groups.values())
+
+    def import_parallel(self, ixlans, prefetched, workers):
+        """
+        Import the ixlans in `workers` processes, each ixlan in its own
+        transaction.
+
+        Ixlans sharing a member ASN are imported one after the other by
+        the same worker (see `partition`), so workers never write to the
+        same network or IX-F member data rows. Ixlans whose members are
+        not known up front are imported sequentially once the workers are
+        done, as are ixlans that still ran into a database conflict.
+        """
+
+        asns = self.member_asns(ixlans, prefetched)
+        sequential = [ixlan for ixlan in ixlans if asns[ixlan.id] is None]
+        groups = self.partition(
+            [ixlan for ixlan in ixlans if asns[ixlan.id] is not None], asns
+        )
+
+        self.log(
+            f"Importing {len(ixlans) - len(sequential)} ixlans in "
+            f"{len(groups)} groups ({workers} workers)"
+        )
+
+        # worker processes are forked and must not share the database
+        # connections of this process
+        connections.close_all()
+
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            futures = [
+                (
+                    group,
+                    executor.submit(
+                        import_worker,
+                        self.worker_options,
+                        [
+                            (ixlan.id, prefetched.get(ixlan.ixf_ixp_member_list_url))
+                            for ixlan in group
+                        ],
+                    ),
+                )
+                for group in groups
+            ]
+
+            for group, future in futures:
+                try:
+                    result = future.result()
+                except Exception as inst:
+                    for ixlan in group:
+                        self.store_runtime_error(inst, ixlan=ixlan)
+                    continue
+
+                self.stdout.write(result["output"], ending="")
+                self.total_log["data"].extend(result["log"]["data"])
+                self.total_log["errors"].extend(result["log"]["errors"])
+                self.total_notifications += result["notifications"]
+                self.total_timings += result["timings"]
+                self.runtime_errors += result["runtime_errors"]
+                self.conflicts += result["conflicts"]
+
+        for ixlan in ixlans:
+            if ixlan.id in self.conflicts or asns[ixlan.id] is None:
+                self.import_ixlan(
+                    ixlan, prefetched=prefetched.get(ixlan.ixf_ixp_member_list_url)
+                )
+
+    def report_timings(self, slowest):
+        """
+        Output the time spent and queries made per phase for the
+        `slowest` ixlan imports.
+        """
+
+        imports = sorted(
+            self.total_timings,
+            key=lambda entry: entry["timings"].get("total", {}).get("time", 0),
+            reverse=True,
+        )[:slowest]
+
+        if not imports:
+            return
+
+        self.log(f"Slowest {len(imports)} imports:")
+
+        for entry in imports:
+            timings = dict(entry["timings"])
+            total = timings.pop("total", {"time": 0, "queries": 0})
+            self.log(
+                f"  {entry['ix']} ({entry['ixlan_id']}): "
+                f"{total['time']:.2f}s, {total['queries']} queries"
+            )
+            for name, timing in sorted(
+                timings.items(), key=lambda item: item[1]["time"], reverse=True
+            ):
+                self.log(
+                    f"    {name}: {timing['time']:.2f}s, {timing['queries']} queries"
+                )
+
+    def handle(self, *args, **options):
+        self.configure(**options)
+        fetch_workers = options.get("fetch_workers", settings.IXF_FETCH_WORKERS)
+        workers = options.get("workers", settings.IXF_IMPORT_WORKERS)
+        slowest = options.get("report_timings", 0)
+        process_requested = self.process_requested
+        ixlan_ids = options.get("ixlan")
+        asn = self.asn
+
         if process_requested is not None:
             ixlan_ids = []
             for ix in InternetExchange.ixf_import_request_queue(
@@ -225,8 +576,6 @@ class Command(BaseCommand):
 
         self.active_reset_flags = self.initiate_reset_flags(**options)
 
-        self.runtime_errors = []
-
         if self.reset or self.reset_hints:
             self.reset_all_hints()
         if self.reset or self.reset_dismisses:
@@ -261,62 +610,33 @@ class Command(BaseCommand):
             if ixlan_ids:
                 qset = qset.filter(id__in=ixlan_ids)
 
-        total_log = {"data": [], "errors": []}
-        total_notifications = []
-        for ixlan in qset:
-            self.log(
-                f"Fetching data for -ixlan{ixlan.id} from {ixlan.ixf_ixp_member_list_url}"
-            )
-            try:
-                importer = ixf.Importer()
-                importer.skip_import = self.skip_import
-                importer.cache_only = self.cache
-                self.log(f"Processing {ixlan.ix.name} ({ixlan.id})")
-                success = None
-                with transaction.atomic():
-                    success = importer.update(
-                        ixlan,
-                        save=self.commit,
-                        asn=asn,
-                        timeout=settings.IXF_FETCH_TIMEOUT,
-                    )
-                self.log(json.dumps(importer.log), debug=True)
-                self.log(
-                    "Success: {}, added: {}, updated: {}, deleted: {}".format(
-                        success,
-                        len(importer.actions_taken["add"]),
-                        len(importer.actions_taken["modify"]),
-                        len(importer.actions_taken["delete"]),
-                    )
-                )
-                total_log["data"].extend(importer.log["data"])
-                total_log["errors"].extend(
-                    [
-                        f"{ixlan.ix.name}({ixlan.id}): {err}"
-                        for err in importer.log["errors"]
-                    ]
-                )
-                total_notifications += importer.notifications
+        qset = list(qset)
 
-            except Exception as inst:
-                self.store_runtime_error(inst, ixlan=ixlan)
-            finally:
-                if process_requested is not None:
-                    if success:
-                        ixlan.ix.ixf_import_request_status = "finished"
-                    else:
-                        ixlan.ix.ixf_import_request_status = "error"
-                    ixlan.ix.save_without_timestamp()
+        # download all IX-F exports up front
+        if self.cache:
+            prefetched = {}
+        else:
+            prefetched = self.prefetch(qset, fetch_workers)
+
+        if workers > 1 and len(qset) > 1:
+            self.import_parallel(qset, prefetched, workers)
+        else:
+            for ixlan in qset:
+                self.import_ixlan(
+                    ixlan, prefetched=prefetched.get(ixlan.ixf_ixp_member_list_url)
+                )
 
         if self.preview:
-            self.stdout.write(json.dumps(total_log, indent=2))
+            self.stdout.write(json.dumps(self.total_log, indent=2))
+        elif slowest:
+            self.report_timings(slowest)
 
         # send cosolidated notifications to ix and net for
         # new proposals (#771)
 
         importer = ixf.Importer()
         importer.reset(save=self.commit)
-        importer.notifications = total_notifications
+        importer.notifications = self.total_notifications
         importer.notify_proposals(error_handler=self.store_runtime_error)
 
         self.stdout.write(f"New Emails: {importer.emails}")
@@ -0,0 +1,40 @@
+"""
+Show or reset the search result cache hit rate.
+"""
+
+from django.core.management.base import BaseCommand
+
+from peeringdb_server.search_v2 import (
+    bump_search_cache_generation,
+    reset_search_cache_stats,
+    search_cache_generation,
+    search_cache_stats,
+)
+
+
+class Command(BaseCommand):
+    help = "Show search result cache hit/miss counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Reset the hit/miss counters"
+        )
+        parser.add_argument(
+            "--invalidate",
+            action="store_true",
+            help="Invalidate all cached search results",
+        )
+
+    def handle(self, *args, **options):
+        if options.get("invalidate"):
+            bump_search_cache_generation()
+
+        self.stdout.write(f"generation: {search_cache_generation()}")
+        for kind, stats in search_cache_stats().items():
+            self.stdout.write(
+                f"{kind}: {stats['hits']} hits, {stats['misses']} misses, "
+                f"hit rate {stats['hit_rate']:.2%}"
+            )
+
+        if options.get("reset"):
+            reset_search_cache_stats()
@@ -2,6 +2,8 @@ from django_elasticsearch_dsl.management.commands.search_index import (
     Command as SearchIndexCommand,
 )
 
+from peeringdb_server.search_v2 import bump_search_cache_generation
+
 
 class Command(SearchIndexCommand):
     """
@@ -23,4 +25,7 @@ class Command(SearchIndexCommand):
     def handle(self, *args, **options):
         if options["max_age"] is not None:
             raise NotImplementedError("max-age is not yet implemented")
-        return super().handle(*args, **options)
+        result = super().handle(*args, **options)
+        # indexed documents may have changed, retire cached search results
+        bump_search_cache_generation()
+        return result
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.16 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("peeringdb_server", "0158_alter_network_irr_as_set"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ixlanixfmemberimportattempt",
+            name="timings",
+            field=models.JSONField(
+                blank=True,
+                help_text="Time spent and queries made per import phase",
+                null=True,
+            ),
+        ),
+    ]
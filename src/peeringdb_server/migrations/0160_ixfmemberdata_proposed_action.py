@@ -0,0 +1,36 @@
+# Generated by Django 5.2.16 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("peeringdb_server", "0159_ixlanixfmemberimportattempt_timings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ixfmemberdata",
+            name="proposed_action",
+            field=models.CharField(
+                blank=True,
+                help_text="Action implied by this entry, empty if it needs to be evaluated again",
+                max_length=8,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="ixfmemberdata",
+            name="net_actionable",
+            field=models.BooleanField(
+                default=False,
+                help_text="Proposed action is actionable by the network",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ixfmemberdata",
+            index=models.Index(
+                fields=["asn", "proposed_action"], name="ixfmember_action"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.16 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("peeringdb_server", "0160_ixfmemberdata_proposed_action"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="network",
+            name="irr_as_set_verified_value",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.AddField(
+            model_name="network",
+            name="irr_as_set_verified_serials",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=40
+            ),
+        ),
+    ]
@@ -22,6 +22,7 @@ When adding new fields to django-peeringdb make sure migration files for the sch
 Please open a merge request in peeringdb/django-peeringdb for the field addition as well.
 """
 
+import copy
 import datetime
 import ipaddress
 import json
@@ -72,6 +73,7 @@ import peeringdb_server.geo as geo
 from peeringdb_server.context import current_request, is_forced_ixlan_deletion
 from peeringdb_server.inet import RdapLookup, RdapNotFoundError
 from peeringdb_server.managers import CustomManager
+from peeringdb_server.prefix_index import ixlan_prefix_index
 from peeringdb_server.request import bypass_validation
 from peeringdb_server.validators import (
     clean_ixp_update_exclude,
@@ -3254,6 +3256,24 @@ class IXLan(pdb_models.IXLanBase, StripFieldMixin):
             except KeyError:
                 pass
 
+    @classmethod
+    def ixf_export_cache_key(cls, ixlan_id):
+        """
+        Returns the cache key the IX-F export member list of the
+        ixlan is stored at.
+        """
+        return f"IXF-EXPORT-{ixlan_id}"
+
+    @classmethod
+    def invalidate_ixf_export(cls, ixlan_ids):
+        """
+        Drops the cached IX-F export member lists of the specified
+        ixlans so they are built again on the next export request.
+        """
+        keys = [cls.ixf_export_cache_key(ixlan_id) for ixlan_id in set(ixlan_ids)]
+        if keys:
+            cache.delete_many(keys)
+
     @property
     def descriptive_name(self):
         """
@@ -3319,23 +3339,37 @@ class IXLan(pdb_models.IXLanBase, StripFieldMixin):
         """
         return f"{self.ix.name} IXLan ({self.id})"
 
-    def test_ipv4_address(self, ipv4):
+    def test_ip_address(self, addr):
         """
-        Test that the ipv4 a exists in one of the prefixes in this ixlan.
+        Test that the ip address exists in one of the prefixes in this ixlan.
+
+        Only the prefixes the shared prefix index has the address in are
+        loaded, none at all when it is in no prefix anywhere.
         """
-        for pfx in self.ixpfx_set_active:
-            if pfx.test_ip_address(ipv4):
+        if not addr:
+            return False
+        try:
+            candidates = ixlan_prefix_index().containing(addr)
+        except ValueError:
+            return False
+        if not candidates:
+            return False
+        for pfx in self.ixpfx_set_active.filter(id__in=candidates):
+            if pfx.test_ip_address(addr):
                 return True
         return False
 
+    def test_ipv4_address(self, ipv4):
+        """
+        Test that the ipv4 a exists in one of the prefixes in this ixlan.
+        """
+        return self.test_ip_address(ipv4)
+
     def test_ipv6_address(self, ipv6):
         """
         Test that the ipv6 address exists in one of the prefixes in this ixlan.
         """
-        for pfx in self.ixpfx_set_active:
-            if pfx.test_ip_address(ipv6):
-                return True
-        return False
+        return self.test_ip_address(ipv6)
 
     def clean(self):
         # id is set and does not match the parent ix id
@@ -3392,8 +3426,6 @@ class IXLan(pdb_models.IXLanBase, StripFieldMixin):
         ipv4 = netixlan_info.ipaddr4
         ipv6 = netixlan_info.ipaddr6
         asn = netixlan_info.asn
-        ipv4_valid = False
-        ipv6_valid = False
 
         def result(netixlan=None):
             return {
@@ -3405,11 +3437,8 @@ class IXLan(pdb_models.IXLanBase, StripFieldMixin):
 
         # check if either of the provided ip addresses are a fit for ANY of
         # the prefixes in this ixlan
-        for pfx in self.ixpfx_set_active:
-            if pfx.test_ip_address(ipv4):
-                ipv4_valid = True
-            if pfx.test_ip_address(ipv6):
-                ipv6_valid = True
+        ipv4_valid = self.test_ip_address(ipv4)
+        ipv6_valid = self.test_ip_address(ipv6)
 
         # If neither ipv4 nor ipv6 match any of the prefixes, log the issue
         # and bail
@@ -3589,6 +3618,11 @@ class IXLanIXFMemberImportAttempt(StripFieldMixin):
     )
     updated = models.DateTimeField(auto_now=True)
     info = models.TextField(null=True, blank=True)
+    timings = models.JSONField(
+        null=True,
+        blank=True,
+        help_text=_("Time spent and queries made per import phase"),
+    )
 
 
 class IXLanIXFMemberImportLog(StripFieldMixin):
@@ -3802,6 +3836,23 @@ class IXFMemberData(pdb_models.NetworkIXLanBase, StripFieldMixin):
         ),
     )
 
+    # denormalized state of the `action` and `actionable_for_network`
+    # properties, so proposals can be listed without evaluating them
+    # for every entry (see `refresh_proposed_actions`)
+
+    proposed_action = models.CharField(
+        max_length=8,
+        null=True,
+        blank=True,
+        help_text=_(
+            "Action implied by this entry, empty if it needs to be evaluated again"
+        ),
+    )
+    net_actionable = models.BooleanField(
+        default=False,
+        help_text=_("Proposed action is actionable by the network"),
+    )
+
     # field names of fields that can receive
     # modifications from IX-F
 
@@ -3815,19 +3866,26 @@ class IXFMemberData(pdb_models.NetworkIXLanBase, StripFieldMixin):
         db_table = "peeringdb_ixf_member_data"
         verbose_name = _("IX-F Member Data")
         verbose_name_plural = _("IX-F Member Data")
+        indexes = [
+            models.Index(fields=["asn", "proposed_action"], name="ixfmember_action")
+        ]
 
     class HandleRef:
         tag = "ixfmember"
 
     @classmethod
-    def id_filters(cls, asn, ipaddr4, ipaddr6, check_protocols=True):
+    def id_filters(cls, asn, ipaddr4, ipaddr6, check_protocols=True, net=None):
         """
         Returns a dict of filters to use with a
         IXFMemberData or NetworkIXLan query set
         to retrieve a unique entry.
+
+        The network for the asn will be retrieved if `net`
+        is not specified.
         """
 
-        net = Network.objects.get(asn=asn)
+        if net is None:
+            net = Network.objects.get(asn=asn)
 
         ipv4_support = net.ipv4_support or not check_protocols
         ipv6_support = net.ipv6_support or not check_protocols
@@ -3848,6 +3906,25 @@ class IXFMemberData(pdb_models.NetworkIXLanBase, StripFieldMixin):
 
         return filters
 
+    @classmethod
+    def match_id_filters(cls, instance, filters):
+        """
+        Returns whether or not the instance matches
+        the filters returned by `id_filters`
+        """
+
+        for key, value in filters.items():
+            field, _, lookup = key.partition("__")
+            current = getattr(instance, field)
+
+            if lookup == "isnull":
+                if (current is None) != value:
+                    return False
+            elif current is None or f"{current}" != f"{value}":
+                return False
+
+        return True
+
     @classmethod
     def instantiate(cls, asn, ipaddr4, ipaddr6, ixlan, **kwargs):
         """
@@ -3865,21 +3942,35 @@ class IXFMemberData(pdb_models.NetworkIXLanBase, StripFieldMixin):
         - operational(bool=True): peer is operational
         - is_rs_peer(bool=False): peer is route server
         - facility(Facility=None): resolved Facility instance from IX-F data
+        - net(Network=None): network for the asn, retrieved if not specified
+        - candidates(list=None): preloaded IXFMemberData instances for
+          the asn, queried if not specified
         """
 
         fetched = datetime.datetime.now().replace(tzinfo=UTC())
-        net = Network.objects.get(asn=asn)
+        net = kwargs.get("net") or Network.objects.get(asn=asn)
         validate_network_protocols = kwargs.get("validate_network_protocols", True)
         for_deletion = kwargs.get("delete", False)
+        candidates = kwargs.get("candidates")
 
         try:
-            id_filters = cls.id_filters(asn, ipaddr4, ipaddr6)
-            instances = cls.objects.filter(**id_filters)
+            id_filters = cls.id_filters(asn, ipaddr4, ipaddr6, net=net)
 
-            if not instances.exists():
+            if candidates is None:
+                instances = list(cls.objects.filter(**id_filters))
+            else:
+                # copies, so instantiating the same entry twice does
+                # not return the same object
+                instances = [
+                    copy.copy(candidate)
+                    for candidate in candidates
+                    if cls.match_id_filters(candidate, id_filters)
+                ]
+
+            if not instances:
                 raise cls.DoesNotExist()
 
-            if instances.count() > 1:
+            if len(instances) > 1:
                 # this only happens when a network switches on/off
                 # ipv4/ipv6 protocol support inbetween importer
                 # runs.
@@ -3889,8 +3980,16 @@ class IXFMemberData(pdb_models.NetworkIXLanBase, StripFieldMixin):
                         instance.delete(hard=True)
 
                 instance = cls.objects.get(**id_filters)
+
+                if candidates is not None:
+                    candidates[:] = [
+                        candidate
+                        for candidate in candidates
+                        if candidate.id == instance.id
+                        or not cls.match_id_filters(candidate, id_filters)
+                    ]
             else:
-                instance = instances.first()
+                instance = instances[0]
 
             for field in cls.data_fields:
                 setattr(instance, f"previous_{field}", getattr(instance, field))
@@ -3971,6 +4070,98 @@ class IXFMemberData(pdb_models.NetworkIXLanBase, StripFieldMixin):
         qset = qset.filter(dismissed=True)
         return qset
 
+    @classmethod
+    def ready_for_import(cls, qset):
+        """
+        Filters an IXFMemberData queryset down to entries of ixlans
+        that are ready for IX-F import (see `IXLan.ready_for_ixf_import`).
+        """
+        return (
+            qset.filter(ixlan__ixf_ixp_import_enabled=True)
+            .exclude(ixlan__ixf_ixp_member_list_url__isnull=True)
+            .exclude(ixlan__ixf_ixp_member_list_url="")
+        )
+
+    @classmethod
+    def refresh_proposed_actions(cls, qset):
+        """
+        Evaluates `action` and `actionable_for_network` for the
+        IXFMemberData objects in the queryset and stores them
+        in `proposed_action` and `net_actionable`.
+
+        This writes, so it is left to the importer. The rows are
+        locked while they are evaluated: an invalidation racing the
+        refresh waits for it and then applies, rather than being
+        overwritten with the action it invalidated.
+
+        Argument(s):
+
+        - qset(IXFMemberData queryset)
+        """
+
+        changed = {}
+
+        with transaction.atomic():
+            # lock the entries alone, not the ixlans they are read with
+            ids = list(qset.select_for_update().values_list("id", flat=True))
+
+            for ixf_member_data in cls.objects.filter(id__in=ids).select_related(
+                "ixlan"
+            ):
+                stored_action = ixf_member_data.proposed_action
+                stored_net_actionable = ixf_member_data.net_actionable
+                ixf_member_data.evaluate_proposed_action()
+                action = ixf_member_data.proposed_action
+                net_actionable = ixf_member_data.net_actionable
+
+                if (stored_action, stored_net_actionable) == (action, net_actionable):
+                    continue
+
+                changed.setdefault((stored_action, action, net_actionable), []).append(
+                    ixf_member_data.id
+                )
+
+            # update directly, these fields should not touch `updated`,
+            # and only where the stored action is still the one read
+
+            for (stored_action, action, net_actionable), changed_ids in changed.items():
+                rows = cls.objects.filter(id__in=changed_ids)
+                if stored_action is None:
+                    rows = rows.filter(proposed_action__isnull=True)
+                else:
+                    rows = rows.filter(proposed_action=stored_action)
+                rows.update(proposed_action=action, net_actionable=net_actionable)
+
+    @classmethod
+    def with_proposed_actions(cls, qset):
+        """
+        Returns the IXFMemberData objects in the queryset, with the
+        proposed action of those whose stored one was invalidated
+        evaluated in place, without storing it.
+
+        Argument(s):
+
+        - qset(IXFMemberData queryset)
+        """
+
+        ixf_member_data_list = list(qset)
+
+        for ixf_member_data in ixf_member_data_list:
+            if ixf_member_data.proposed_action is None:
+                ixf_member_data.evaluate_proposed_action()
+
+        return ixf_member_data_list
+
+    @classmethod
+    def invalidate_proposed_actions(cls, *args, **filters):
+        """
+        Flags the proposed actions of the IXFMemberData objects
+        matching the filter arguments to be evaluated again.
+        """
+        cls.objects.filter(*args, proposed_action__isnull=False, **filters).update(
+            proposed_action=None
+        )
+
     @classmethod
     def network_has_dismissed_actionable(cls, net):
         """
@@ -3983,12 +4174,21 @@ class IXFMemberData(pdb_models.NetworkIXLanBase, StripFieldMixin):
         - net(Network)
         """
 
-        for ixf_member_data in cls.dismissed_for_network(net):
-            if not ixf_member_data.ixlan.ready_for_ixf_import:
-                continue
-            if ixf_member_data.action != "noop":
-                return True
-        return False
+        qset = cls.ready_for_import(cls.dismissed_for_network(net))
+
+        if (
+            qset.filter(proposed_action__isnull=False)
+            .exclude(proposed_action="noop")
+            .exists()
+        ):
+            return True
+
+        return any(
+            ixf_member_data.proposed_action != "noop"
+            for ixf_member_data in cls.with_proposed_actions(
+                qset.filter(proposed_action__isnull=True).select_related("ixlan")
+            )
+        )
 
     @classmethod
     def proposals_for_network(cls, net):
@@ -4012,30 +4212,20 @@ class IXFMemberData(pdb_models.NetworkIXLanBase, StripFieldMixin):
         - net(Network)
         """
 
-        qset = cls.get_for_network(net).select_related("ixlan", "ixlan__ix")
-
-        proposals = {}
-
-        for ixf_member_data in qset:
-            if not ixf_member_data.ixlan.ready_for_ixf_import:
-                continue
+        qset = cls.ready_for_import(cls.get_for_network(net)).filter(dismissed=False)
 
-            action = ixf_member_data.action
-            ixf_member_data.error
+        # noop and entries not actionable for the network are
+        # excluded through `net_actionable`, entries whose stored
+        # action was invalidated are evaluated again
 
-            # not actionable for anyone
+        qset = qset.filter(
+            models.Q(net_actionable=True) | models.Q(proposed_action__isnull=True)
+        ).select_related("ixlan", "ixlan__ix")
 
-            if action == "noop":
-                continue
-
-            # not actionable for network
-
-            if not ixf_member_data.actionable_for_network:
-                continue
-
-            # dismissed by network
+        proposals = {}
 
-            if ixf_member_data.dismissed:
+        for ixf_member_data in cls.with_proposed_actions(qset):
+            if not ixf_member_data.net_actionable:
                 continue
 
             ix_id = ixf_member_data.ix.id
@@ -4048,10 +4238,22 @@ class IXFMemberData(pdb_models.NetworkIXLanBase, StripFieldMixin):
                     "modify": [],
                 }
 
-            proposals[ix_id][action].append(ixf_member_data)
+            proposals[ix_id][ixf_member_data.proposed_action].append(ixf_member_data)
 
         return sorted(proposals.values(), key=lambda x: x["ix"].name.lower())
 
+    def evaluate_proposed_action(self):
+        """
+        Sets `proposed_action` and `net_actionable` from the
+        `action` and `actionable_for_network` properties, without
+        saving them.
+        """
+
+        self.proposed_action = self.action
+        self.net_actionable = (
+            self.proposed_action != "noop" and self.actionable_for_network
+        )
+
     @property
     def previous_data(self):
         return getattr(self, "_previous_data", "{}")
@@ -4788,6 +4990,11 @@ class IXFMemberData(pdb_models.NetworkIXLanBase, StripFieldMixin):
             if "speed" in self.error:
                 raise ValidationError(error_data)
 
+    def save(self, *args, **kwargs):
+        # the implied action needs to be evaluated again
+        self.proposed_action = None
+        super().save(*args, **kwargs)
+
     def save_without_update(self):
         self._meta.get_field("updated").auto_now = False
         self.save()
@@ -5238,6 +5445,16 @@ class Network(
         blank=True, editable=False, null=True
     )
 
+    # the value and dump-index serials the last `ok` verdict was reached against.
+    # While both still match, pdb_irr_as_set_status leaves the row alone instead of
+    # verifying the same value against the same data again.
+    irr_as_set_verified_value = models.CharField(
+        blank=True, default="", editable=False, max_length=255
+    )
+    irr_as_set_verified_serials = models.CharField(
+        blank=True, default="", editable=False, max_length=40
+    )
+
     def _notify_contacts(self, roles):
         """
         Deduplicated active-contact email addresses whose role is in `roles`.
@@ -7827,6 +8044,81 @@ class DataChangeNotificationQueue(StripFieldMixin):
 
         return entry
 
+    @classmethod
+    def push_many(cls, source, changes):
+        """
+        Pushes notification entries for multiple changed objects at once.
+
+        Same as calling `push` for each change, but checks which data change
+        parents are watched with a single query and inserts the entries
+        with a single bulk insert.
+
+        Arguments:
+
+        - source (str): source of the automated update
+        - changes (list): list of (action, obj, version_before, version_after, kwargs)
+          tuples, where kwargs may specify `reason`
+
+        Returns list of created entries
+        """
+
+        parents = {}
+
+        for action, obj, version_before, version_after, kwargs in changes:
+            if not hasattr(obj, "data_change_parent"):
+                raise AttributeError(
+                    f"{obj} does not have a `data_change_parent` property"
+                )
+
+            watched_ref_tag, watched_object_id = obj.data_change_parent
+            parents.setdefault(watched_ref_tag, set()).add(watched_object_id)
+
+        if not parents:
+            return []
+
+        # check which of the data change parents are being watched
+        # by any user. If no user has set it up dont push a notification
+        # as no one is watching anyway.
+
+        watched_filter = models.Q()
+        for watched_ref_tag, watched_object_ids in parents.items():
+            watched_filter |= models.Q(
+                ref_tag=watched_ref_tag, object_id__in=watched_object_ids
+            )
+
+        watched = set(
+            DataChangeWatchedObject.objects.filter(watched_filter).values_list(
+                "ref_tag", "object_id"
+            )
+        )
+
+        entries = []
+
+        for action, obj, version_before, version_after, kwargs in changes:
+            watched_ref_tag, watched_object_id = obj.data_change_parent
+
+            if (watched_ref_tag, watched_object_id) not in watched:
+                continue
+
+            entry = cls(
+                action=action,
+                watched_ref_tag=watched_ref_tag,
+                watched_object_id=watched_object_id,
+                ref_tag=obj.HandleRef.tag,
+                object_id=obj.id,
+                version_before=version_before,
+                version_after=version_after,
+                reason=kwargs.get("reason"),
+                source=source,
+            )
+
+            # versions are passed as instances, skip validating
+            # their existence one query at a time
+            entry.full_clean(exclude=["version_before", "version_after"])
+            entries.append(entry)
+
+        return cls.objects.bulk_create(entries)
+
     @classmethod
     def consolidate(cls, watched_ref_tag, watched_object_id, date_limit):
         """
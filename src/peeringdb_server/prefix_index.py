@@ -0,0 +1,250 @@
+"""
+Interval index over active IXLanPrefix rows.
+
+Checking a prefix against every other prefix of its protocol (overlap
+validation) or an address against the prefixes of an ixlan meant loading
+and testing each one in Python. `PrefixIndex` holds prefixes as integer
+ranges: sorted by network start for the subnets of a query (bisect), and
+by (start, length) for its supernets, which makes either lookup a bisect
+plus one dict probe per prefix length in use.
+
+`ixlan_prefix_index` returns the process wide index of every IXLanPrefix
+with status `ok`, keyed by id. It is built from the database on first use
+and kept current by the IXLanPrefix save and delete signals. Other
+processes are told of a change by a generation bump made once it has
+committed, and rebuild the index on noticing it. Rebuilding rather than
+re-reading recently updated rows keeps a prefix saved by a long running
+transaction, or hard deleted, from being missed: `updated` is stamped on
+save, not on commit. There are few enough prefixes for that to be cheap.
+
+The index answers with candidates, never with verdicts: a prefix changed
+by a transaction that was rolled back can linger in it until the next
+rebuild. Callers confirm the few ids it returns against the database. It
+does not miss a prefix the database has, since additions are applied as
+soon as they are saved and removals only once committed.
+"""
+
+import bisect
+import ipaddress
+import threading
+
+from django.core.cache import caches
+from django.db import transaction
+
+import peeringdb_server.models
+
+PREFIX_INDEX_GENERATION_KEY = "PREFIX-INDEX-GENERATION"
+
+
+def _network(prefix) -> ipaddress.IPv4Network | ipaddress.IPv6Network:
+    return ipaddress.ip_network(str(prefix), strict=False)
+
+
+def _mask(length: int, bits: int) -> int:
+    return ((1 << length) - 1) << (bits - length)
+
+
+class PrefixIndex:
+    """
+    IPv4 and IPv6 prefixes as integer ranges, each indexed under one or
+    more keys.
+    """
+
+    def __init__(self):
+        # per ip version: the sorted (start, length) of every indexed
+        # network, the keys indexed under each, and how many networks
+        # there are of each prefix length
+        self.networks = {4: [], 6: []}
+        self.keys = {4: {}, 6: {}}
+        self.lengths = {4: {}, 6: {}}
+
+    def add(self, prefix, key):
+        network = _network(prefix)
+        version = network.version
+        span = (int(network.network_address), network.prefixlen)
+        keys = self.keys[version].get(span)
+        if keys is None:
+            keys = self.keys[version][span] = set()
+            bisect.insort(self.networks[version], span)
+            lengths = self.lengths[version]
+            lengths[network.prefixlen] = lengths.get(network.prefixlen, 0) + 1
+        keys.add(key)
+
+    def remove(self, prefix, key):
+        network = _network(prefix)
+        version = network.version
+        span = (int(network.network_address), network.prefixlen)
+        keys = self.keys[version].get(span)
+        if keys is None:
+            return
+        keys.discard(key)
+        if keys:
+            return
+        del self.keys[version][span]
+        networks = self.networks[version]
+        del networks[bisect.bisect_left(networks, span)]
+        lengths = self.lengths[version]
+        lengths[network.prefixlen] -= 1
+        if not lengths[network.prefixlen]:
+            del lengths[network.prefixlen]
+
+    def _supernets(self, version: int, address: int, max_length: int) -> set:
+        """
+        Keys of the networks holding the integer `address` that are no
+        longer than `max_length`.
+        """
+        bits = 32 if version == 4 else 128
+        found = set()
+        for length in self.lengths[version]:
+            if length <= max_length:
+                span = (address & _mask(length, bits), length)
+                found.update(self.keys[version].get(span, ()))
+        return found
+
+    def containing(self, addr) -> set:
+        """
+        Keys of the networks `addr` falls into.
+        """
+        address = ipaddress.ip_address(addr)
+        bits = 32 if address.version == 4 else 128
+        return self._supernets(address.version, int(address), bits)
+
+    def overlapping(self, prefix) -> set:
+        """
+        Keys of the networks overlapping `prefix`: the prefix itself, its
+        supernets and its subnets.
+        """
+        network = _network(prefix)
+        version = network.version
+        start = int(network.network_address)
+        end = int(network.broadcast_address)
+
+        found = self._supernets(version, start, network.prefixlen)
+
+        # any other network starting within the prefix is one of its subnets
+        networks = self.networks[version]
+        i = bisect.bisect_left(networks, (start, 0))
+        while i < len(networks) and networks[i][0] <= end:
+            found.update(self.keys[version][networks[i]])
+            i += 1
+        return found
+
+
+def prefix_index_generation() -> int:
+    """
+    Return the current generation of the IXLanPrefix index.
+    """
+    return caches["default"].get(PREFIX_INDEX_GENERATION_KEY, 0)
+
+
+def bump_prefix_index_generation() -> int:
+    """
+    Let other processes know IXLanPrefix rows changed, returning the new
+    generation.
+    """
+    cache = caches["default"]
+    try:
+        return cache.incr(PREFIX_INDEX_GENERATION_KEY)
+    except ValueError:
+        cache.set(PREFIX_INDEX_GENERATION_KEY, 1, None)
+        return 1
+
+
+class IXLanPrefixIndex(PrefixIndex):
+    """
+    `PrefixIndex` of every IXLanPrefix with status `ok`, keyed by id.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.loaded = False
+        self.generation = None
+        # id -> the prefixes currently indexed under it
+        self.indexed = {}
+        self.lock = threading.RLock()
+
+    def ensure_index(self):
+        """
+        Build the index on first use, and rebuild it once another process
+        committed a change to the prefixes.
+        """
+        with self.lock:
+            # read before loading: a change committed after the load has
+            # its bump land after this read and triggers the next rebuild
+            generation = prefix_index_generation()
+            if not self.loaded or generation != self.generation:
+                self.load(generation)
+
+    def load(self, generation):
+        PrefixIndex.__init__(self)
+        self.indexed = {}
+        self.generation = generation
+        qs = peeringdb_server.models.IXLanPrefix.objects.filter(status="ok")
+        for ixpfx_id, prefix in qs.values_list("id", "prefix"):
+            self.index(ixpfx_id, prefix)
+        self.loaded = True
+
+    def index(self, ixpfx_id, prefix):
+        self.add(prefix, ixpfx_id)
+        self.indexed.setdefault(ixpfx_id, set()).add(str(prefix))
+
+    def settle(self, ixpfx_id, prefix=None):
+        """
+        Index `ixpfx_id` under `prefix` alone, or under nothing if None.
+        """
+        for indexed in self.indexed.pop(ixpfx_id, ()):
+            self.remove(indexed, ixpfx_id)
+        if prefix is not None:
+            self.index(ixpfx_id, prefix)
+
+    def update(self, instance):
+        """
+        Apply a save or delete of the IXLanPrefix `instance`.
+
+        A prefix with status `ok` is added right away, so validation in
+        the same transaction sees it. What the row ends up as is read back
+        once the transaction commits, which is also when other processes
+        are told to catch up.
+        """
+        ixpfx_id = instance.id
+        with self.lock:
+            if self.loaded and instance.status == "ok" and instance.prefix:
+                self.index(ixpfx_id, instance.prefix)
+
+        def committed():
+            with self.lock:
+                if self.loaded:
+                    row = (
+                        peeringdb_server.models.IXLanPrefix.objects.filter(
+                            id=ixpfx_id, status="ok"
+                        )
+                        .values_list("prefix", flat=True)
+                        .first()
+                    )
+                    self.settle(ixpfx_id, row)
+                generation = bump_prefix_index_generation()
+                # only our own bump can be skipped, one made by another
+                # process in between still calls for a rebuild
+                if self.generation == generation - 1:
+                    self.generation = generation
+
+        transaction.on_commit(committed)
+
+
+_index = IXLanPrefixIndex()
+
+
+def ixlan_prefix_index() -> IXLanPrefixIndex:
+    """
+    Return the process wide IXLanPrefix index, caught up with the database.
+    """
+    _index.ensure_index()
+    return _index
+
+
+def ixlan_prefix_index_update(instance):
+    """
+    Apply a save or delete of the IXLanPrefix `instance` to the process
+    wide index.
+    """
+    _index.update(instance)
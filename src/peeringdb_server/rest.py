@@ -91,7 +91,7 @@ from peeringdb_server.rest_throttles import (
     OrganizationUsersThrottle,
     WriteRateThrottle,
 )
-from peeringdb_server.search_v2 import search_v2
+from peeringdb_server.search_v2 import search_ids
 from peeringdb_server.serializers import (
     AssetDeleteSerializer,
     AssetLookupSerializer,
@@ -535,11 +535,7 @@ class ModelViewSet(viewsets.ModelViewSet):
             }
             index_name = model_to_index.get(self.model.__name__, None)
             if index_name:
-                search_results = search_v2([q])
-                if index_name in search_results:
-                    q_ids = [
-                        item.get("id") for item in search_results.get(index_name, [])
-                    ]
+                q_ids = search_ids(q, index_name)
             # no results found - return empty query
             if not q_ids:
                 return qset.none()
@@ -0,0 +1,613 @@
+"""
+In-process search backend for deployments without Elasticsearch.
+
+Dev instances, tutorial mode and small mirrors can set
+
+    SEARCH_BACKEND = "peeringdb_server.search_local.LocalSearchBackend"
+
+to serve `search_v2`, `autocomplete_v2` and the `name_search` API filter
+from an index held in memory instead of an Elasticsearch cluster.
+
+The index is built from the ORM on first use and covers the same entities
+and fields the Elasticsearch documents do: name, aka, name_long, city,
+irr_as_set, ASN and netixlan IP addresses, plus the facility derived
+coordinates, countries and states used for geo filtering.
+
+Words are kept in a sorted array for prefix lookups (bisect) and in a
+trigram map for the infix matching `search_v2` does with `*keyword*`.
+
+Saves are applied to the index of the process that made them through
+`SearchBackend.update` and bump the search cache generation. Other
+processes notice the new generation on their next query and re-read
+every object updated since they last synced.
+"""
+
+import bisect
+import math
+import re
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import models
+from django.utils import timezone
+from geopy.distance import great_circle
+from unidecode import unidecode
+
+from peeringdb_server.models import (
+    Campus,
+    Carrier,
+    CarrierFacility,
+    Facility,
+    InternetExchange,
+    InternetExchangeFacility,
+    Network,
+    NetworkFacility,
+    NetworkIXLan,
+    Organization,
+)
+from peeringdb_server.search_v2 import (
+    PARTIAL_IPV4_ADDRESS,
+    PARTIAL_IPV6_ADDRESS,
+    SearchBackend,
+    add_and_between_keywords,
+    append_result,
+    bump_search_cache_generation,
+    is_valid_latitude,
+    is_valid_longitude,
+    order_results_alphabetically,
+    search_cache_generation,
+    valid_partial_ipv4_address,
+)
+
+MODELS: dict[str, type[models.Model]] = {
+    "org": Organization,
+    "fac": Facility,
+    "ix": InternetExchange,
+    "net": Network,
+    "campus": Campus,
+    "carrier": Carrier,
+}
+
+# scores mirror the boosts the elasticsearch queries use, so
+# order_results_alphabetically ranks local results the same way
+SCORE_ASN = 20.0
+SCORE_EXACT = 10.0
+SCORE_PREFIX = 5.0
+SCORE_MATCH = 2.0
+
+# objects touched within this window before the last sync are re-read
+# on catch up, covering saves that committed while the sync was running
+SYNC_OVERLAP = timedelta(seconds=5)
+
+DISTANCE = re.compile(r"^\s*([0-9.]+)\s*(km|mi|m)?\s*$", re.I)
+
+WORD_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text) -> str:
+    return unidecode(str(text or "")).lower()
+
+
+def tokenize(text) -> set[str]:
+    """
+    Split text into lower-cased, ascii folded words.
+
+    Whitespace separated words are kept whole as well as split on
+    punctuation, so both `equinix` and `equinix-fr5` match `Equinix-FR5`.
+    """
+    tokens = set()
+    for word in normalize(text).split():
+        tokens.add(word)
+        tokens.update(part for part in WORD_SPLIT.split(word) if part)
+    return tokens
+
+
+def trigrams(word: str) -> set[str]:
+    return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+def parse_distance(dist) -> float | None:
+    """
+    Parse a geo search distance (e.g. `20km`, `5mi`) into kilometers.
+    """
+    match = DISTANCE.match(str(dist))
+    if not match:
+        return None
+    value = float(match.group(1))
+    unit = (match.group(2) or "km").lower()
+    if unit == "mi":
+        return value * 1.609344
+    if unit == "m":
+        return value / 1000
+    return value
+
+
+class LocalSearchIndex:
+    """
+    Token index over all searchable objects with status `ok`.
+
+    Documents are keyed by `(tag, id)`.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.postings = {}
+        self.words = []
+        self.word_trigrams = {}
+        self.ips = {}
+        self.ip_list = []
+        self.doc_terms = {}
+
+    def remove(self, key):
+        self.docs.pop(key, None)
+        words, ips = self.doc_terms.pop(key, ((), ()))
+        for word in words:
+            keys = self.postings.get(word)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self.postings[word]
+                del self.words[bisect.bisect_left(self.words, word)]
+                for trigram in trigrams(word):
+                    self.word_trigrams[trigram].discard(word)
+        for ip in ips:
+            keys = self.ips.get(ip)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self.ips[ip]
+                del self.ip_list[bisect.bisect_left(self.ip_list, ip)]
+
+    def add(self, key, doc, text, ips):
+        self.remove(key)
+        self.docs[key] = doc
+
+        words = set()
+        for value in text:
+            words.update(tokenize(value))
+        for word in words:
+            if word not in self.postings:
+                self.postings[word] = set()
+                bisect.insort(self.words, word)
+                for trigram in trigrams(word):
+                    self.word_trigrams.setdefault(trigram, set()).add(word)
+            self.postings[word].add(key)
+
+        ips = {ip.lower() for ip in ips if ip}
+        for ip in ips:
+            if ip not in self.ips:
+                self.ips[ip] = set()
+                bisect.insort(self.ip_list, ip)
+            self.ips[ip].add(key)
+
+        self.doc_terms[key] = (words, ips)
+
+    def prefixed(self, values: list[str], prefix: str):
+        """
+        Yield the entries of the sorted list `values` starting with `prefix`.
+        """
+        i = bisect.bisect_left(values, prefix)
+        while i < len(values) and values[i].startswith(prefix):
+            yield values[i]
+            i += 1
+
+    def match_prefix(self, prefix: str) -> set:
+        keys = set()
+        for word in self.prefixed(self.words, prefix):
+            keys |= self.postings[word]
+        return keys
+
+    def match_infix(self, fragment: str) -> set:
+        if len(fragment) < 3:
+            # too short for the trigram map
+            return self.match_prefix(fragment)
+        candidates: set[str] | None = None
+        for trigram in trigrams(fragment):
+            words = self.word_trigrams.get(trigram, set())
+            candidates = words if candidates is None else candidates & words
+            if not candidates:
+                return set()
+        if candidates is None:
+            return set()
+        keys = set()
+        for word in candidates:
+            if fragment in word:
+                keys |= self.postings[word]
+        return keys
+
+    def match_ip(self, prefix: str) -> set:
+        keys = set()
+        for ip in self.prefixed(self.ip_list, prefix.lower()):
+            keys |= self.ips[ip]
+        return keys
+
+
+class LocalSearchBackend(SearchBackend):
+    """
+    Search backend serving queries from an in-process `LocalSearchIndex`.
+    """
+
+    def __init__(self):
+        self.index = None
+        self.generation = None
+        self.synced = None
+        self.lock = threading.RLock()
+
+    # index maintenance
+
+    def ensure_index(self) -> LocalSearchIndex:
+        """
+        Build the index on first use and catch up with changes made by
+        other processes since the last sync.
+        """
+        with self.lock:
+            generation = search_cache_generation()
+            if self.index is None:
+                self.synced = timezone.now()
+                self.generation = generation
+                self.index = LocalSearchIndex()
+                for tag in MODELS:
+                    self.load(tag)
+            elif generation != self.generation:
+                self.catch_up(generation)
+            return self.index
+
+    def catch_up(self, generation):
+        since = self.synced - SYNC_OVERLAP
+        self.synced = timezone.now()
+        self.generation = generation
+
+        changed = {tag: set() for tag in MODELS}
+        for tag, model in MODELS.items():
+            changed[tag].update(
+                model.objects.filter(updated__gte=since).values_list("id", flat=True)
+            )
+        for net_id, ix_id in NetworkIXLan.objects.filter(
+            updated__gte=since
+        ).values_list("network_id", "ixlan__ix_id"):
+            changed["net"].add(net_id)
+            changed["ix"].add(ix_id)
+        for net_id, fac_id in NetworkFacility.objects.filter(
+            updated__gte=since
+        ).values_list("network_id", "facility_id"):
+            changed["net"].add(net_id)
+        for ix_id in InternetExchangeFacility.objects.filter(
+            updated__gte=since
+        ).values_list("ix_id", flat=True):
+            changed["ix"].add(ix_id)
+        for carrier_id in CarrierFacility.objects.filter(
+            updated__gte=since
+        ).values_list("carrier_id", flat=True):
+            changed["carrier"].add(carrier_id)
+
+        for tag, ids in changed.items():
+            if ids:
+                self.load(tag, ids)
+
+    def update(self, instance):
+        """
+        Re-index the objects affected by a save or delete of `instance`.
+        """
+        tag = getattr(getattr(instance, "HandleRef", None), "tag", None)
+        affected = {}
+        if tag in MODELS:
+            affected[tag] = {instance.id}
+        elif tag == "netixlan":
+            affected = {"net": {instance.network_id}, "ix": {instance.ixlan.ix_id}}
+        elif tag == "netfac":
+            affected = {"net": {instance.network_id}}
+        elif tag == "ixfac":
+            affected = {"ix": {instance.ix_id}}
+        elif tag == "carrierfac":
+            affected = {"carrier": {instance.carrier_id}}
+        else:
+            return
+
+        with self.lock:
+            if self.index is not None:
+                for tag, ids in affected.items():
+                    self.load(tag, ids)
+
+            generation = bump_search_cache_generation()
+            # only our own bump can be skipped, one made by another
+            # process in between still needs to be caught up with
+            if self.generation == generation - 1:
+                self.generation = generation
+
+    def load(self, tag: str, ids=None):
+        """
+        (Re-)index objects of type `tag` from the database, all of them
+        if `ids` is None.
+        """
+        index = self.index
+        qset = MODELS[tag].objects.all()
+        if ids is not None:
+            qset = qset.filter(id__in=ids)
+            # drop everything first, objects that are no longer `ok` or
+            # were deleted outright simply don't come back
+            for pk in ids:
+                index.remove((tag, pk))
+        qset = qset.filter(status="ok")
+
+        facilities = self.facilities(tag, ids)
+        ips = self.ip_addresses(tag, ids)
+
+        for obj in qset:
+            key = (tag, obj.id)
+            fac_list = facilities.get(obj.id)
+            if fac_list is not None or tag in ("net", "ix", "carrier", "campus"):
+                fac_list = fac_list or []
+                coords = [f["coords"] for f in fac_list if f["coords"]]
+                countries = {f["country"] for f in fac_list if f["country"]}
+                states = {f["state"] for f in fac_list if f["state"]}
+            else:
+                coords = []
+                if is_valid_latitude(obj.latitude) and is_valid_longitude(
+                    obj.longitude
+                ):
+                    coords = [(float(obj.latitude), float(obj.longitude))]
+                countries = {obj.country.code} if obj.country else set()
+                states = {obj.state} if obj.state else set()
+
+            doc = {
+                "name": obj.name,
+                "org_id": obj.id if tag == "org" else obj.org_id,
+                "asn": getattr(obj, "asn", None),
+                "fac_count": getattr(obj, "fac_count", None),
+                "coords": coords,
+                "countries": countries,
+                "states": states,
+            }
+            text = [
+                obj.name,
+                obj.aka,
+                obj.name_long,
+                getattr(obj, "irr_as_set", None),
+                doc["asn"],
+            ]
+            if tag in ("org", "fac", "ix"):
+                text.append(obj.city)
+
+            index.add(key, doc, text, ips.get(obj.id, ()))
+
+    def facilities(self, tag: str, ids=None) -> dict[int, list[dict]]:
+        """
+        Map object id to the facilities used for its geo filtering, for
+        object types that take their location from facilities.
+        """
+        relations: dict[str, tuple[type[models.Model], str]] = {
+            "net": (NetworkFacility, "network_id"),
+            "ix": (InternetExchangeFacility, "ix_id"),
+            "carrier": (CarrierFacility, "carrier_id"),
+        }
+
+        if tag == "campus":
+            qset = Facility.objects.filter(status="ok", campus_id__isnull=False)
+            if ids is not None:
+                qset = qset.filter(campus_id__in=ids)
+            rows = qset.values_list(
+                "campus_id", "latitude", "longitude", "country", "state"
+            )
+        elif tag in relations:
+            model, field = relations[tag]
+            qset = model.objects.filter(status="ok", facility__status="ok")
+            if ids is not None:
+                qset = qset.filter(**{f"{field}__in": ids})
+            rows = qset.values_list(
+                field,
+                "facility__latitude",
+                "facility__longitude",
+                "facility__country",
+                "facility__state",
+            )
+        else:
+            return {}
+
+        facilities: dict[int, list[dict]] = {}
+        for pk, lat, lng, country, state in rows:
+            coords = None
+            if is_valid_latitude(lat) and is_valid_longitude(lng):
+                coords = (float(lat), float(lng))
+            facilities.setdefault(pk, []).append(
+                {"coords": coords, "country": country, "state": state}
+            )
+        return facilities
+
+    def ip_addresses(self, tag: str, ids=None) -> dict[int, list[str]]:
+        """
+        Map network / exchange id to the addresses of its active netixlans.
+        """
+        if tag == "net":
+            field = "network_id"
+        elif tag == "ix":
+            field = "ixlan__ix_id"
+        else:
+            return {}
+
+        qset = NetworkIXLan.objects.filter(status="ok")
+        if ids is not None:
+            qset = qset.filter(**{f"{field}__in": ids})
+
+        ips: dict[int, list[str]] = {}
+        for pk, ip4, ip6 in qset.values_list(field, "ipaddr4", "ipaddr6"):
+            for ip in (ip4, ip6):
+                if ip:
+                    ips.setdefault(pk, []).append(str(ip))
+        return ips
+
+    # queries
+
+    def score(self, doc, words: list[str]) -> float:
+        name = normalize(doc["name"])
+        phrase = " ".join(words)
+        if name == phrase:
+            return SCORE_EXACT
+        if name.startswith(phrase):
+            return SCORE_PREFIX
+        return SCORE_MATCH
+
+    def results(self, indexes, hits) -> dict[str, list[dict[str, str | int]]]:
+        """
+        Turn scored `(key, score)` hits into the `process_search_results`
+        result shape.
+        """
+        index = self.index
+        result: dict[str, list[dict[str, str | int]]] = {tag: [] for tag in indexes}
+        pk_map: dict[str, dict[int, dict[str, str | int]]] = {
+            tag: {} for tag in indexes
+        }
+        for (tag, pk), score in hits:
+            doc = index.docs[(tag, pk)]
+            extra = {"_score": score}
+            if tag == "net":
+                extra["asn"] = doc["asn"]
+            append_result(
+                tag, pk, doc["name"], doc["org_id"], None, result, pk_map, extra
+            )
+        return result
+
+    def autocomplete(
+        self, term: str, indexes: list[str], hide_ixs_without_fac: bool
+    ) -> dict[str, list[dict[str, str | int]]]:
+        """
+        Every word of `term` must prefix a word of the object.
+        """
+        # update() mutates the index in place from other request threads,
+        # the index must not change while it is being read
+        with self.lock:
+            index = self.ensure_index()
+            words = normalize(term).split()
+
+            keys = None
+            for word in words:
+                matched = index.match_prefix(word)
+                keys = matched if keys is None else keys & matched
+            keys = keys or set()
+
+            hits = []
+            for key in keys:
+                tag, pk = key
+                doc = index.docs[key]
+                if tag not in indexes:
+                    continue
+                if hide_ixs_without_fac and tag == "ix" and not doc["fac_count"]:
+                    continue
+                hits.append((key, self.score(doc, words)))
+
+            hits.sort(key=lambda hit: (-hit[1], normalize(index.docs[hit[0]]["name"])))
+            return self.results(
+                indexes, hits[: settings.SEARCH_RESULTS_AUTOCOMPLETE_LIMIT]
+            )
+
+    def search(
+        self, qs: str, geo: dict[str, str | float], indexes: list[str], user
+    ) -> dict[str, list[dict[str, str | int]]]:
+        """
+        Mirrors the elasticsearch query semantics: digit terms match ASNs
+        and names, partial IP addresses match netixlan addresses, anything
+        else is split into keywords joined by AND / OR that each have to
+        appear somewhere in a word of the object.
+        """
+        with self.lock:
+            index = self.ensure_index()
+            term = " ".join(qs.split())
+            look_for_exact_matches = []
+            scores = {}
+
+            hide_ixs_without_fac = bool(
+                user
+                and not isinstance(user, AnonymousUser)
+                and user.hide_ixs_without_fac
+            )
+
+            if PARTIAL_IPV4_ADDRESS.match(term) and valid_partial_ipv4_address(term):
+                for key in index.match_ip(term):
+                    scores[key] = SCORE_PREFIX
+            elif PARTIAL_IPV6_ADDRESS.match(term):
+                if term.endswith(":") and not term.endswith("::"):
+                    term = term.rstrip(":")
+                for key in index.match_ip(term):
+                    scores[key] = SCORE_PREFIX
+            elif term.isdigit():
+                for key in index.match_prefix(term):
+                    doc = index.docs[key]
+                    if doc["asn"] == int(term):
+                        scores[key] = SCORE_ASN
+                    else:
+                        scores[key] = self.score(doc, [term])
+            else:
+                keywords = add_and_between_keywords(term.split())
+                # keywords joined by AND form a group, any group can match
+                groups: list[list[str]] = [[]]
+                for keyword in keywords:
+                    if keyword == "OR":
+                        groups.append([])
+                    elif keyword != "AND":
+                        look_for_exact_matches.append(keyword)
+                        groups[-1].append(keyword)
+
+                if geo and len(groups[0]) and groups[0][0] in indexes:
+                    # "fac in las vegas" - the first word picks the entity type
+                    only = groups[0].pop(0)
+                    indexes = [only]
+                    if only == "ix":
+                        # exchanges have no coordinates of their own (#1833)
+                        geo = {k: v for k, v in geo.items() if k not in ("lat", "long")}
+
+                for group in groups:
+                    words = [normalize(keyword) for keyword in group]
+                    words = [word for word in words if word]
+                    if not words:
+                        if geo:
+                            for key in index.docs:
+                                scores.setdefault(key, SCORE_MATCH)
+                        continue
+                    keys: set | None = None
+                    for word in words:
+                        matched = index.match_infix(word)
+                        keys = matched if keys is None else keys & matched
+                    for key in keys or ():
+                        score = self.score(index.docs[key], words)
+                        scores[key] = max(scores.get(key, 0), score)
+
+            hits = []
+            for key, score in scores.items():
+                tag = key[0]
+                doc = index.docs[key]
+                if tag not in indexes:
+                    continue
+                if hide_ixs_without_fac and tag == "ix" and not doc["fac_count"]:
+                    continue
+                if geo and not self.matches_geo(doc, geo):
+                    continue
+                hits.append((key, score))
+
+            hits.sort(key=lambda hit: (-hit[1], normalize(index.docs[hit[0]]["name"])))
+            result = self.results(indexes, hits[: settings.SEARCH_RESULTS_LIMIT])
+
+            for tag in ["fac", "ix", "net", "org", "campus", "carrier"]:
+                result.setdefault(tag, [])
+
+            return order_results_alphabetically(result, look_for_exact_matches, qs)
+
+    def matches_geo(self, doc, geo: dict[str, str | float]) -> bool:
+        if geo.get("country") and geo["country"] not in doc["countries"]:
+            return False
+        if geo.get("state") and geo["state"] not in doc["states"]:
+            return False
+        if is_valid_latitude(str(geo.get("lat", ""))) and is_valid_longitude(
+            str(geo.get("long", ""))
+        ):
+            distance = parse_distance(geo.get("dist"))
+            if distance is None or math.isnan(distance):
+                return True
+            center = (float(geo["lat"]), float(geo["long"]))
+            return any(
+                great_circle(center, coords).kilometers <= distance
+                for coords in doc["coords"]
+            )
+        return True
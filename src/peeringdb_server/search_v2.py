@@ -7,13 +7,16 @@ and partial IPv6 matching. It includes functionality to prioritize exact
 and "OR" term matches and organizes results alphabetically.
 """
 
-import copy
+import hashlib
+import json
 import math
 import re
 from typing import Union
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.utils.module_loading import import_string
 from elasticsearch import Elasticsearch
 
 from mainsite.settings import ELASTIC_PASSWORD, ELASTICSEARCH_URL
@@ -73,6 +76,125 @@ def append_result(tag, pk, name, org_id, sub_name, result, pk_map, extra=None):
     )
 
 
+# --- result cache ---
+
+# Bumped by the search signal processor whenever an indexed object changes and
+# after an index rebuild. It is part of every result cache key, so one bump
+# retires all cached results at once instead of deleting keys one by one.
+SEARCH_CACHE_GENERATION_KEY = "search:generation"
+
+SEARCH_CACHE_KINDS = ("autocomplete", "search", "ids")
+
+
+def _cache():
+    return caches["default"]
+
+
+def search_cache_generation() -> int:
+    """
+    Return the current search index generation.
+    """
+    return _cache().get(SEARCH_CACHE_GENERATION_KEY, 0)
+
+
+def bump_search_cache_generation() -> int:
+    """
+    Invalidate all cached search results by advancing the search index
+    generation, returning the new generation.
+    """
+    cache = _cache()
+    try:
+        return cache.incr(SEARCH_CACHE_GENERATION_KEY)
+    except ValueError:
+        cache.set(SEARCH_CACHE_GENERATION_KEY, 1, None)
+        return 1
+
+
+def search_cache_key(kind: str, term: str, indexes: list[str], **params) -> str:
+    """
+    Build the result cache key for a search.
+
+    Args:
+        kind: `autocomplete`, `search` or `ids`.
+        term: The normalized search term.
+        indexes: The indexes the search targets.
+        params: Any further inputs the result depends on (e.g. the
+            hide_ixs_without_fac flag or geo filters).
+
+    Returns:
+        str: The cache key, scoped to the current search index generation.
+    """
+    payload = json.dumps(
+        {"term": term, "indexes": sorted(indexes), **params},
+        sort_keys=True,
+        default=str,
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"search:{kind}:{search_cache_generation()}:{digest}"
+
+
+def _count_cache_lookup(kind: str, hit: bool) -> None:
+    cache = _cache()
+    key = f"search:stats:{kind}:{'hit' if hit else 'miss'}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def cached_search_result(kind: str, cache_key: str) -> dict | None:
+    """
+    Return a cached search result, or None on a miss.
+
+    Does nothing if `SEARCH_RESULT_CACHE_TTL` is 0.
+    """
+    if not settings.SEARCH_RESULT_CACHE_TTL:
+        return None
+    result = _cache().get(cache_key)
+    _count_cache_lookup(kind, result is not None)
+    return result
+
+
+def cache_search_result(cache_key: str, result: dict) -> None:
+    """
+    Store a search result for `SEARCH_RESULT_CACHE_TTL` seconds.
+    """
+    if not settings.SEARCH_RESULT_CACHE_TTL:
+        return
+    _cache().set(cache_key, result, settings.SEARCH_RESULT_CACHE_TTL)
+
+
+def search_cache_stats() -> dict[str, dict[str, int | float]]:
+    """
+    Return result cache hit/miss counters and hit rate per search kind.
+    """
+    cache = _cache()
+    stats = {}
+    for kind in SEARCH_CACHE_KINDS:
+        hits = cache.get(f"search:stats:{kind}:hit", 0)
+        misses = cache.get(f"search:stats:{kind}:miss", 0)
+        total = hits + misses
+        stats[kind] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+    return stats
+
+
+def reset_search_cache_stats() -> None:
+    """
+    Reset result cache hit/miss counters.
+    """
+    _cache().delete_many(
+        [
+            f"search:stats:{kind}:{result}"
+            for kind in SEARCH_CACHE_KINDS
+            for result in ("hit", "miss")
+        ]
+    )
+
+
 def new_elasticsearch() -> Elasticsearch:
     """
     Initialize and return a new Elasticsearch instance.
@@ -130,11 +252,7 @@ def elasticsearch_proximity_entity(name) -> dict | None:
 
 def autocomplete_v2(term: str, user=None) -> dict[str, list[dict[str, str | int]]]:
     """
-    Typeahead autocomplete using Elasticsearch search_as_you_type field.
-
-    Queries the auto_suggest field (search_as_you_type mapping) across all entity
-    indexes using a bool_prefix multi_match, which is the ES-native equivalent of
-    the retired haystack EdgeNgram autocomplete.
+    Typeahead autocomplete on the configured search backend.
 
     Args:
         term: The partial search term typed by the user.
@@ -148,55 +266,27 @@ def autocomplete_v2(term: str, user=None) -> dict[str, list[dict[str, str | int]
     if not term or len(term) > 255:
         return {tag: [] for tag in indexes}
 
-    es = new_elasticsearch()
-
-    body = {
-        "query": {
-            "bool": {
-                "must": {
-                    "multi_match": {
-                        "query": term,
-                        "type": "bool_prefix",
-                        "fields": [
-                            "auto_suggest",
-                            "auto_suggest._2gram",
-                            "auto_suggest._3gram",
-                        ],
-                    }
-                },
-                "filter": {"term": {"status": "ok"}},
-            }
-        },
-        "_source": True,
-        "sort": ["_score"],
-    }
-
-    hide_ixs_without_fac = (
+    hide_ixs_without_fac = bool(
         user
         and not isinstance(user, AnonymousUser)
         and getattr(user, "hide_ixs_without_fac", False)
     )
 
-    search_query = es.search(
-        index=indexes,
-        body=body,
-        size=settings.SEARCH_RESULTS_AUTOCOMPLETE_LIMIT,
-        request_timeout=settings.ES_REQUEST_TIMEOUT,
+    # the auto_suggest field is analyzed, so case and repeated whitespace
+    # do not change the result
+    cache_key = search_cache_key(
+        "autocomplete",
+        " ".join(term.lower().split()),
+        indexes,
+        hide_ixs_without_fac=hide_ixs_without_fac,
     )
+    result = cached_search_result("autocomplete", cache_key)
+    if result is not None:
+        return result
 
-    result = {tag: [] for tag in indexes}
-    pk_map = {tag: {} for tag in indexes}
+    result = get_search_backend().autocomplete(term, indexes, hide_ixs_without_fac)
 
-    for sq in search_query["hits"]["hits"]:
-        if sq["_source"].get("status") != "ok":
-            continue
-        if (
-            hide_ixs_without_fac
-            and get_index_tag(sq["_index"]) == "ix"
-            and sq["_source"].get("fac_count", 0) == 0
-        ):
-            continue
-        append_result_to_category(sq, result, pk_map)
+    cache_search_result(cache_key, result)
 
     return result
 
@@ -592,6 +682,54 @@ def construct_name_query(clean_term: str, term: str) -> dict:
     }
 
 
+def parse_search_term(qs: str) -> tuple[str, list[str], bool, bool]:
+    """
+    Turn a search query string into the term handed to `construct_query_body`.
+
+    Partial IP addresses are passed through as is. Anything else is escaped,
+    split into keywords joined by AND (unless joined by OR already) and each
+    keyword is wrapped in wildcards.
+
+    Args:
+        qs: The search query string.
+
+    Returns:
+        tuple: (term, keywords to look for exact matches of,
+        is an ipv4 search, is an ipv6 search)
+    """
+    # Escape special characters for Elasticsearch
+    safe_qs = escape_query_string(qs)
+    look_for_exact_matches = []
+    ipv4_construct = False
+    ipv6_construct = False
+    term = qs
+
+    if PARTIAL_IPV4_ADDRESS.match(" ".join(qs.split())):
+        if valid_partial_ipv4_address(" ".join(qs.split())):
+            term = " ".join(qs.split())
+            ipv4_construct = True
+    elif PARTIAL_IPV6_ADDRESS.match(" ".join(qs.split())):
+        ipv6_term = " ".join(qs.split())
+        if ipv6_term.endswith(":") and not ipv6_term.endswith("::"):
+            ipv6_term = ipv6_term.rstrip(":")
+        term = ipv6_term
+        ipv6_construct = True
+    else:
+        keywords = safe_qs.split()
+        keywords = add_and_between_keywords(keywords)
+
+        # will track the exact matches to put them on top of the results
+        term = ""
+        for keyword in keywords:
+            if keyword == "OR" or keyword == "AND":
+                term += f" {keyword}"
+            else:
+                look_for_exact_matches.append(keyword)
+                term += f" *{keyword}*"
+
+    return term, look_for_exact_matches, ipv4_construct, ipv6_construct
+
+
 def construct_query_body(
     term: str,
     geo: dict[str, str | float],
@@ -854,15 +992,240 @@ def append_result_to_category(sq: dict, result: dict, pk_map: dict):
         )
 
 
+class SearchBackend:
+    """
+    Engine behind `search_v2`, `autocomplete_v2` and the `name_search`
+    API filter.
+
+    Select the implementation with the `SEARCH_BACKEND` setting. Results
+    are returned in the shape produced by `process_search_results`: a dict
+    of reftag to a list of result dicts (see `append_result`).
+    """
+
+    def autocomplete(
+        self, term: str, indexes: list[str], hide_ixs_without_fac: bool
+    ) -> dict[str, list[dict[str, str | int]]]:
+        """
+        Typeahead search for `term` across `indexes`.
+        """
+        raise NotImplementedError()
+
+    def search(
+        self, qs: str, geo: dict[str, str | float], indexes: list[str], user
+    ) -> dict[str, list[dict[str, str | int]]]:
+        """
+        Full search for the query string `qs` across `indexes`, with
+        optional geo filtering.
+        """
+        raise NotImplementedError()
+
+    def search_ids(self, qs: str, index: str) -> list[int]:
+        """
+        Ids of the `index` objects matching the query string `qs`.
+        """
+        return [item["id"] for item in self.search(qs, {}, [index], None)[index]]
+
+    def update(self, instance) -> None:
+        """
+        Called when an object that feeds the search index is saved or
+        deleted. Backends that keep their index up to date on their own
+        can ignore this.
+        """
+
+
+class ElasticsearchBackend(SearchBackend):
+    """
+    Search backend querying the Elasticsearch cluster at `ELASTICSEARCH_URL`.
+
+    The index is kept up to date by django_elasticsearch_dsl through
+    `ESSilentRealTimeSignalProcessor`.
+    """
+
+    def autocomplete(
+        self, term: str, indexes: list[str], hide_ixs_without_fac: bool
+    ) -> dict[str, list[dict[str, str | int]]]:
+        """
+        Queries the auto_suggest field (search_as_you_type mapping) across all entity
+        indexes using a bool_prefix multi_match, which is the ES-native equivalent of
+        the retired haystack EdgeNgram autocomplete.
+        """
+        es = new_elasticsearch()
+
+        body = {
+            "query": {
+                "bool": {
+                    "must": {
+                        "multi_match": {
+                            "query": term,
+                            "type": "bool_prefix",
+                            "fields": [
+                                "auto_suggest",
+                                "auto_suggest._2gram",
+                                "auto_suggest._3gram",
+                            ],
+                        }
+                    },
+                    "filter": {"term": {"status": "ok"}},
+                }
+            },
+            "_source": True,
+            "sort": ["_score"],
+        }
+
+        search_query = es.search(
+            index=indexes,
+            body=body,
+            size=settings.SEARCH_RESULTS_AUTOCOMPLETE_LIMIT,
+            request_timeout=settings.ES_REQUEST_TIMEOUT,
+        )
+
+        result = {tag: [] for tag in indexes}
+        pk_map = {tag: {} for tag in indexes}
+
+        for sq in search_query["hits"]["hits"]:
+            if sq["_source"].get("status") != "ok":
+                continue
+            if (
+                hide_ixs_without_fac
+                and get_index_tag(sq["_index"]) == "ix"
+                and sq["_source"].get("fac_count", 0) == 0
+            ):
+                continue
+            append_result_to_category(sq, result, pk_map)
+
+        return result
+
+    def search(
+        self, qs: str, geo: dict[str, str | float], indexes: list[str], user
+    ) -> dict[str, list[dict[str, str | int]]]:
+        """
+        Constructs a search query based on the provided term, escaping special
+        characters to ensure safety in Elasticsearch. It processes the term into keywords,
+        adds 'AND' between them as necessary, and formats the query for the search.
+        """
+        es = new_elasticsearch()
+
+        term, look_for_exact_matches, ipv4_construct, ipv6_construct = (
+            parse_search_term(qs)
+        )
+
+        body = construct_query_body(
+            term, geo, indexes, ipv4_construct, ipv6_construct, user
+        )
+
+        total_limit = settings.SEARCH_RESULTS_LIMIT
+        if geo and not term.strip():
+            # fetch counts and hits for every index in a single msearch
+            # round-trip. no index can be handed more than total_limit slots,
+            # so asking each one for that many hits covers any fair share
+            # computed below.
+            searches = []
+            for index in indexes:
+                searches.append({"index": index})
+                searches.append(dict(body, size=total_limit))
+
+            msearch = es.msearch(
+                searches=searches,
+                request_timeout=settings.ES_REQUEST_TIMEOUT,
+            )
+
+            index_counts = {}
+            index_hits = {}
+            for index, response in zip(indexes, msearch["responses"]):
+                # a failed sub-search is reported inline instead of raising,
+                # treat that index as having no results
+                if "error" in response:
+                    continue
+                count = response["hits"]["total"]["value"]
+                if count > 0:
+                    index_counts[index] = count
+                    index_hits[index] = response["hits"]["hits"]
+
+            # Sort indexes by count
+            sorted_indexes = sorted(index_counts.items(), key=lambda x: x[1])
+
+            results = []
+            remaining_slots = total_limit
+
+            # Process indexes from smallest to largest
+            for index, count in sorted_indexes:
+                # If this index's count is less than remaining_slots/remaining_indexes,
+                # take all its results. Otherwise, take a fair share.
+                remaining_indexes = len([i for i, c in sorted_indexes if c >= count])
+                fair_share = math.ceil(remaining_slots / remaining_indexes)
+
+                size_to_take = min(count, fair_share)
+                if size_to_take > 0:
+                    results.extend(index_hits[index][:size_to_take])
+                    remaining_slots -= size_to_take
+
+            search_query = {"hits": {"hits": results, "total": {"value": len(results)}}}
+        else:
+            # Perform the search query
+            search_query = es.search(
+                index=indexes,
+                body=body,
+                size=total_limit,
+                request_timeout=settings.ES_REQUEST_TIMEOUT,
+            )
+
+        # Process and filter the search results
+        search_results = process_search_results(
+            search_query, geo, indexes, settings.SEARCH_RESULTS_LIMIT
+        )
+
+        # Order results alphabetically with exact matches prioritized
+        result = order_results_alphabetically(
+            search_results, look_for_exact_matches, qs
+        )
+
+        return result
+
+    def search_ids(self, qs: str, index: str) -> list[int]:
+        """
+        Queries `index` only and skips fetching and scoring explanations of
+        the documents, the hit ids are all that is needed.
+        """
+        es = new_elasticsearch()
+
+        term, _, ipv4_construct, ipv6_construct = parse_search_term(qs)
+        body = construct_query_body(
+            term, {}, [index], ipv4_construct, ipv6_construct, None
+        )
+        body["query"]["bool"]["filter"] = {"term": {"status": "ok"}}
+        body["_source"] = False
+        body["stored_fields"] = []
+        body.pop("explain", None)
+
+        search_query = es.search(
+            index=index,
+            body=body,
+            size=settings.SEARCH_RESULTS_LIMIT,
+            request_timeout=settings.ES_REQUEST_TIMEOUT,
+        )
+
+        return [int(hit["_id"]) for hit in search_query["hits"]["hits"]]
+
+
+_search_backends = {}
+
+
+def get_search_backend() -> SearchBackend:
+    """
+    Return the search backend instance configured by `SEARCH_BACKEND`.
+    """
+    path = settings.SEARCH_BACKEND
+    if path not in _search_backends:
+        _search_backends[path] = import_string(path)()
+    return _search_backends[path]
+
+
 def search_v2(
     term: list[str | int], geo: dict[str, str | float] = {}, user=None
 ) -> dict[str, list[dict[str, str | int]]]:
     """
-    Search searchable objects (ixp, network, facility ...) by term on elasticsearch engine.
-
-    This function constructs a search query based on the provided term, escaping special
-    characters to ensure safety in Elasticsearch. It processes the term into keywords,
-    adds 'AND' between them as necessary, and formats the query for the search.
+    Search searchable objects (ixp, network, facility ...) by term on the
+    configured search backend.
 
     Args:
         term: List of search terms.
@@ -871,104 +1234,55 @@ def search_v2(
     Returns:
         A dictionary containing the search results by category.
     """
-    es = new_elasticsearch()
     # Convert the term to a string and join with space
     qs = " ".join([str(elem) for elem in term])
 
-    # Escape special characters for Elasticsearch
-    safe_qs = escape_query_string(qs)
-    look_for_exact_matches = []
-    ipv4_construct = False
-    ipv6_construct = False
+    indexes = ["fac", "ix", "net", "org", "campus", "carrier"]
 
-    if PARTIAL_IPV4_ADDRESS.match(" ".join(qs.split())):
-        if valid_partial_ipv4_address(" ".join(qs.split())):
-            term = " ".join(qs.split())
-            ipv4_construct = True
-    elif PARTIAL_IPV6_ADDRESS.match(" ".join(qs.split())):
-        ipv6_term = " ".join(qs.split())
-        if ipv6_term.endswith(":") and not ipv6_term.endswith("::"):
-            ipv6_term = ipv6_term.rstrip(":")
-        term = ipv6_term
-        ipv6_construct = True
-    else:
-        keywords = safe_qs.split()
-        keywords = add_and_between_keywords(keywords)
+    # AND / OR are case sensitive operators here, so only whitespace is
+    # normalized
+    cache_key = search_cache_key(
+        "search",
+        " ".join(qs.split()),
+        indexes,
+        geo=geo,
+        hide_ixs_without_fac=bool(
+            user and not isinstance(user, AnonymousUser) and user.hide_ixs_without_fac
+        ),
+    )
+    result = cached_search_result("search", cache_key)
+    if result is not None:
+        return result
 
-        # will track the exact matches to put them on top of the results
-        term = ""
-        for keyword in keywords:
-            if keyword == "OR" or keyword == "AND":
-                term += f" {keyword}"
-            else:
-                look_for_exact_matches.append(keyword)
-                term += f" *{keyword}*"
+    result = get_search_backend().search(qs, geo, indexes, user)
 
-    indexes = ["fac", "ix", "net", "org", "campus", "carrier"]
+    cache_search_result(cache_key, result)
 
-    body = construct_query_body(
-        term, geo, indexes, ipv4_construct, ipv6_construct, user
-    )
+    return result
 
-    total_limit = settings.SEARCH_RESULTS_LIMIT
-    if geo and not term.strip():
-        # get counts for each index
-        index_counts = {}
-        for index in indexes:
-            index_body = copy.deepcopy(body)
-            if "query" in index_body and "bool" in index_body["query"]:
-                count_search = es.search(
-                    index=index,
-                    body=index_body,
-                    size=0,
-                    request_timeout=settings.ES_REQUEST_TIMEOUT,
-                )
-                count = count_search["hits"]["total"]["value"]
-                if count > 0:
-                    index_counts[index] = count
 
-        # Sort indexes by count
-        sorted_indexes = sorted(index_counts.items(), key=lambda x: x[1])
-
-        results = []
-        remaining_slots = total_limit
-
-        # Process indexes from smallest to largest
-        for index, count in sorted_indexes:
-            index_body = copy.deepcopy(body)
-
-            # If this index's count is less than remaining_slots/remaining_indexes,
-            # take all its results. Otherwise, take a fair share.
-            remaining_indexes = len([i for i, c in sorted_indexes if c >= count])
-            fair_share = math.ceil(remaining_slots / remaining_indexes)
-
-            size_to_take = min(count, fair_share)
-            if size_to_take > 0:
-                index_search = es.search(
-                    index=index,
-                    body=index_body,
-                    size=size_to_take,
-                    request_timeout=settings.ES_REQUEST_TIMEOUT,
-                )
-                results.extend(index_search["hits"]["hits"])
-                remaining_slots -= size_to_take
-
-        search_query = {"hits": {"hits": results, "total": {"value": len(results)}}}
-    else:
-        # Perform the search query
-        search_query = es.search(
-            index=indexes,
-            body=body,
-            size=total_limit,
-            request_timeout=settings.ES_REQUEST_TIMEOUT,
-        )
+def search_ids(term: str, index: str) -> list[int]:
+    """
+    Return the ids of the objects in a single index matching a search term.
 
-    # Process and filter the search results
-    search_results = process_search_results(
-        search_query, geo, indexes, settings.SEARCH_RESULTS_LIMIT
-    )
+    Used by the `name_search` API filter, which only needs the ids of the
+    model being listed. The id list is cached like other search results, so
+    paginating through the same `name_search` does not repeat the search.
+
+    Args:
+        term: The search term.
+        index: The index (reftag) to search, e.g. `net`.
+
+    Returns:
+        list: Matching object ids.
+    """
+    cache_key = search_cache_key("ids", " ".join(term.split()), [index])
+    result = cached_search_result("ids", cache_key)
+    if result is not None:
+        return result
+
+    result = get_search_backend().search_ids(term, index)
 
-    # Order results alphabetically with exact matches prioritized
-    result = order_results_alphabetically(search_results, look_for_exact_matches, qs)
+    cache_search_result(cache_key, result)
 
     return result
@@ -23,13 +23,14 @@ from corsheaders.signals import check_request_enabled
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.db.models import Count
-from django.db.models.signals import post_save, pre_delete, pre_save
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.template import loader
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import override
+from django_elasticsearch_dsl.registries import registry
 from django_elasticsearch_dsl.signals import RealTimeSignalProcessor
 from django_grainy.models import Group, GroupPermission
 from django_peeringdb.const import REGION_MAPPING
@@ -53,15 +54,28 @@ from peeringdb_server.models import (
     QUEUE_ENABLED,
     QUEUE_NOTIFY,
     Campus,
+    Carrier,
+    CarrierFacility,
     EmailAddressData,
     Facility,
+    InternetExchange,
+    InternetExchangeFacility,
+    IXFMemberData,
+    IXLan,
+    IXLanPrefix,
     Network,
+    NetworkContact,
     NetworkFacility,
     NetworkIXLan,
     Organization,
     UserOrgAffiliationRequest,
     VerificationQueueItem,
 )
+from peeringdb_server.prefix_index import ixlan_prefix_index_update
+from peeringdb_server.search_v2 import (
+    bump_search_cache_generation,
+    get_search_backend,
+)
 from peeringdb_server.util import disable_auto_now_and_save
 
 log = structlog.getLogger("django")
@@ -207,6 +221,96 @@ def netixlan_sync_asn_on_save(sender, instance, **kwargs):
 post_save.connect(netixlan_sync_asn_on_save, sender=NetworkIXLan)
 
 
+def netixlan_invalidate_ixf_proposed_actions(sender, instance, **kwargs):
+    """
+    When a networkixlan is saved or deleted, the actions proposed by IX-F
+    data that may resolve to it need to be evaluated again.
+
+    IX-F member data is matched to its netixlan by asn and ip addresses,
+    regardless of the ixlan, so entries of the asn as well as entries
+    for either of its ip addresses are flagged.
+    """
+    match = Q(asn=instance.asn)
+    if instance.ipaddr4:
+        match |= Q(ipaddr4=instance.ipaddr4)
+    if instance.ipaddr6:
+        match |= Q(ipaddr6=instance.ipaddr6)
+    IXFMemberData.invalidate_proposed_actions(match)
+
+
+post_save.connect(netixlan_invalidate_ixf_proposed_actions, sender=NetworkIXLan)
+post_delete.connect(netixlan_invalidate_ixf_proposed_actions, sender=NetworkIXLan)
+
+
+def ixfmemberdata_invalidate_ixf_proposed_actions(sender, instance, **kwargs):
+    """
+    When an IXFMemberData that is the requirement of another one is saved
+    or deleted, the action proposed by the entry depending on it needs to
+    be evaluated again, as it is derived from its requirements.
+    """
+    if instance.requirement_of_id:
+        IXFMemberData.invalidate_proposed_actions(id=instance.requirement_of_id)
+
+
+post_save.connect(ixfmemberdata_invalidate_ixf_proposed_actions, sender=IXFMemberData)
+post_delete.connect(ixfmemberdata_invalidate_ixf_proposed_actions, sender=IXFMemberData)
+
+
+def network_invalidate_ixf_proposed_actions(sender, instance, **kwargs):
+    """
+    When a network is saved, the actions proposed by IX-F data
+    for it need to be evaluated again, as they depend on the
+    network's ixp update settings.
+    """
+    IXFMemberData.invalidate_proposed_actions(asn=instance.asn)
+
+
+post_save.connect(network_invalidate_ixf_proposed_actions, sender=Network)
+
+
+def netixlan_invalidate_ixf_export(sender, instance, **kwargs):
+    """
+    When a networkixlan is saved or deleted, the cached IX-F export
+    member list of its ixlan is dropped.
+    """
+    IXLan.invalidate_ixf_export([instance.ixlan_id])
+
+
+post_save.connect(netixlan_invalidate_ixf_export, sender=NetworkIXLan)
+post_delete.connect(netixlan_invalidate_ixf_export, sender=NetworkIXLan)
+
+
+def ixpfx_update_prefix_index(sender, instance, **kwargs):
+    """
+    When an ixlan prefix is saved or deleted, the shared prefix index
+    used to validate prefixes and peer addresses is updated.
+    """
+    ixlan_prefix_index_update(instance)
+
+
+post_save.connect(ixpfx_update_prefix_index, sender=IXLanPrefix)
+post_delete.connect(ixpfx_update_prefix_index, sender=IXLanPrefix)
+
+
+def network_invalidate_ixf_export(sender, instance, **kwargs):
+    """
+    When a network or one of its contacts is saved or deleted, the cached
+    IX-F export member lists of the ixlans the network is present at
+    are dropped.
+    """
+    network_id = instance.id if sender is Network else instance.network_id
+    IXLan.invalidate_ixf_export(
+        NetworkIXLan.handleref.filter(network_id=network_id).values_list(
+            "ixlan_id", flat=True
+        )
+    )
+
+
+post_save.connect(network_invalidate_ixf_export, sender=Network)
+post_save.connect(network_invalidate_ixf_export, sender=NetworkContact)
+post_delete.connect(network_invalidate_ixf_export, sender=NetworkContact)
+
+
 def netfac_sync_local_asn_on_save(sender, instance, **kwargs):
     """
     When a networkfacility is saved, sync the local_asn field with the network's asn.
@@ -763,6 +867,30 @@ def auto_fill_region_continent(sender, instance, **kwargs):
 pre_save.connect(auto_fill_region_continent, sender=Facility)
 
 
+def search_backend_update(sender, instance, **kwargs):
+    """
+    Let the configured search backend re-index objects affected by
+    a save or delete
+    """
+    get_search_backend().update(instance)
+
+
+for model in [
+    Organization,
+    Facility,
+    InternetExchange,
+    Network,
+    Campus,
+    Carrier,
+    NetworkIXLan,
+    NetworkFacility,
+    InternetExchangeFacility,
+    CarrierFacility,
+]:
+    post_save.connect(search_backend_update, sender=model)
+    post_delete.connect(search_backend_update, sender=model)
+
+
 class ESSilentRealTimeSignalProcessor(RealTimeSignalProcessor):
     """
     Elasticsearch real time signal processor that silently handles
@@ -776,12 +904,21 @@ class ESSilentRealTimeSignalProcessor(RealTimeSignalProcessor):
         self._log = structlog.getLogger("django")
         return self._log
 
+    def invalidate_search_cache(self, instance):
+        """
+        Retire cached search results if `instance` is indexed or
+        feeds into an indexed document
+        """
+        if instance.__class__ in registry:
+            bump_search_cache_generation()
+
     def handle_save(self, sender, instance, **kwargs):
         try:
             super().handle_save(sender, instance, **kwargs)
         except Exception as e:
             self.log.error("ELASTICSEARCH", action="save", error=e, instance=instance)
             pass
+        self.invalidate_search_cache(instance)
 
     def handle_delete(self, sender, instance, **kwargs):
         try:
@@ -789,6 +926,7 @@ class ESSilentRealTimeSignalProcessor(RealTimeSignalProcessor):
         except Exception as e:
             self.log.error("ELASTICSEARCH", action="delete", error=e, instance=instance)
             pass
+        self.invalidate_search_cache(instance)
 
     def handle_pre_delete(self, sender, instance, **kwargs):
         try:
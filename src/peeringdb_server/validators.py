@@ -22,6 +22,7 @@ from schema import Schema
 import peeringdb_server.geo as geo
 import peeringdb_server.models
 from peeringdb_server.inet import IRR_SOURCE, network_is_pdb_valid
+from peeringdb_server.prefix_index import ixlan_prefix_index
 from peeringdb_server.request import bypass_validation
 from peeringdb_server.settings_util import get_setting_time
 from peeringdb_server.verified_update import const
@@ -342,8 +343,11 @@ def validate_prefix_overlap(
     prefix = validate_prefix(prefix)
     protocol = f"IPv{prefix.version}"
 
+    # only prefixes the index finds overlapping can conflict or be renumbered
     qs = peeringdb_server.models.IXLanPrefix.objects.filter(
-        protocol=protocol, status="ok"
+        id__in=ixlan_prefix_index().overlapping(prefix),
+        protocol=protocol,
+        status="ok",
     ).exclude(prefix=prefix)
 
     being_renumbered: bool = False
@@ -363,21 +367,15 @@ def validate_prefix_overlap(
                 ixlan = instance.ixlan
                 ip_field = "ipaddr4" if new_prefix.version == 4 else "ipaddr6"
 
-                netixlans = ixlan.netixlan_set.filter(status="ok")
-                old_covered = {
-                    n
-                    for n in netixlans
-                    if getattr(n, ip_field)
-                    and ipaddress.ip_address(getattr(n, ip_field)) in old_prefix
-                }
-                new_covered = {
-                    n
-                    for n in netixlans
-                    if getattr(n, ip_field)
-                    and ipaddress.ip_address(getattr(n, ip_field)) in new_prefix
-                }
-
-                if set(old_covered).issubset(set(new_covered)):
+                # every peer address in the old block must be in the new one
+                addresses = (
+                    ipaddress.ip_address(addr)
+                    for addr in ixlan.netixlan_set.filter(status="ok").values_list(
+                        ip_field, flat=True
+                    )
+                    if addr
+                )
+                if all(addr in new_prefix for addr in addresses if addr in old_prefix):
                     being_renumbered = True
                     continue
                 else:
@@ -649,10 +647,12 @@ def _verify_irr_existence(existence_checks: list[tuple[str, str]]) -> None:
     """
     from peeringdb_server import irr
 
+    # one cache round-trip for the whole value; only uncached tokens go live
+    found_in = irr.exists_in_many(existence_checks)
     missing = [
         (source, name)
         for source, name in existence_checks
-        if irr.exists_in(source, name) is False
+        if found_in[(source.upper(), name.upper())] is False
     ]
     if not missing:
         return
@@ -1,6 +1,7 @@
 import datetime
 import json
 import urllib
+from unittest.mock import patch
 
 import pytest
 from django.conf import settings as dj_settings
@@ -860,6 +861,87 @@ class AdminTests(TestCase):
             data = json.loads(response.content.decode("utf8"))
             assert len(data)
 
+    def test_grappelli_autocomplete_ranked(self):
+        """
+        test that grappelli autocomplete on models that are part of
+        the search index keeps the ranking of the search backend
+        """
+
+        client = Client()
+        client.force_login(self.admin_user)
+
+        org = models.Organization.objects.first()
+        first = models.Facility.objects.create(
+            org=org, name="Ranked Facility B", status="ok"
+        )
+        second = models.Facility.objects.create(
+            org=org, name="Ranked Facility A", status="ok"
+        )
+        pending = models.Facility.objects.create(
+            org=org, name="Ranked Facility C", status="pending"
+        )
+
+        with patch(
+            "peeringdb_server.autocomplete_views.search_ids",
+            return_value=[first.id, second.id],
+        ) as search_ids:
+            response = client.get(
+                "/grappelli/lookup/autocomplete/?"
+                "term=ranked&app_label=peeringdb_server&"
+                "model_name=Facility&query_string="
+                "_to_field=id&to_field=id"
+            )
+
+        search_ids.assert_called_once_with("ranked", "fac")
+
+        data = json.loads(response.content.decode("utf8"))
+
+        # objects missing from the search index (pending) are
+        # matched by name and ranked last
+        assert [row["value"] for row in data] == [first.id, second.id, pending.id]
+
+    def test_grappelli_autocomplete_ranked_term(self):
+        """
+        test that the ranked grappelli autocomplete searches for the term
+        as adjusted by the model and still matches objects by exact id
+        """
+
+        client = Client()
+        client.force_login(self.admin_user)
+
+        org = models.Organization.objects.first()
+        fac = models.Facility.objects.create(
+            id=4242, org=org, name="Unranked Facility", status="pending"
+        )
+
+        url = (
+            "/grappelli/lookup/autocomplete/?"
+            "term={}&app_label=peeringdb_server&"
+            "model_name=Facility&query_string="
+            "_to_field=id&to_field=id"
+        )
+
+        with (
+            patch(
+                "peeringdb_server.autocomplete_views.search_ids", return_value=[]
+            ) as search_ids,
+            patch.object(
+                models.Facility,
+                "autocomplete_term_adjust",
+                lambda term: term.upper(),
+                create=True,
+            ),
+        ):
+            client.get(url.format("ranked"))
+
+        search_ids.assert_called_once_with("RANKED", "fac")
+
+        with patch("peeringdb_server.autocomplete_views.search_ids", return_value=[]):
+            response = client.get(url.format(fac.id))
+
+        data = json.loads(response.content.decode("utf8"))
+        assert [row["value"] for row in data] == [fac.id]
+
     def test_protected_entity_errors(self):
         """
         Test that attempting to delete a protected
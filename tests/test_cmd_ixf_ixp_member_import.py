@@ -1,5 +1,7 @@
 import io
 import json
+import pickle
+from concurrent.futures import Future
 
 import pytest
 import requests
@@ -7,10 +9,14 @@ import reversion
 from django.conf import settings
 from django.core.cache import cache
 from django.core.management import call_command
+from django.db import OperationalError
 from django.test import override_settings
 from django.utils import timezone
 
 from peeringdb_server import ixf
+from peeringdb_server.management.commands.pdb_ixf_ixp_member_import import (
+    import_worker,
+)
 from peeringdb_server.models import (
     DeskProTicket,
     InternetExchange,
@@ -283,6 +289,324 @@ def test_runtime_errors_uncaught(entities, capsys, mocker):
     assert "Uncaught bug" in str(pytest_uncaught_error.value)
 
 
+@pytest.mark.django_db
+def test_prefetch(mocker):
+    """
+    Test that IX-F exports are downloaded once per url and that
+    successful downloads are cached
+    """
+    ixf_import_data = setup_test_data("ixf.member.0")
+
+    def get(url, timeout=None, headers=None, stream=False):
+        if url == "http://www.localhost.com/error":
+            raise requests.exceptions.ConnectionError("Connection refused")
+        content = json.dumps(ixf_import_data).encode("utf-8")
+        response = mocker.Mock(status_code=200, headers={})
+        response.iter_content.return_value = [content]
+        return response
+
+    requests_get = mocker.patch("peeringdb_server.ixf.requests.get", side_effect=get)
+
+    importer = ixf.Importer()
+    prefetched = importer.prefetch(
+        [
+            "http://www.localhost.com",
+            "http://www.localhost.com",
+            "http://www.localhost.com/error",
+            None,
+        ],
+        max_workers=2,
+    )
+
+    assert requests_get.call_count == 2
+    data, timings = prefetched["http://www.localhost.com"]
+    assert not data["pdb_error"]
+    assert timings["fetch"]["time"] >= 0
+    assert timings["sanitize"]["time"] >= 0
+    assert "Connection refused" in str(
+        prefetched["http://www.localhost.com/error"][0]["pdb_error"]
+    )
+    assert importer.fetch_cached("http://www.localhost.com")["member_list"]
+
+
+@pytest.mark.django_db
+def test_prefetch_data_passed_to_import(entities, mocker):
+    """
+    Test that the import uses the prefetched IX-F data
+    """
+    ixlan = entities["ixlan"]
+    ixlan.ixf_ixp_import_enabled = True
+    ixlan.ixf_ixp_member_list_url = "http://www.localhost.com"
+    ixlan.save()
+
+    data = {"member_list": [], "pdb_error": None}
+    timings = {"fetch": {"time": 1.5, "queries": 0}}
+
+    prefetch = mocker.patch(
+        "peeringdb_server.management.commands.pdb_ixf_ixp_member_import.ixf.Importer.prefetch",
+        return_value={ixlan.ixf_ixp_member_list_url: (data, timings)},
+    )
+    update = mocker.patch(
+        "peeringdb_server.management.commands.pdb_ixf_ixp_member_import.ixf.Importer.update",
+        return_value=True,
+    )
+    mocker.patch(
+        "peeringdb_server.management.commands.pdb_ixf_ixp_member_import.ixf.Importer.notify_proposals",
+    )
+
+    call_command("pdb_ixf_ixp_member_import", ixlan=[ixlan.id], fetch_workers=4)
+
+    assert prefetch.call_args.kwargs["max_workers"] == 4
+    assert update.call_args.kwargs["data"] is data
+    assert update.call_args.kwargs["timings"] is timings
+
+    # prefetch is skipped when only using cached data
+    prefetch.reset_mock()
+    call_command("pdb_ixf_ixp_member_import", ixlan=[ixlan.id], cache=True)
+
+    prefetch.assert_not_called()
+    assert update.call_args.kwargs["data"] is None
+
+
+class SynchronousExecutor:
+    """
+    Stands in for the process pool, runs submitted calls right away
+    """
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+@pytest.mark.django_db
+def test_import_workers(entities, mocker):
+    """
+    Test that ixlans are imported in worker processes and that an ixlan
+    running into a database conflict is imported again afterwards
+    """
+    ix = InternetExchange.objects.create(
+        name="Test Exchange Two", org=entities["org"], status="ok"
+    )
+    ixlans = [entities["ixlan"], ix.ixlan]
+    for ixlan in ixlans:
+        ixlan.ixf_ixp_import_enabled = True
+        ixlan.ixf_ixp_member_list_url = f"http://www.localhost.com/{ixlan.id}"
+        ixlan.save()
+
+    command = "peeringdb_server.management.commands.pdb_ixf_ixp_member_import"
+    executor = mocker.patch(
+        f"{command}.ProcessPoolExecutor", side_effect=SynchronousExecutor
+    )
+    mocker.patch(f"{command}.connections.close_all")
+    mocker.patch(
+        f"{command}.ixf.Importer.prefetch",
+        return_value={
+            ixlan.ixf_ixp_member_list_url: (
+                {"member_list": [], "pdb_error": None},
+                {},
+            )
+            for ixlan in ixlans
+        },
+    )
+    update = mocker.patch(
+        f"{command}.ixf.Importer.update",
+        side_effect=[OperationalError("database is locked"), True, True],
+    )
+    notify_proposals = mocker.patch(f"{command}.ixf.Importer.notify_proposals")
+
+    out = io.StringIO()
+    call_command(
+        "pdb_ixf_ixp_member_import",
+        ixlan=[ixlan.id for ixlan in ixlans],
+        workers=2,
+        stdout=out,
+    )
+
+    assert executor.call_args.kwargs["max_workers"] == 2
+    assert update.call_count == 3
+    assert update.call_args_list[0].args[0] == update.call_args_list[2].args[0]
+    assert f"Deferring {ixlans[0].ix.name}" in out.getvalue()
+    notify_proposals.assert_called_once()
+
+
+class RecordingExecutor(SynchronousExecutor):
+    """
+    Synchronous executor keeping the ixlan ids of each submitted worker
+    """
+
+    submitted = []
+
+    def submit(self, fn, options, ixlans):
+        self.submitted.append([ixlan_id for ixlan_id, data in ixlans])
+        return super().submit(fn, options, ixlans)
+
+
+@pytest.mark.django_db
+def test_import_workers_partition_shared_networks(entities, mocker):
+    """
+    Test that ixlans sharing a member ASN are imported by the same worker,
+    so concurrent imports never write the same network rows, and that
+    ixlans whose members are unknown are imported after the workers
+    """
+    ixlans = [entities["ixlan"]]
+    for name in ("Two", "Three", "Four"):
+        ix = InternetExchange.objects.create(
+            name=f"Test Exchange {name}", org=entities["org"], status="ok"
+        )
+        ixlans.append(ix.ixlan)
+    for ixlan in ixlans:
+        ixlan.ixf_ixp_import_enabled = True
+        ixlan.ixf_ixp_member_list_url = f"http://www.localhost.com/{ixlan.id}"
+        ixlan.save()
+
+    def export(*asns):
+        data = {"member_list": [{"asnum": asn} for asn in asns], "pdb_error": None}
+        return data, {}
+
+    # AS1001 is a member of the first and third exchange, the export of
+    # the fourth failed to download
+    prefetched = {
+        ixlans[0].ixf_ixp_member_list_url: export(1001, 1002),
+        ixlans[1].ixf_ixp_member_list_url: export(2001),
+        ixlans[2].ixf_ixp_member_list_url: export(1001),
+    }
+
+    command = "peeringdb_server.management.commands.pdb_ixf_ixp_member_import"
+    RecordingExecutor.submitted = []
+    mocker.patch(f"{command}.ProcessPoolExecutor", side_effect=RecordingExecutor)
+    mocker.patch(f"{command}.connections.close_all")
+    mocker.patch(f"{command}.ixf.Importer.prefetch", return_value=prefetched)
+    update = mocker.patch(f"{command}.ixf.Importer.update", return_value=True)
+    mocker.patch(f"{command}.ixf.Importer.notify_proposals")
+
+    call_command(
+        "pdb_ixf_ixp_member_import",
+        ixlan=[ixlan.id for ixlan in ixlans],
+        workers=2,
+        stdout=io.StringIO(),
+    )
+
+    assert RecordingExecutor.submitted == [
+        [ixlans[0].id, ixlans[2].id],
+        [ixlans[1].id],
+    ]
+    assert [call.args[0].id for call in update.call_args_list] == [
+        ixlans[0].id,
+        ixlans[2].id,
+        ixlans[1].id,
+        ixlans[3].id,
+    ]
+
+
+@pytest.mark.django_db
+def test_import_worker_result(entities):
+    """
+    Test that the results of a worker can be sent back to the
+    parent process
+    """
+    ixlan = entities["ixlan"]
+    ixlan.ixf_ixp_import_enabled = True
+    ixlan.ixf_ixp_member_list_url = "http://www.localhost.com"
+    ixlan.save()
+
+    # network present in the IX-F data, changes are proposed to it
+    Network.objects.create(
+        name="Network w allow ixp update disabled 2",
+        org=entities["org"],
+        asn=2906,
+        allow_ixp_update=False,
+        status="ok",
+        info_unicast=True,
+        info_ipv6=True,
+    )
+
+    data = setup_test_data("ixf.member.0")
+    data["pdb_error"] = None
+
+    result = import_worker({"commit": True}, [(ixlan.id, (data, None))])
+    result = pickle.loads(pickle.dumps(result))
+
+    assert result["log"]["data"]
+    assert result["notifications"]
+    assert not result["runtime_errors"]
+    assert not result["conflicts"]
+    assert f"Processing {ixlan.ix.name}" in result["output"]
+    assert result["timings"][0]["ixlan_id"] == ixlan.id
+    assert result["timings"][0]["timings"]["parse"]["queries"]
+
+
+@pytest.mark.django_db
+def test_report_timings(entities, mocker):
+    """
+    Test that the phase timings of the slowest imports are reported
+    """
+    ix = InternetExchange.objects.create(
+        name="Test Exchange Two", org=entities["org"], status="ok"
+    )
+    ixlans = [entities["ixlan"], ix.ixlan]
+    for ixlan in ixlans:
+        ixlan.ixf_ixp_import_enabled = True
+        ixlan.ixf_ixp_member_list_url = f"http://www.localhost.com/{ixlan.id}"
+        ixlan.save()
+
+    def update(importer, ixlan, **kwargs):
+        importer.timings = {
+            "parse": {"time": ixlan.id * 0.5, "queries": 3},
+            "archive": {"time": 0.25, "queries": 2},
+            "total": {"time": ixlan.id * 0.5 + 0.25, "queries": 5},
+        }
+        return True
+
+    command = "peeringdb_server.management.commands.pdb_ixf_ixp_member_import"
+    mocker.patch(f"{command}.ixf.Importer.prefetch", return_value={})
+    mocker.patch(f"{command}.ixf.Importer.update", autospec=True, side_effect=update)
+    mocker.patch(f"{command}.ixf.Importer.notify_proposals")
+
+    # only reported when asked for
+    out = io.StringIO()
+    call_command(
+        "pdb_ixf_ixp_member_import",
+        ixlan=[ixlan.id for ixlan in ixlans],
+        stdout=out,
+    )
+    assert "Slowest" not in out.getvalue()
+
+    # the preview output is left as it is
+    out = io.StringIO()
+    call_command(
+        "pdb_ixf_ixp_member_import",
+        ixlan=[ixlan.id for ixlan in ixlans],
+        preview=True,
+        report_timings=1,
+        stdout=out,
+    )
+    preview, _ = json.JSONDecoder().raw_decode(out.getvalue())
+    assert set(preview) == {"data", "errors"}
+
+    out = io.StringIO()
+    call_command(
+        "pdb_ixf_ixp_member_import",
+        ixlan=[ixlan.id for ixlan in ixlans],
+        report_timings=1,
+        stdout=out,
+    )
+    report = out.getvalue().split("Slowest 1 imports:")[1]
+
+    assert f"{ix.name} ({ix.ixlan.id}): {ix.ixlan.id * 0.5 + 0.25:.2f}s" in report
+    assert entities["ix"].name not in report
+    assert report.index("parse:") < report.index("archive: 0.25s, 2 queries")
+
+
 # This is the normal test case for resending emails
 @pytest.mark.django_db
 @override_settings(
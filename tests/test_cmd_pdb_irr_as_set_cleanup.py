@@ -8,6 +8,7 @@ the found-in-one (unambiguous) bare values.
 """
 
 import gzip
+import tracemalloc
 from datetime import timedelta
 from io import StringIO
 from unittest import mock
@@ -189,6 +190,88 @@ def test_build_index_reads_gzip(tmp_path):
     assert irr_bulk.sources_for_bulk("AS-FOO", index) == frozenset({"RIPE"})
 
 
+def test_parse_rpsl_reads_only_target_attributes():
+    # an attribute whose value looks like a target line, a continuation line
+    # carrying one, and a CRLF dump all leave the parse unchanged
+    dump = (
+        "person:         Jane Doe\r\n"
+        "remarks:        as-set: AS-NOT-AN-OBJECT\r\n"
+        "                source: RADB\r\n"
+        "source:         RIPE\r\n"
+        "\r\n"
+        "aut-num:        as64500 \r\n"
+        "source:         ripe # comment\r\n"
+    )
+    objs = list(irr_bulk.parse_rpsl(StringIO(dump)))
+    assert objs == [("aut-num", "AS64500", "RIPE")]
+
+
+def test_build_index_parallel_matches_serial(tmp_path):
+    paths = []
+    for i, dump in enumerate(
+        [SAMPLE_DUMP, EDGE_DUMP, "as-set: AS-FOO\nsource: RADB\n"]
+    ):
+        path = tmp_path / f"dump{i}.db.gz"
+        with gzip.open(path, "wt") as fh:
+            fh.write(dump)
+        paths.append(str(path))
+
+    index = irr_bulk.build_index(paths, workers=1)
+    assert irr_bulk.build_index(paths, workers=3) == index
+    assert index["AS-FOO"] == {"RIPE", "RADB"}
+    assert index["AS-WRAP"] == {"RADB"}
+
+
+def test_bulk_index_source_bitmasks():
+    index = irr_bulk.BulkIndex.from_sources(
+        {"RIPE": {"AS-FOO", "AS-BAR"}, "RADB": {"AS-FOO"}, "ARIN": {"AS1"}}
+    )
+    assert index.keys == ["AS-BAR", "AS-FOO", "AS1"]
+    assert index.mask("AS-FOO") == irr_bulk.source_mask(["RIPE", "RADB"])
+    assert index.mask("AS-MISSING") == 0
+    assert index["AS-FOO"] == {"RIPE", "RADB"}
+    assert "AS1" in index and "AS2" not in index
+    assert irr_bulk.sources_for_bulk("as-bar", index) == frozenset({"RIPE"})
+    assert irr_bulk.sources_for_bulk("AS-MISSING", index) == frozenset()
+    with pytest.raises(KeyError):
+        index["AS-MISSING"]
+
+
+def test_bulk_index_memory():
+    """
+    The compact index holds a key in a list slot plus four bytes of mask,
+    where a dict of sets spends a set object on every key.
+    """
+    keys_by_source = {
+        "RIPE": {f"AS-RIPE{i}" for i in range(50000)},
+        "RADB": {f"AS-RADB{i}" for i in range(50000)} | {"AS-RIPE1"},
+    }
+
+    def allocated(build):
+        tracemalloc.start()
+        try:
+            value = build()
+            return tracemalloc.get_traced_memory()[0], value
+        finally:
+            tracemalloc.stop()
+
+    def build_dict():
+        index = {}
+        for source, keys in keys_by_source.items():
+            for key in keys:
+                index.setdefault(key, set()).add(source)
+        return index
+
+    compact_size, compact = allocated(
+        lambda: irr_bulk.BulkIndex.from_sources(keys_by_source)
+    )
+    dict_size, dict_index = allocated(build_dict)
+
+    assert len(compact) == len(dict_index) == 100000
+    assert compact["AS-RIPE1"] == dict_index["AS-RIPE1"]
+    assert compact_size * 5 < dict_size
+
+
 def test_registry_split_precedence():
     # AS-ONE in one source, AS-MANY in two, AS-NONE in none
     index = {"AS-ONE": {"RIPE"}, "AS-MANY": {"RIPE", "RADB"}}
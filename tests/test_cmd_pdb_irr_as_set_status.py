@@ -17,16 +17,18 @@ from unittest import mock
 
 import pytest
 from django.core import mail
+from django.core.cache import cache
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.test import override_settings
 from django.utils import timezone
 
-from peeringdb_server import irr_bulk
+from peeringdb_server import irr, irr_bulk
 from peeringdb_server.irr import LookupResult
 from peeringdb_server.management.commands.pdb_irr_as_set_status import (
     _ID_CHUNK,
     BUDGET_SPENT,
+    CURSOR_CACHE_KEY,
     STATUS_DEFERRED,
     STATUS_GONE,
     STATUS_MOVED,
@@ -35,6 +37,7 @@ from peeringdb_server.management.commands.pdb_irr_as_set_status import (
     STATUS_UNKNOWN,
     Command,
     _id_chunks,
+    _network_chunks,
     verify_network,
 )
 from peeringdb_server.models import Network, NetworkContact, Organization
@@ -57,10 +60,19 @@ def _no_live_pool():
     dump nor patches the pool would connect out to whois.radb.net — slow, and a CI
     flake that looks like a logic failure. The default here answers "pool could not
     reach anything" (the fail-open shape); tests that care patch over it.
+
+    The command batches its lookups through sources_for_many, which is routed
+    through whatever sources_for the test installed.
     """
-    with mock.patch(
-        "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for",
-        side_effect=unreachable_pool,
+    with (
+        mock.patch(
+            "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for",
+            side_effect=unreachable_pool,
+        ),
+        mock.patch(
+            "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for_many",
+            side_effect=lambda names: {name: irr.sources_for(name) for name in names},
+        ),
     ):
         yield
 
@@ -406,6 +418,38 @@ def test_max_lookups_bounds_the_live_fan_out(org, tmp_path):
     assert "lookup budget reached" in output
 
 
+def test_live_lookups_are_batched_within_the_budget(org, tmp_path):
+    """
+    Index misses go to the pool in one sources_for_many batch per chunk of
+    networks, never more names than --max-lookups has left.
+    """
+    for asn in range(1, 5):
+        make_net(org, asn, f"RIPE::AS-MISS{asn} RIPE::AS-FOO")
+    make_net(org, 5, "RIPE::AS-MISS1")
+    write_irr_dump_set(tmp_path, SAMPLE_DUMP)
+
+    found = LookupResult(frozenset({"RIPE"}), True)
+    sources_for = mock.Mock(return_value=found)
+    sources_for_many = mock.Mock(side_effect=lambda names: dict.fromkeys(names, found))
+    with (
+        mock.patch(
+            "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for",
+            sources_for,
+        ),
+        mock.patch(
+            "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for_many",
+            sources_for_many,
+        ),
+    ):
+        output = run(dump_dir=str(tmp_path), max_lookups=3)
+
+    # AS-FOO is held by the index, so it is never asked about
+    sources_for_many.assert_called_once_with(["AS-MISS1", "AS-MISS2", "AS-MISS3"])
+    sources_for.assert_not_called()
+    assert "Live pool queries:           3" in output
+    assert "deferred by --max-lookups: 2" in output
+
+
 def test_max_lookups_zero_uncaps_a_dry_run(org, tmp_path):
     """
     0 is a reporting affordance: a read-only run the operator deliberately let off
@@ -1321,3 +1365,214 @@ def test_unknown_still_lands_on_a_row_carrying_no_verdict(org, tmp_path):
 
     net.refresh_from_db()
     assert net.irr_as_set_status == STATUS_UNKNOWN
+
+
+# --- incremental sweep ---------------------------------------------------------
+
+
+def test_commit_records_what_an_ok_verdict_was_about(org, tmp_path):
+    net = make_net(org, 1, "RIPE::AS-FOO")
+    live = make_net(org, 2, "RIPE::AS-MISS")
+    write_irr_dump_set(tmp_path, SAMPLE_DUMP)
+
+    with mock.patch(
+        "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for",
+        side_effect=pool({"AS-MISS": LookupResult(frozenset({"RIPE"}), True)}),
+    ):
+        run(commit=True, dump_dir=str(tmp_path))
+
+    net.refresh_from_db()
+    assert net.irr_as_set_status == STATUS_OK
+    assert net.irr_as_set_verified_value == "RIPE::AS-FOO"
+    assert net.irr_as_set_verified_serials == irr_bulk.index_serials(str(tmp_path))
+
+    # the pool vouched for this one, not the index, so there is nothing to record
+    live.refresh_from_db()
+    assert live.irr_as_set_status == STATUS_OK
+    assert live.irr_as_set_verified_value == ""
+
+
+def test_unchanged_ok_verdict_is_not_rechecked(org, tmp_path):
+    """
+    The same value against the same dump serials cannot verify differently, so a
+    second run passes it over -- until the value, the dumps or --full say otherwise.
+    It still stands verified as of that run, so the stamp moves all the same.
+    """
+    net = make_net(org, 1, "RIPE::AS-FOO")
+    write_irr_dump_set(tmp_path, SAMPLE_DUMP)
+
+    def verified():
+        net.refresh_from_db()
+        return net.irr_as_set_verified
+
+    run(commit=True, dump_dir=str(tmp_path))
+    first = verified()
+
+    with mock.patch(
+        "peeringdb_server.management.commands.pdb_irr_as_set_status.verify_network"
+    ) as verify_network:
+        output = run(commit=True, dump_dir=str(tmp_path))
+    verify_network.assert_not_called()
+    assert "verified present:          1" in output
+    assert "unchanged since verified:  1" in output
+    assert verified() > first
+
+    # a dry run stamps nothing
+    second = verified()
+    run(dump_dir=str(tmp_path))
+    assert verified() == second
+
+    run(commit=True, dump_dir=str(tmp_path), full=True)
+    assert verified() > second
+
+    # a new dump generation moves the serials
+    second = verified()
+    write_irr_dump_set(tmp_path, SAMPLE_DUMP + "\nas-set:  AS-NEW\nsource:  RIPE\n")
+    output = run(commit=True, dump_dir=str(tmp_path))
+    assert "unchanged since verified" not in output
+    assert verified() > second
+
+    sources_for = mock.Mock(return_value=LookupResult(frozenset({"RIPE"}), True))
+    Network.objects.filter(pk=net.pk).update(irr_as_set="RIPE::AS-MISS")
+    with mock.patch(
+        "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for",
+        sources_for,
+    ):
+        run(commit=True, dump_dir=str(tmp_path))
+    sources_for.assert_called_once_with("AS-MISS")
+
+
+def test_unchanged_stamp_skips_a_row_edited_since_the_sweep(org, tmp_path):
+    """
+    A row passed over as unchanged is stamped only if it still holds the value
+    that was verified.
+    """
+    net = make_net(org, 1, "RIPE::AS-FOO")
+    write_irr_dump_set(tmp_path, SAMPLE_DUMP)
+    run(commit=True, dump_dir=str(tmp_path))
+    net.refresh_from_db()
+    first = net.irr_as_set_verified
+
+    Network.objects.filter(pk=net.pk).update(irr_as_set="RIPE::AS-EDITED")
+    Command()._apply_state(
+        {}, serials=net.irr_as_set_verified_serials, unchanged_ids=[net.id]
+    )
+
+    net.refresh_from_db()
+    assert net.irr_as_set_verified == first
+
+
+def test_flagged_verdicts_are_always_rechecked(org, tmp_path):
+    """Only `ok` is passed over; a gone value is re-checked for recovery."""
+    net = make_net(org, 1, "RIPE::AS-DEAD")
+    write_irr_dump_set(tmp_path, SAMPLE_DUMP)
+    Network.objects.filter(pk=net.pk).update(
+        irr_as_set_status=STATUS_GONE,
+        irr_as_set_verified_value="RIPE::AS-DEAD",
+        irr_as_set_verified_serials=irr_bulk.index_serials(str(tmp_path)),
+    )
+
+    sources_for = mock.Mock(return_value=LookupResult(frozenset({"RIPE"}), True))
+    with mock.patch(
+        "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for",
+        sources_for,
+    ):
+        run(commit=True, dump_dir=str(tmp_path))
+
+    assert sources_for.call_count == 1
+    net.refresh_from_db()
+    assert net.irr_as_set_status == STATUS_OK
+
+
+def small_chunks(networks):
+    return _network_chunks(networks, size=2)
+
+
+def test_interrupted_commit_keeps_its_chunks_and_resumes(org, tmp_path):
+    """
+    Each chunk commits on its own and moves the ASN cursor, so a run that dies
+    part-way keeps its work and the next run starts where it stopped.
+    """
+    nets = [make_net(org, asn, f"RIPE::AS-MISS{asn}") for asn in range(1, 6)]
+    write_irr_dump_set(tmp_path, SAMPLE_DUMP)
+
+    def _outage_at_5(name):
+        if name == "AS-MISS5":
+            raise RuntimeError("killed")
+        return LookupResult(frozenset({"RIPE"}), True)
+
+    with (
+        mock.patch(
+            "peeringdb_server.management.commands.pdb_irr_as_set_status._network_chunks",
+            small_chunks,
+        ),
+        mock.patch(
+            "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for",
+            side_effect=_outage_at_5,
+        ),
+        pytest.raises(RuntimeError),
+    ):
+        run(commit=True, dump_dir=str(tmp_path))
+
+    assert cache.get(CURSOR_CACHE_KEY) == 4
+    statuses = [Network.objects.get(pk=net.pk).irr_as_set_status for net in nets]
+    assert statuses == [STATUS_OK] * 4 + [STATUS_UNKNOWN]
+
+    sources_for = mock.Mock(return_value=LookupResult(frozenset({"RIPE"}), True))
+    with (
+        mock.patch(
+            "peeringdb_server.management.commands.pdb_irr_as_set_status._network_chunks",
+            small_chunks,
+        ),
+        mock.patch(
+            "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for",
+            sources_for,
+        ),
+    ):
+        output = run(commit=True, dump_dir=str(tmp_path))
+
+    sources_for.assert_called_once_with("AS-MISS5")
+    assert "resumed after AS4" in output
+    assert "Networks with a value:       1" in output
+    assert Network.objects.get(pk=nets[-1].pk).irr_as_set_status == STATUS_OK
+    # the sweep finished, so the next one starts from the beginning
+    assert cache.get(CURSOR_CACHE_KEY) is None
+
+
+def test_restart_and_dry_run_ignore_the_cursor(org, tmp_path):
+    for asn in range(1, 4):
+        make_net(org, asn, "RIPE::AS-FOO")
+    write_irr_dump_set(tmp_path, SAMPLE_DUMP)
+
+    cache.set(CURSOR_CACHE_KEY, 2, timeout=None)
+    output = run(dump_dir=str(tmp_path))
+    assert "Networks with a value:       3" in output
+    assert cache.get(CURSOR_CACHE_KEY) == 2
+
+    output = run(commit=True, dump_dir=str(tmp_path), restart=True)
+    assert "Networks with a value:       3" in output
+    assert "resumed after" not in output
+    assert cache.get(CURSOR_CACHE_KEY) is None
+
+
+@override_settings(MAIL_DEBUG=False)
+def test_notification_cap_spans_chunks(org, tmp_path):
+    for asn in range(1, 6):
+        make_net_with_contact(org, asn, "RIPE::AS-DEAD")
+    write_irr_dump_set(tmp_path, SAMPLE_DUMP)
+
+    with (
+        mock.patch(
+            "peeringdb_server.management.commands.pdb_irr_as_set_status._network_chunks",
+            small_chunks,
+        ),
+        mock.patch(
+            "peeringdb_server.management.commands.pdb_irr_as_set_status.irr.sources_for",
+            return_value=LookupResult(frozenset(), True),
+        ),
+    ):
+        output = run(commit=True, dump_dir=str(tmp_path), max_notifications=3)
+
+    assert "Notified (--commit):         3 of 5" in output
+    notified = Network.objects.filter(irr_as_set_verify_notified__isnull=False)
+    assert sorted(notified.values_list("asn", flat=True)) == [1, 2, 3]
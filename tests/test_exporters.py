@@ -11,13 +11,18 @@ from unittest.mock import patch
 
 import pytest
 import reversion
+from django.core.cache import cache
 from django.core.management import call_command
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 
+from peeringdb_server.export_views import export_ixf_ix_members
 from peeringdb_server.models import (
     Facility,
     InternetExchange,
     Network,
+    NetworkContact,
     NetworkFacility,
     NetworkIXLan,
     Organization,
@@ -752,3 +757,113 @@ class AdvancedSearchExportTest(ClientCase):
 
         # Exchange 3 has no match - excluded by hide_unmatched=1
         self.assertNotIn("Exchange 3", csv_content)
+
+
+@pytest.mark.django_db
+def test_export_ixf_ix_members():
+    """
+    IX-F export member lists are built from a fixed number of queries,
+    cached per ixlan and dropped when the data they are built from changes
+    """
+    cache.clear()
+
+    org = Organization.objects.create(name="IX-F Export Org", status="ok")
+    ix = InternetExchange.objects.create(name="IX-F Export IX", org=org, status="ok")
+    ixlan = ix.ixlan
+    nets = []
+    for i in range(1, 4):
+        net = Network.objects.create(
+            name=f"IX-F Export Net {i}",
+            asn=64500 + i,
+            org=org,
+            status="ok",
+            irr_as_set=f"AS-EXPORT{i}",
+        )
+        NetworkContact.objects.create(
+            network=net,
+            role="Policy",
+            email=f"public{i}@localhost",
+            visible="Public",
+            status="ok",
+        )
+        NetworkContact.objects.create(
+            network=net,
+            role="NOC",
+            email=f"private{i}@localhost",
+            visible="Private",
+            status="ok",
+        )
+        NetworkIXLan.objects.create(
+            network=net,
+            ixlan=ixlan,
+            asn=net.asn,
+            speed=1000,
+            ipaddr4=f"195.69.147.{i}",
+            ipaddr6=f"2001:7f8:1::a506:450{i}:1",
+            status="ok",
+        )
+        nets.append(net)
+
+    # second connection of the first network
+    NetworkIXLan.objects.create(
+        network=nets[0],
+        ixlan=ixlan,
+        asn=nets[0].asn,
+        speed=10000,
+        ipaddr4="195.69.147.100",
+        status="ok",
+    )
+
+    cache.clear()
+
+    with CaptureQueriesContext(connection) as ctx:
+        data = json.loads(export_ixf_ix_members([ixlan]))
+
+    queries = [q for q in ctx.captured_queries if "peeringdb_" in q["sql"]]
+    assert len(queries) == 2
+
+    assert data["ixp_list"] == [{"ixp_id": ix.id, "shortname": ix.name}]
+    assert [member["asnum"] for member in data["member_list"]] == [
+        64501,
+        64502,
+        64503,
+    ]
+    member = data["member_list"][0]
+    assert member["contact_email"] == ["public1@localhost"]
+    assert len(member["connection_list"]) == 2
+    assert member["connection_list"][0]["vlan_list"][0]["ipv4"] == {
+        "address": "195.69.147.1",
+        "routeserver": False,
+        "max_prefix": None,
+        "as_macro": "AS-EXPORT1",
+    }
+    assert "ipv6" not in member["connection_list"][1]["vlan_list"][0]
+
+    # served from cache
+    with CaptureQueriesContext(connection) as ctx:
+        assert (
+            json.loads(export_ixf_ix_members([ixlan]))["member_list"]
+            == (data["member_list"])
+        )
+    assert not [q for q in ctx.captured_queries if "peeringdb_" in q["sql"]]
+
+    # changes to networks, contacts and netixlans drop the cached list
+    nets[1].name = "Renamed Net"
+    nets[1].save()
+    data = json.loads(export_ixf_ix_members([ixlan]))
+    assert data["member_list"][1]["name"] == "Renamed Net"
+
+    poc = nets[2].poc_set.get(visible="Private")
+    poc.visible = "Public"
+    poc.save()
+    data = json.loads(export_ixf_ix_members([ixlan]))
+    assert data["member_list"][2]["contact_email"] == [
+        "public3@localhost",
+        "private3@localhost",
+    ]
+
+    netixlan = nets[2].netixlan_set.first()
+    netixlan.status = "deleted"
+    netixlan.save()
+    data = json.loads(export_ixf_ix_members([ixlan]))
+    assert [member["asnum"] for member in data["member_list"]] == [64501, 64502]
@@ -1,9 +1,21 @@
 import ipaddress
+import threading
+import time
+from unittest import mock
 
 import pytest
 import pytest_filedata
+import rdap
+from django.core.cache import caches
+from rdap.exceptions import RdapHTTPError
 
-from peeringdb_server.inet import RdapNotFoundError, renumber_ipaddress
+from peeringdb_server import inet
+from peeringdb_server.inet import (
+    CachedRdapAsn,
+    RdapLookup,
+    RdapNotFoundError,
+    renumber_ipaddress,
+)
 
 
 @pytest.mark.django_db
@@ -132,3 +144,129 @@ def test_ipaddress6_compression(input_str, compressed):
     """
     ipv6 = ipaddress.ip_address(input_str)
     assert str(ipv6) == compressed
+
+
+RDAP_ASN_DATA = {
+    "handle": "AS63311",
+    "name": "20C",
+    "port43": "whois.arin.net",
+    "entities": [
+        {
+            "roles": ["registrant"],
+            "vcardArray": [
+                "vcard",
+                [
+                    ["version", {}, "text", "4.0"],
+                    ["fn", {}, "text", "20C, LLC"],
+                    ["kind", {}, "text", "org"],
+                    ["email", {}, "text", "neteng@20c.com"],
+                ],
+            ],
+        }
+    ],
+}
+
+
+@pytest.fixture
+def rdap_client_get_asn():
+    calls = []
+
+    def get_asn(client, asn):
+        calls.append(asn)
+        time.sleep(0.1)
+        if asn == 9999999:
+            raise RdapNotFoundError("not found")
+        if asn == 8888888:
+            raise RdapHTTPError("rate limited")
+        return rdap.RdapAsn(RDAP_ASN_DATA, client)
+
+    with mock.patch.object(rdap.RdapClient, "get_asn", autospec=True) as patched:
+        patched.side_effect = get_asn
+        yield calls
+
+
+@pytest.mark.django_db
+def test_rdap_asn_lookup_is_cached(rdap_client_get_asn):
+    asn = RdapLookup().get_asn(63311)
+    assert asn.emails == ["neteng@20c.com"]
+
+    cached = RdapLookup().get_asn(63311)
+    assert isinstance(cached, CachedRdapAsn)
+    assert cached.emails == ["neteng@20c.com"]
+    assert cached.org_name == "20C, LLC"
+    assert cached.name == "20C"
+    assert cached.get_rir() == "arin"
+    assert rdap_client_get_asn == [63311]
+
+
+@pytest.mark.django_db
+def test_rdap_asn_not_found_is_cached(rdap_client_get_asn):
+    for _ in range(2):
+        with pytest.raises(RdapNotFoundError):
+            RdapLookup().get_asn(9999999)
+    assert rdap_client_get_asn == [9999999]
+
+    # errors that may go away are asked again
+    for _ in range(2):
+        with pytest.raises(RdapHTTPError):
+            RdapLookup().get_asn(8888888)
+    assert rdap_client_get_asn == [9999999, 8888888, 8888888]
+
+
+@pytest.mark.django_db
+def test_rdap_asn_concurrent_lookups_coalesce(rdap_client_get_asn):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(RdapLookup().get_asn(63311)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [asn.emails for asn in results] == [["neteng@20c.com"]] * 4
+    assert rdap_client_get_asn == [63311]
+
+
+@pytest.mark.django_db
+def test_rdap_asn_waits_for_lookup_elsewhere(rdap_client_get_asn):
+    # another worker holds the lookup marker and answers shortly
+    cache = caches["negative"]
+    cache.set("rdap:asn:63311:lookup", True)
+    threading.Timer(
+        0.2,
+        cache.set,
+        args=(
+            "rdap:asn:63311",
+            {
+                "data": RDAP_ASN_DATA,
+                "parsed": {"name": "20C", "emails": ["noc@example.com"]},
+                "rir": "arin",
+            },
+        ),
+    ).start()
+
+    assert RdapLookup().get_asn(63311).emails == ["noc@example.com"]
+    assert rdap_client_get_asn == []
+
+
+@pytest.mark.django_db
+def test_rdap_asn_keeps_marker_of_lookup_elsewhere(rdap_client_get_asn, settings):
+    # another worker holds the lookup marker and never answers in time
+    settings.RDAP_CACHE_LOOKUP_WAIT = 0.3
+    cache = caches["negative"]
+    cache.set("rdap:asn:63311:lookup", True)
+
+    assert RdapLookup().get_asn(63311).emails == ["neteng@20c.com"]
+    assert rdap_client_get_asn == [63311]
+    # the marker is left to the lookup that set it
+    assert cache.get("rdap:asn:63311:lookup")
+
+
+@pytest.mark.django_db
+def test_rdap_asn_locks_are_dropped(rdap_client_get_asn):
+    RdapLookup().get_asn(63311)
+    with pytest.raises(RdapNotFoundError):
+        RdapLookup().get_asn(9999999)
+    assert inet._asn_locks == {}
@@ -55,6 +55,13 @@ class FakeCache:
     def set(self, key, value, timeout=None):
         self.store[key] = value
 
+    def get_many(self, keys):
+        return {key: self.store[key] for key in keys if key in self.store}
+
+    def set_many(self, data, timeout=None):
+        self.store.update(data)
+        self.timeout = timeout
+
 
 def make_send(present, mirror=MIRROR, fail_hosts=()):
     """
@@ -95,6 +102,41 @@ def make_send(present, mirror=MIRROR, fail_hosts=()):
     return _send
 
 
+class FakeIRRdSocket:
+    """
+    A port-43 connection in `!!` mode answering from a make_send side_effect,
+    every response closed by two empty lines and handed out a few bytes per
+    recv so responses straddle reads.
+    """
+
+    connections = []
+
+    def __init__(self, address, send):
+        self.server = {"host": address[0], "port": address[1]}
+        self.send = send
+        self.output = b""
+        self.queries = []
+        self.connections.append(self)
+
+    def settimeout(self, timeout):
+        pass
+
+    def sendall(self, data):
+        for query in data.decode("ascii").splitlines():
+            if query == "!!":
+                continue
+            self.queries.append(query)
+            text = self.send(self.server, query)
+            self.output += (text.rstrip("\n") + "\n\n\n").encode("utf-8")
+
+    def recv(self, size):
+        chunk, self.output = self.output[:7], self.output[7:]
+        return chunk
+
+    def close(self):
+        pass
+
+
 class TestIrrLookup:
     @pytest.fixture(autouse=True)
     def _settings(self, settings):
@@ -361,6 +403,151 @@ class TestIrrLookup:
             result = irr.sources_for("AS-FOO;rm -rf")
         assert result.ok is False
 
+    # --- sources_for_many ----------------------------------------------------
+
+    def _pipelined(self, send, cache=None):
+        FakeIRRdSocket.connections = []
+        return (
+            patch("peeringdb_server.irr._send", side_effect=send),
+            patch("peeringdb_server.irr._cache", return_value=cache or FakeCache()),
+            patch(
+                "peeringdb_server.irr.socket.create_connection",
+                side_effect=lambda address, timeout: FakeIRRdSocket(address, send),
+            ),
+        )
+
+    def test_sources_for_many_pipelines_one_connection_per_mirror(self, settings):
+        settings.IRR_LOOKUP_PIPELINE_DEPTH = 2
+        send = make_send({("ARIN", "AS-FOO"), ("RIPE", "AS-FOO"), ("REACH", "AS-BAR")})
+        cache = FakeCache()
+        p_send, p_cache, p_connect = self._pipelined(send, cache)
+        with p_send, p_cache, p_connect:
+            results = irr.sources_for_many(["as-foo", "AS-BAR", "AS-NONE", "AS15562"])
+
+        assert results == {
+            "AS-FOO": irr.LookupResult(frozenset({"ARIN", "RIPE"}), True),
+            "AS-BAR": irr.LookupResult(frozenset({"REACH"}), True),
+            "AS-NONE": irr.LookupResult(frozenset(), True),
+            "AS15562": irr.LookupResult(frozenset(), True),
+        }
+        assert sorted(c.server["host"] for c in FakeIRRdSocket.connections) == [
+            "ntt",
+            "radb",
+        ]
+        assert all(len(c.queries) == 4 for c in FakeIRRdSocket.connections)
+        assert "-T aut-num AS15562" in FakeIRRdSocket.connections[0].queries[-1]
+
+        # complete results are cached under the same keys sources_for reads
+        with p_send, p_cache:
+            assert irr.sources_for("AS-BAR") == results["AS-BAR"]
+        with p_send, p_cache, p_connect:
+            FakeIRRdSocket.connections = []
+            assert irr.sources_for_many(["AS-FOO"]) == {"AS-FOO": results["AS-FOO"]}
+            assert FakeIRRdSocket.connections == []
+
+    def test_sources_for_many_large_response_falls_back_to_pinned_checks(self):
+        base_send = make_send({("ARIN", "AS-LARGE"), ("RIPE", "AS-SMALL")})
+
+        def send(server, payload):
+            if "AS-LARGE" in payload and "," in payload.split()[1]:
+                return "as-set: AS-LARGE\n" + "members: AS1\n" * 2000
+            return base_send(server, payload)
+
+        p_send, p_cache, p_connect = self._pipelined(send)
+        with p_send as m_send, p_cache, p_connect:
+            results = irr.sources_for_many(["AS-LARGE", "AS-SMALL"])
+
+        assert results["AS-LARGE"] == irr.LookupResult(frozenset({"ARIN"}), True)
+        assert results["AS-SMALL"] == irr.LookupResult(frozenset({"RIPE"}), True)
+        assert any(c.args[1].startswith("-s ARIN") for c in m_send.call_args_list)
+
+    def test_sources_for_many_failed_mirror_is_not_ok(self):
+        base_send = make_send({("RIPE", "AS-FOO")})
+
+        def send(server, payload):
+            if server["host"] == "radb" and payload != "!s-lc":
+                raise TimeoutError("mocked timeout")
+            return base_send(server, payload)
+
+        p_send, p_cache, p_connect = self._pipelined(send)
+        with p_send as m_send, p_cache, p_connect:
+            results = irr.sources_for_many(["AS-FOO", "AS-BAR"])
+
+        assert results["AS-FOO"] == irr.LookupResult(frozenset({"RIPE"}), False)
+        assert results["AS-BAR"] == irr.LookupResult(frozenset(), False)
+        # a mirror that failed is not asked again once per name
+        assert [c.args[1] for c in m_send.call_args_list] == ["!s-lc", "!s-lc"]
+
+    def test_sources_for_many_unsafe_name_not_ok(self):
+        p_send, p_cache, p_connect = self._pipelined(make_send(set()))
+        with p_send, p_cache, p_connect:
+            results = irr.sources_for_many(["AS-FOO;rm -rf"])
+        assert results == {"AS-FOO;RM -RF": irr.LookupResult(frozenset(), False)}
+        assert FakeIRRdSocket.connections == []
+
+    # --- exists_in_many / warm_exists_cache ----------------------------------
+
+    def test_exists_in_many_reads_the_cache_in_one_round_trip(self):
+        cache = FakeCache()
+        cache.set("irr:exists:RIPE:as-set:AS-FOO", True)
+        # a complete sources_for result answers the existence question too
+        cache.set("irr:sources:as-set:AS-BAR", ["RADB"])
+        send = make_send({("ARIN", "AS-BAZ")})
+        with (
+            patch("peeringdb_server.irr._send", side_effect=send) as m_send,
+            patch("peeringdb_server.irr._cache", return_value=cache),
+            patch.object(cache, "get_many", wraps=cache.get_many) as m_get_many,
+        ):
+            result = irr.exists_in_many(
+                [
+                    ("RIPE", "AS-FOO"),
+                    ("ripe", "as-bar"),
+                    ("RADB", "AS-BAR"),
+                    ("ARIN", "AS-BAZ"),
+                    ("NOTAREGISTRY", "AS-FOO"),
+                ]
+            )
+
+        assert result == {
+            ("RIPE", "AS-FOO"): True,
+            ("RIPE", "AS-BAR"): False,
+            ("RADB", "AS-BAR"): True,
+            ("ARIN", "AS-BAZ"): True,
+            ("NOTAREGISTRY", "AS-FOO"): None,
+        }
+        m_get_many.assert_called_once()
+        # only the uncached pair went to the pool
+        pinned = [c.args[1] for c in m_send.call_args_list if c.args[1] != "!s-lc"]
+        assert pinned == ["-s ARIN -T as-set AS-BAZ"]
+
+    def test_warm_exists_cache_writes_only_what_the_index_holds(self, settings):
+        index = {"AS-FOO": frozenset({"RIPE"}), "AS-BAR": frozenset({"RADB"})}
+        cache = FakeCache()
+        with patch("peeringdb_server.irr._cache", return_value=cache):
+            warmed = irr.warm_exists_cache(
+                [
+                    ("RIPE", "AS-FOO"),
+                    ("RIPE", "AS-BAR"),  # held elsewhere: left to the pool
+                    ("ARIN", "AS-GONE"),  # not in the index: never cached absent
+                    ("RADB", "AS-BAR"),
+                ],
+                index,
+                sources=["RIPE", "ARIN"],
+            )
+
+        assert warmed == 1
+        assert cache.store == {"irr:exists:RIPE:as-set:AS-FOO": True}
+        # no longer than a live answer
+        assert cache.timeout == settings.IRR_LOOKUP_CACHE_TTL
+
+        send = make_send(set())
+        with (
+            patch("peeringdb_server.irr._send", side_effect=send) as m_send,
+            patch("peeringdb_server.irr._cache", return_value=cache),
+        ):
+            assert irr.exists_in("RIPE", "AS-FOO") is True
+        m_send.assert_not_called()
+
     # --- coverage_report -----------------------------------------------------
 
     def test_coverage_report(self):
@@ -1,15 +1,21 @@
 """Tests for the #1973 IRR bulk dump fetch/cache lifecycle."""
 
 import gzip
+import os
+import threading
+import time
 from io import BytesIO, StringIO
 from unittest import mock
 
 import pytest
+from django.core.cache import caches
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.test import override_settings
 
 from peeringdb_server import irr_bulk
+from peeringdb_server.models import Network, Organization
+from tests.util import write_irr_dump_set
 
 pytestmark = pytest.mark.django_db
 
@@ -370,6 +376,60 @@ def test_fetch_command_exits_nonzero_when_a_source_failed(fetch_dumps, tmp_path)
     assert "[failed] BELL" in output.getvalue()
 
 
+@mock.patch("peeringdb_server.irr_bulk.fetch_dumps")
+def test_fetch_command_warms_the_lookup_cache(fetch_dumps, tmp_path):
+    org = Organization.objects.create(name="Org", status="ok")
+    for asn, irr_as_set in (
+        (1, "RIPE::AS-FOO"),
+        (2, "RIPE::AS-MISSING AS-BARE"),
+        (3, "RADB::AS-BAR"),
+    ):
+        Network.objects.create(
+            name=f"Network {asn}", asn=asn, irr_as_set=irr_as_set, org=org, status="ok"
+        )
+    write_irr_dump_set(
+        tmp_path, "as-set: AS-FOO\nsource: RIPE\n\nas-set: AS-BAR\nsource: RADB\n"
+    )
+    fetch_dumps.return_value = [
+        irr_bulk.FetchOutcome("RIPE", "fresh", (), "serial unchanged"),
+        irr_bulk.FetchOutcome("RADB", "stale", (), "refresh failed"),
+    ]
+    output = StringIO()
+
+    with pytest.raises(CommandError):
+        call_command(
+            "pdb_irr_as_set_fetch",
+            "--commit",
+            "--dump-dir",
+            str(tmp_path),
+            stdout=output,
+        )
+
+    assert "warmed 1 IRR existence answer(s)" in output.getvalue()
+    negative = caches["negative"]
+    assert negative.get("irr:exists:RIPE:as-set:AS-FOO") is True
+    # absent from the index is never cached, and a stale source is not warmed
+    assert negative.get("irr:exists:RIPE:as-set:AS-MISSING") is None
+    assert negative.get("irr:exists:RADB:as-set:AS-BAR") is None
+
+    # a source this run did not refresh is not warmed either
+    negative.clear()
+    fetch_dumps.return_value = [
+        irr_bulk.FetchOutcome("RADB", "updated", (), "downloaded"),
+    ]
+    call_command(
+        "pdb_irr_as_set_fetch",
+        "--commit",
+        "--source",
+        "RADB",
+        "--dump-dir",
+        str(tmp_path),
+        stdout=output,
+    )
+    assert negative.get("irr:exists:RADB:as-set:AS-BAR") is True
+    assert negative.get("irr:exists:RIPE:as-set:AS-FOO") is None
+
+
 def test_fetch_stages_downloads_outside_the_dump_dir(
     tmp_path, monkeypatch, dump_source
 ):
@@ -416,6 +476,151 @@ def test_fetch_clears_staging_leftovers(tmp_path, monkeypatch, dump_source):
     assert not orphan.exists()
 
 
+class FakeResponse(BytesIO):
+    """An HTTP response: status, headers, and optionally a connection that drops."""
+
+    def __init__(self, body, status=200, headers=None, drop_after=None):
+        super().__init__(body)
+        self.status = status
+        self.headers = headers or {}
+        self.drop_after = drop_after
+
+    def read(self, size=-1):
+        if self.drop_after is not None:
+            if self.tell() >= self.drop_after:
+                raise ConnectionResetError("connection dropped")
+            size = self.drop_after - self.tell()
+        return super().read(size)
+
+
+def install_http(monkeypatch, serial_url, respond):
+    requests = []
+
+    def open_url(url, headers=None):
+        if url == serial_url:
+            return BytesIO(b"42\n")
+        requests.append(headers or {})
+        return respond(headers or {})
+
+    monkeypatch.setattr(irr_bulk, "_open_url", open_url)
+    return requests
+
+
+def test_fetch_resumes_an_interrupted_download(tmp_path, monkeypatch, dump_source):
+    body = gzip_bytes(SAMPLE_RPSL * 50)
+    half = len(body) // 2
+    headers = {"ETag": '"v1"', "Content-Length": str(len(body))}
+
+    requests = install_http(
+        monkeypatch,
+        dump_source["serial_url"],
+        lambda _headers: FakeResponse(body, headers=headers, drop_after=half),
+    )
+    outcomes = irr_bulk.fetch_dumps(str(tmp_path))
+
+    # the prefix and what it is resumed against stay staged
+    assert outcomes[0].status == "failed"
+    staged = tmp_path / ".staging" / "ripe.db.gz"
+    assert staged.read_bytes() == body[:half]
+    assert requests == [{}]
+
+    def resume(request_headers):
+        offset = int(request_headers["Range"].split("=")[1].rstrip("-"))
+        return FakeResponse(
+            body[offset:],
+            status=206,
+            headers={"Content-Range": f"bytes {offset}-{len(body) - 1}/{len(body)}"},
+        )
+
+    requests = install_http(monkeypatch, dump_source["serial_url"], resume)
+    outcomes = irr_bulk.fetch_dumps(str(tmp_path))
+
+    assert outcomes[0].status == "updated"
+    assert requests == [{"Range": f"bytes={half}-", "If-Range": '"v1"'}]
+    with gzip.open(tmp_path / "ripe.db.gz", "rb") as handle:
+        assert handle.read() == SAMPLE_RPSL * 50
+    assert not list((tmp_path / ".staging").iterdir())
+
+
+def test_fetch_restarts_when_the_server_sends_the_whole_file(
+    tmp_path, monkeypatch, dump_source
+):
+    # If-Range did not match (the dump was republished) or ranges are unsupported
+    body = gzip_bytes()
+    staging = tmp_path / ".staging"
+    staging.mkdir()
+    (staging / "ripe.db.gz").write_bytes(b"\x1f\x8b stale prefix")
+    (staging / "ripe.db.gz.validator").write_text('"v0"\n')
+
+    install_http(
+        monkeypatch,
+        dump_source["serial_url"],
+        lambda _headers: FakeResponse(body, headers={"ETag": '"v1"'}),
+    )
+    outcomes = irr_bulk.fetch_dumps(str(tmp_path))
+
+    assert outcomes[0].status == "updated"
+    with gzip.open(tmp_path / "ripe.db.gz", "rb") as handle:
+        assert handle.read() == SAMPLE_RPSL
+
+
+def test_fetch_rejects_a_download_shorter_than_announced(
+    tmp_path, monkeypatch, dump_source
+):
+    body = gzip_bytes()
+    install_http(
+        monkeypatch,
+        dump_source["serial_url"],
+        lambda _headers: FakeResponse(
+            body, headers={"Content-Length": str(len(body) + 10)}
+        ),
+    )
+
+    outcomes = irr_bulk.fetch_dumps(str(tmp_path))
+
+    assert outcomes[0].status == "failed"
+    assert f"ended after {len(body)} of {len(body) + 10} bytes" in outcomes[0].reason
+    assert not (tmp_path / "ripe.db.gz").exists()
+
+
+@override_settings(IRR_BULK_FETCH_WORKERS=2)
+def test_fetch_downloads_sources_concurrently(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        irr_bulk,
+        "DUMP_SOURCES",
+        tuple(
+            {"name": name, "files": ((f"{name.lower()}.db.gz", f"https://x/{name}"),)}
+            for name in ("RIPE", "ARIN")
+        ),
+    )
+    # each download waits for the other to start, which a serial fetch never does
+    barrier = threading.Barrier(2, timeout=5)
+
+    def open_url(url, headers=None):
+        barrier.wait()
+        return BytesIO(gzip_bytes())
+
+    monkeypatch.setattr(irr_bulk, "_open_url", open_url)
+
+    outcomes = irr_bulk.fetch_dumps(str(tmp_path))
+
+    assert [(o.source, o.status) for o in outcomes] == [
+        ("RIPE", "updated"),
+        ("ARIN", "updated"),
+    ]
+
+
+def test_fetch_refuses_to_overlap_another_fetch(tmp_path, monkeypatch, dump_source):
+    open_url = mock.Mock()
+    monkeypatch.setattr(irr_bulk, "_open_url", open_url)
+
+    with irr_bulk._fetch_lock(str(tmp_path)):
+        with pytest.raises(irr_bulk.BulkFetchError, match="another IRR dump fetch"):
+            irr_bulk.fetch_dumps(str(tmp_path))
+
+    open_url.assert_not_called()
+
+
 def test_fetch_falls_back_to_age_when_serial_endpoint_fails(
     tmp_path, monkeypatch, dump_source
 ):
@@ -677,3 +882,183 @@ def test_fetch_command_without_commit_does_not_fail_on_would_download(
     ]
 
     call_command("pdb_irr_as_set_fetch", stdout=StringIO())
+
+
+def test_load_index_reuses_persistent_index_until_dumps_change(tmp_path, monkeypatch):
+    write_dump(tmp_path / "ripe.db.gz")
+    (tmp_path / ".ripe.serial").write_text("42\n")
+
+    index = irr_bulk.load_index(str(tmp_path))
+    assert index["AS-EXAMPLE"] == {"RIPE"}
+    assert (tmp_path / ".index.sqlite3").is_file()
+
+    build_index = mock.Mock(side_effect=irr_bulk.build_index)
+    monkeypatch.setattr(irr_bulk, "build_index", build_index)
+
+    index = irr_bulk.load_index(str(tmp_path))
+    assert isinstance(index, irr_bulk.PersistentIndex)
+    assert irr_bulk.sources_for_bulk("as-example", index) == frozenset({"RIPE"})
+    assert irr_bulk.sources_for_bulk("AS-MISSING", index) == frozenset()
+    assert len(index) == 1
+    build_index.assert_not_called()
+
+    # a moved serial marker invalidates the index
+    (tmp_path / ".ripe.serial").write_text("43\n")
+    index = irr_bulk.load_index(str(tmp_path))
+    assert build_index.call_count == 1
+
+    # and so does a replaced dump
+    write_dump(tmp_path / "ripe.db.gz", b"as-set: AS-OTHER\nsource: RIPE\n\n")
+    index = irr_bulk.load_index(str(tmp_path))
+    assert build_index.call_count == 2
+    assert irr_bulk.sources_for_bulk("AS-OTHER", index) == frozenset({"RIPE"})
+    assert irr_bulk.sources_for_bulk("AS-EXAMPLE", index) == frozenset()
+
+    index = irr_bulk.load_index(str(tmp_path))
+    assert isinstance(index, irr_bulk.PersistentIndex)
+    assert build_index.call_count == 2
+
+
+def test_fetch_builds_persistent_index(tmp_path, monkeypatch, dump_source):
+    install_responses(
+        monkeypatch,
+        {
+            dump_source["serial_url"]: b"42\n",
+            dump_source["files"][0][1]: gzip_bytes(),
+        },
+    )
+
+    irr_bulk.fetch_dumps(str(tmp_path))
+
+    monkeypatch.setattr(irr_bulk, "build_index", mock.Mock(side_effect=AssertionError))
+    index = irr_bulk.load_index(str(tmp_path))
+    assert isinstance(index, irr_bulk.PersistentIndex)
+    assert index["AS-EXAMPLE"] == {"RIPE"}
+
+
+RIPE_JOURNAL = """%START Version: 3 RIPE 43-45
+
+ADD 43
+
+as-set: AS-NEW
+source: RIPE
+
+DEL 44
+
+as-set: AS-EXAMPLE
+source: RIPE
+
+ADD 45
+
+route: 192.0.2.0/24
+origin: AS64500
+source: RIPE
+
+%END RIPE
+"""
+
+
+def test_parse_nrtm_versions_and_untracked_classes():
+    entries = list(irr_bulk.parse_nrtm(RIPE_JOURNAL.splitlines()))
+    assert entries == [
+        irr_bulk.JournalEntry(43, "ADD", "AS-NEW", "RIPE"),
+        irr_bulk.JournalEntry(44, "DEL", "AS-EXAMPLE", "RIPE"),
+        irr_bulk.JournalEntry(45, "ADD", None, None),
+    ]
+
+    # version 1 numbers its operations from the %START range
+    version_1 = "%START Version: 1 RIPE 7-8\n\nADD\n\naut-num: AS1\nsource: RIPE\n\nDEL\n\naut-num: AS2\nsource: RIPE\n\n%END RIPE\n"
+    assert [
+        (entry.serial, entry.key)
+        for entry in irr_bulk.parse_nrtm(version_1.splitlines())
+    ] == [(7, "AS1"), (8, "AS2")]
+
+
+def test_apply_deltas_carries_index_forward(tmp_path, monkeypatch, dump_source):
+    dump_dir = tmp_path / "irr"
+    delta_dir = tmp_path / "nrtm"
+    dump_dir.mkdir()
+    delta_dir.mkdir()
+    write_dump(dump_dir / "ripe.db.gz")
+    (dump_dir / ".ripe.serial").write_text("42\n")
+    irr_bulk.load_index(str(dump_dir))
+    fingerprint = irr_bulk.index_serials(str(dump_dir))
+
+    (delta_dir / "ripe.nrtm").write_text(RIPE_JOURNAL)
+    outcomes = irr_bulk.apply_deltas(str(dump_dir), str(delta_dir))
+
+    assert [(o.source, o.status, o.serial) for o in outcomes] == [
+        ("RIPE", "applied", 45)
+    ]
+    # the dumps did not change, so the updated index is opened, not rebuilt
+    monkeypatch.setattr(irr_bulk, "build_index", mock.Mock(side_effect=AssertionError))
+    index = irr_bulk.load_index(str(dump_dir))
+    assert index.serials() == {"RIPE": "45"}
+    assert irr_bulk.sources_for_bulk("AS-NEW", index) == frozenset({"RIPE"})
+    assert "AS-EXAMPLE" not in index
+    assert irr_bulk.index_serials(str(dump_dir)) != fingerprint
+
+    # a second pass finds nothing new
+    outcomes = irr_bulk.apply_deltas(str(dump_dir), str(delta_dir))
+    assert outcomes[0].status == "current"
+
+    # and a journal that skips serials stops at the gap
+    (delta_dir / "ripe.nrtm").write_text(
+        RIPE_JOURNAL
+        + "%START Version: 3 RIPE 47-47\n\nADD 47\n\nas-set: AS-LATE\nsource: RIPE\n\n%END RIPE\n"
+    )
+    outcomes = irr_bulk.apply_deltas(str(dump_dir), str(delta_dir))
+    assert [(o.status, o.serial) for o in outcomes] == [("gap", 45)]
+    assert "AS-LATE" not in irr_bulk.load_index(str(dump_dir))
+
+
+def test_fetch_keeps_dump_the_journal_covers(tmp_path, monkeypatch, dump_source):
+    dump_dir = tmp_path / "irr"
+    delta_dir = tmp_path / "nrtm"
+    dump_dir.mkdir()
+    delta_dir.mkdir()
+    write_dump(dump_dir / "ripe.db.gz")
+    two_hours_ago = time.time() - 7200
+    os.utime(dump_dir / "ripe.db.gz", (two_hours_ago, two_hours_ago))
+    (dump_dir / ".ripe.serial").write_text("42\n")
+    irr_bulk.load_index(str(dump_dir))
+    (delta_dir / "ripe.nrtm").write_text(RIPE_JOURNAL)
+    calls = install_responses(monkeypatch, {dump_source["serial_url"]: b"45\n"})
+
+    outcomes = irr_bulk.fetch_dumps(str(dump_dir), delta_dir=str(delta_dir))
+
+    assert outcomes[0].status == "fresh"
+    assert outcomes[0].reason == "index at serial 45 via journal"
+    assert calls == [dump_source["serial_url"]]
+    assert "AS-NEW" in irr_bulk.load_index(str(dump_dir))
+
+    # an old dump the journal keeps current is not reported stale
+    assert irr_bulk.dump_health(str(dump_dir), max_age_hours=1) == ([], [])
+
+
+def test_fetch_downloads_past_a_journal_gap(tmp_path, monkeypatch, dump_source):
+    dump_dir = tmp_path / "irr"
+    delta_dir = tmp_path / "nrtm"
+    dump_dir.mkdir()
+    delta_dir.mkdir()
+    write_dump(dump_dir / "ripe.db.gz")
+    (dump_dir / ".ripe.serial").write_text("42\n")
+    irr_bulk.load_index(str(dump_dir))
+    (delta_dir / "ripe.nrtm").write_text(RIPE_JOURNAL)
+    # the journal stops at 45, short of the published serial
+    install_responses(
+        monkeypatch,
+        {
+            dump_source["serial_url"]: b"50\n",
+            dump_source["files"][0][1]: gzip_bytes(
+                b"as-set: AS-EXAMPLE\nsource: RIPE\n\nas-set: AS-NEW\nsource: RIPE\n\n"
+            ),
+        },
+    )
+    outcomes = irr_bulk.fetch_dumps(str(dump_dir), delta_dir=str(delta_dir))
+
+    assert outcomes[0].status == "updated"
+    # rebuilt from the new dump, which the journal does not reach past
+    index = irr_bulk.load_index(str(dump_dir))
+    assert index.serials() == {"RIPE": "50"}
+    assert "AS-EXAMPLE" in index
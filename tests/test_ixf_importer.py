@@ -1,5 +1,9 @@
+import ipaddress
 import json
+import time
 from pprint import pprint
+from types import SimpleNamespace
+from unittest import mock
 
 import pytest
 
@@ -35,3 +39,174 @@ def test_match_vlans_across_connections(data_ixf_connections):
     )
     pprint(sanitized)
     assert sanitized == data_ixf_connections.expected["connection_list"]
+
+
+def member_data(asn, ipaddr4, ipaddr6, **kwargs):
+    """
+    Stand-in for an IXFMemberData entry, with the attributes the
+    importer bookkeeping reads
+    """
+    kwargs.setdefault("speed", 1000)
+    kwargs.setdefault("is_rs_peer", False)
+    kwargs.setdefault("modify_speed", False)
+    kwargs.setdefault("modify_is_rs_peer", False)
+    return SimpleNamespace(
+        asn=asn,
+        ipaddr4=ipaddr4,
+        ipaddr6=ipaddr6,
+        init_ipaddr4=ipaddr4,
+        init_ipaddr6=ipaddr6,
+        ixf_id=(asn, ipaddr4, ipaddr6),
+        set_requirement=mock.Mock(return_value=None),
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+def test_pending_save_by_ip():
+    """
+    test that pending saves are indexed per asn and address, the
+    earliest entry winning for a duplicate address
+    """
+    importer = ixf.Importer()
+    first = member_data(64500, "10.0.0.1", "2001:db8::1")
+    duplicate = member_data(64500, "10.0.0.1", "2001:db8::2")
+    other_ip = member_data(64500, "10.0.0.3", None)
+    other_asn = member_data(64501, "10.0.0.1", "2001:db8::1")
+    importer.pending_save = [first, duplicate, other_ip, other_asn]
+
+    by_ip = importer._build_pending_save_by_ip()
+
+    assert by_ip == {
+        (64500, 4, "10.0.0.1"): (0, first),
+        (64500, 6, "2001:db8::1"): (0, first),
+        (64500, 6, "2001:db8::2"): (1, duplicate),
+        (64500, 4, "10.0.0.3"): (2, other_ip),
+        (64501, 4, "10.0.0.1"): (3, other_asn),
+        (64501, 6, "2001:db8::1"): (3, other_asn),
+    }
+
+
+@pytest.mark.django_db
+def test_fix_consolidated_modify():
+    """
+    test that a deletion hands speed and rs peer state to the earliest
+    pending save of the same asn sharing one of its addresses
+    """
+    importer = ixf.Importer()
+    later = member_data(64500, "10.0.0.2", "2001:db8::1")
+    earlier = member_data(64500, "10.0.0.1", "2001:db8::2")
+    locked = member_data(64501, "10.0.0.1", None, modify_speed=True)
+    importer.pending_save = [earlier, later, locked]
+    importer.pending_save_by_ip = importer._build_pending_save_by_ip()
+
+    importer.fix_consolidated_modify(
+        member_data(64500, "10.0.0.1", "2001:db8::1", speed=10000, is_rs_peer=True)
+    )
+    assert (earlier.speed, earlier.is_rs_peer) == (10000, True)
+    assert (later.speed, later.is_rs_peer) == (1000, False)
+
+    # speed is kept when it is open to modification
+    importer.fix_consolidated_modify(
+        member_data(64501, "10.0.0.1", None, speed=10000, is_rs_peer=True)
+    )
+    assert (locked.speed, locked.is_rs_peer) == (1000, True)
+
+    # an address of another asn is not a match
+    importer.fix_consolidated_modify(member_data(64502, "10.0.0.2", None, speed=1))
+    assert later.speed == 1000
+
+
+@pytest.mark.django_db
+def test_deletions_by_ip():
+    """
+    test that deletions are looked up per asn and address when
+    consolidating them with additions
+    """
+    importer = ixf.Importer()
+    ip4_deletion = member_data(64500, "10.0.0.1", None)
+    ip6_deletion = member_data(64500, None, "2001:db8::1")
+    other_asn = member_data(64501, "10.0.0.2", "2001:db8::2")
+    for deletion in (ip4_deletion, ip6_deletion, other_asn):
+        importer.track_deletion(deletion)
+
+    assert importer.deletions == {
+        deletion.ixf_id: deletion
+        for deletion in (ip4_deletion, ip6_deletion, other_asn)
+    }
+    assert importer.deletions_by_ip == {
+        (64500, 4, "10.0.0.1"): ip4_deletion,
+        (64500, 6, "2001:db8::1"): ip6_deletion,
+        (64501, 4, "10.0.0.2"): other_asn,
+        (64501, 6, "2001:db8::2"): other_asn,
+    }
+
+    addition = member_data(64500, "10.0.0.1", "2001:db8::1")
+    importer.consolidate_delete_add(addition)
+    assert addition.set_requirement.call_args_list == [
+        mock.call(ip4_deletion, save=False),
+        mock.call(ip6_deletion, save=False),
+    ]
+
+    # same addresses, another asn
+    addition = member_data(64502, "10.0.0.2", "2001:db8::2")
+    importer.consolidate_delete_add(addition)
+    addition.set_requirement.assert_not_called()
+
+
+def synthetic_import(num_members):
+    """
+    Importer bookkeeping for an exchange of `num_members` members. Every
+    asn has two members, and every member moved its IPv6 address, so
+    each has a deletion to consolidate with its pending save.
+    """
+    importer = ixf.Importer()
+    saves = []
+    deletions = []
+    for i in range(num_members):
+        asn = 64512 + i // 2
+        ipaddr4 = ipaddress.IPv4Address(0x0A000000 + i)
+        ipaddr6 = ipaddress.IPv6Address((0x20010DB8 << 96) + i)
+        old_ipaddr6 = ipaddress.IPv6Address((0x20010DB8 << 96) + (1 << 32) + i)
+        saves.append(member_data(asn, ipaddr4, ipaddr6))
+        deletions.append(member_data(asn, ipaddr4, old_ipaddr6, speed=10000))
+
+    def run():
+        importer.reset()
+        importer.pending_save = saves
+        for save in saves:
+            importer.ixf_ids[save.ixf_id] = True
+            importer.asns.add(save.asn)
+        importer.pending_save_by_ip = importer._build_pending_save_by_ip()
+        for deletion in deletions:
+            importer.fix_consolidated_modify(deletion)
+            importer.track_deletion(deletion)
+        for save in saves:
+            importer.consolidate_delete_add(save)
+
+    return run
+
+
+def best_time(run, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@pytest.mark.django_db
+def test_bookkeeping_scales_linearly(benchmark):
+    """
+    test that the importer bookkeeping for a 5,000 member exchange takes
+    time linear in the number of members
+    """
+    run = synthetic_import(5000)
+    benchmark.pedantic(run, rounds=3)
+
+    # a quadratic pass would make five times the members take
+    # twenty-five times as long
+    ratio = best_time(run) / best_time(synthetic_import(1000))
+    assert ratio < 12
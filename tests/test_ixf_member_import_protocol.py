@@ -2,13 +2,17 @@ import datetime
 import ipaddress
 import json
 from types import SimpleNamespace
+from unittest.mock import patch
 
 import jsonschema
 import pytest
 import requests
 import reversion
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from peeringdb_server import ixf
 from peeringdb_server.deskpro import FailingMockAPIClient
@@ -5870,3 +5874,504 @@ def test_ixf_import_creates_netixlan_for_supported_protocol():
     netixlan = NetworkIXLan.objects.get(status="ok", asn=network.asn)
     assert netixlan.ipaddr4 is None
     assert str(netixlan.ipaddr6) == "2001:7f8:1::a500:2906:1"
+
+
+@pytest.mark.django_db
+def test_parse_query_count(entities):
+    """
+    Test that the number of queries made while parsing the IX-F
+    member list does not grow with the number of members
+    """
+
+    ixlan = entities["ixlan"][0]
+    org = entities["org"][0]
+
+    def member(index):
+        asn = 64500 + index
+        Network.objects.get_or_create(
+            asn=asn,
+            defaults={
+                "name": f"Network {asn}",
+                "org": org,
+                "status": "ok",
+                "allow_ixp_update": True,
+                "info_unicast": True,
+                "info_ipv6": True,
+            },
+        )
+        return {
+            "asnum": asn,
+            "member_type": "peering",
+            "connection_list": [
+                {
+                    "state": "active",
+                    "if_list": [{"if_speed": 10000}],
+                    "vlan_list": [
+                        {
+                            "vlan_id": 0,
+                            "ipv4": {"address": f"195.69.147.{index}"},
+                            "ipv6": {"address": f"2001:7f8:1::a506:{index}:1"},
+                        }
+                    ],
+                }
+            ],
+        }
+
+    def count_queries(num_members):
+        data = {"member_list": [member(index) for index in range(1, num_members)]}
+        importer = ixf.Importer()
+        importer.reset(ixlan=ixlan, save=True)
+        with CaptureQueriesContext(connection) as context:
+            importer.parse(data)
+        assert len(importer.pending_save) == num_members - 1
+        return len(context.captured_queries)
+
+    assert count_queries(3) == count_queries(30)
+
+
+@pytest.mark.django_db
+def test_proposed_actions(entities, use_ip):
+    """
+    Test that the actions proposed to a network are stored by the
+    importer and listed without evaluating every entry again
+    """
+
+    data = setup_test_data("ixf.member.3")
+    network = entities["net"]["UPDATE_DISABLED"]
+    ixlan = entities["ixlan"][0]
+    ixlan.ixf_ixp_import_enabled = True
+    ixlan.ixf_ixp_member_list_url = "https://localhost/IX-F"
+    ixlan.save()
+
+    importer = ixf.Importer()
+    importer.update(ixlan, data=data)
+
+    def actionable():
+        return sorted(
+            ixf_member_data.id
+            for ixf_member_data in IXFMemberData.objects.filter(asn=network.asn)
+            if ixf_member_data.action != "noop"
+            and ixf_member_data.actionable_for_network
+        )
+
+    def proposed():
+        proposals = IXFMemberData.proposals_for_network(network)
+        return sorted(
+            ixf_member_data.id
+            for proposal in proposals
+            for action in ["add", "modify", "delete"]
+            for ixf_member_data in proposal[action]
+        )
+
+    assert not IXFMemberData.objects.filter(proposed_action__isnull=True).exists()
+    expected = actionable()
+    assert expected
+
+    with CaptureQueriesContext(connection) as context:
+        assert proposed() == expected
+    assert len(context.captured_queries) == 1
+
+    # netixlan changes flag the proposed actions to be evaluated again
+
+    ixf_member_data = IXFMemberData.objects.filter(asn=network.asn).first()
+    NetworkIXLan.objects.create(
+        network=network,
+        ixlan=ixlan,
+        asn=network.asn,
+        speed=ixf_member_data.speed,
+        ipaddr4=ixf_member_data.ipaddr4,
+        ipaddr6=ixf_member_data.ipaddr6,
+        is_rs_peer=ixf_member_data.is_rs_peer,
+        operational=ixf_member_data.operational,
+        status="ok",
+    )
+
+    assert IXFMemberData.objects.filter(proposed_action__isnull=True).exists()
+    assert ixf_member_data.id not in actionable()
+    assert proposed() == actionable()
+
+    # listing evaluates them without storing anything
+
+    assert IXFMemberData.objects.filter(proposed_action__isnull=True).exists()
+    with CaptureQueriesContext(connection) as context:
+        proposed()
+        IXFMemberData.network_has_dismissed_actionable(network)
+    assert not [
+        query for query in context.captured_queries if query["sql"].startswith("UPDATE")
+    ]
+
+    # the importer stores them, but not over an action stored meanwhile
+
+    evaluate_proposed_action = IXFMemberData.evaluate_proposed_action
+
+    def racing_evaluate(self):
+        IXFMemberData.objects.filter(id=self.id).update(proposed_action="delete")
+        evaluate_proposed_action(self)
+
+    with patch.object(IXFMemberData, "evaluate_proposed_action", racing_evaluate):
+        IXFMemberData.refresh_proposed_actions(
+            IXFMemberData.objects.filter(id=ixf_member_data.id)
+        )
+    ixf_member_data.refresh_from_db()
+    assert ixf_member_data.proposed_action == "delete"
+
+    IXFMemberData.refresh_proposed_actions(IXFMemberData.objects.all())
+    assert not IXFMemberData.objects.filter(proposed_action__isnull=True).exists()
+    assert proposed() == actionable()
+
+    # dismissed proposals
+
+    assert not IXFMemberData.network_has_dismissed_actionable(network)
+    IXFMemberData.objects.filter(id__in=actionable()).update(dismissed=True)
+    assert IXFMemberData.network_has_dismissed_actionable(network)
+    assert proposed() == []
+
+
+@pytest.mark.django_db
+def test_proposed_actions_invalidated(entities):
+    """
+    Test that stored proposed actions are flagged to be evaluated again
+    when a netixlan they may resolve to changes, on any ixlan, and when
+    one of their requirements changes
+    """
+
+    network = entities["net"]["UPDATE_DISABLED"]
+    other_network = entities["net"]["UPDATE_ENABLED"]
+    ixlan, other_ixlan = entities["ixlan"][:2]
+
+    def create(**kwargs):
+        return IXFMemberData.objects.create(
+            asn=network.asn,
+            ixlan=ixlan,
+            speed=10000,
+            fetched=datetime.datetime.now(datetime.UTC),
+            operational=True,
+            is_rs_peer=True,
+            status="ok",
+            **kwargs,
+        )
+
+    ixf_member_data = create(
+        ipaddr4="195.69.147.250", ipaddr6="2001:7f8:1::a500:2906:1"
+    )
+    requirement = create(ipaddr4="195.69.147.251", requirement_of=ixf_member_data)
+
+    def store():
+        IXFMemberData.objects.update(proposed_action="add")
+
+    def invalidated():
+        ixf_member_data.refresh_from_db()
+        return ixf_member_data.proposed_action is None
+
+    # netixlan of the asn on another ixlan
+    store()
+    netixlan = NetworkIXLan.objects.create(
+        network=network,
+        ixlan=other_ixlan,
+        asn=network.asn,
+        speed=1000,
+        ipaddr4="195.66.224.250",
+        status="ok",
+    )
+    assert invalidated()
+
+    # hard delete
+    store()
+    NetworkIXLan.objects.filter(id=netixlan.id).delete()
+    assert invalidated()
+
+    # netixlan of another asn on one of the ip addresses
+    store()
+    NetworkIXLan.objects.create(
+        network=other_network,
+        ixlan=ixlan,
+        asn=other_network.asn,
+        speed=1000,
+        ipaddr6="2001:7f8:1::a500:2906:1",
+        status="ok",
+    )
+    assert invalidated()
+
+    # requirement of the entry
+    store()
+    requirement.save()
+    assert invalidated()
+
+
+@pytest.mark.django_db
+def test_import_timings(entities):
+    """
+    Test that the time spent and queries made in each import phase
+    are recorded
+    """
+
+    data = setup_test_data("ixf.member.0")
+    ixlan = entities["ixlan"][0]
+
+    importer = ixf.Importer()
+    importer.sanitize(data)
+    importer.update(ixlan, data=data)
+
+    timings = importer.timings
+
+    assert "fetch" not in timings
+
+    for name in [
+        "parse",
+        "process_deletions",
+        "process_saves",
+        "cleanup_ixf_member_data",
+        "notify_stale_netixlans",
+        "archive",
+        "update_ix",
+        "total",
+    ]:
+        assert timings[name]["time"] >= 0
+
+    assert timings["parse"]["queries"]
+    assert timings["total"]["queries"] >= sum(
+        timing["queries"] for name, timing in timings.items() if name != "total"
+    )
+    ixlan.refresh_from_db()
+    assert ixlan.ixf_import_attempt.timings == timings
+
+    # the phases data was prefetched in count towards the import
+    importer.update(
+        ixlan,
+        data=data,
+        timings={
+            "fetch": {"time": 30.0, "queries": 2},
+            "sanitize": {"time": 1.0, "queries": 0},
+        },
+    )
+
+    timings = importer.timings
+    assert timings["fetch"] == {"time": 30.0, "queries": 2}
+    assert timings["sanitize"] == {"time": 1.0, "queries": 0}
+    assert timings["total"]["time"] >= 31.0
+    assert timings["total"]["queries"] >= timings["parse"]["queries"] + 2
+
+
+@pytest.mark.django_db
+def test_archive_query_count(entities):
+    """
+    Test that archiving the import log does not query versions
+    and insert entries one netixlan at a time
+    """
+
+    ixlan = entities["ixlan"][0]
+    network = entities["net"]["UPDATE_ENABLED"]
+    user = User.objects.create_user(
+        username="watcher", email="watcher@localhost", password="watcher"
+    )
+    DataChangeWatchedObject.objects.create(
+        user=user, ref_tag="net", object_id=network.id
+    )
+
+    def archive(num_netixlans):
+        NetworkIXLan.objects.all().delete()
+        importer = ixf.Importer()
+        importer.reset(ixlan=ixlan, save=True)
+        for index in range(1, num_netixlans + 1):
+            with reversion.create_revision():
+                netixlan = NetworkIXLan.objects.create(
+                    network=network,
+                    ixlan=ixlan,
+                    asn=network.asn,
+                    speed=10000,
+                    ipaddr4=f"195.69.147.{index}",
+                    status="ok",
+                )
+            importer.actions_taken["add"].append(
+                {"netixlan": netixlan, "version": None, "reason": "new"}
+            )
+        with CaptureQueriesContext(connection) as context:
+            importer.archive()
+        log = IXLanIXFMemberImportLog.objects.filter(ixlan=ixlan).last()
+        assert log.entries.count() == num_netixlans
+        for entry in log.entries.all():
+            assert entry.version_after.object_id == str(entry.netixlan_id)
+        return len(context.captured_queries)
+
+    assert archive(2) == archive(10)
+    assert DataChangeNotificationQueue.objects.filter(source="ixf").count() == 12
+
+
+@pytest.mark.django_db
+def test_fetch_conditional(mocker):
+    """
+    Test that IX-F exports are fetched with conditional requests and
+    that unchanged exports are not parsed again
+    """
+
+    data = setup_test_data("ixf.member.0")
+    content = json.dumps(data).encode("utf-8")
+    url = "http://www.localhost.com/ixf.json"
+
+    def response(status_code, etag):
+        result = mocker.Mock(
+            status_code=status_code,
+            headers={"ETag": etag, "Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT"},
+        )
+        result.iter_content.return_value = [content]
+        return result
+
+    requests_get = mocker.patch("peeringdb_server.ixf.requests.get")
+    requests_get.return_value = response(200, '"v1"')
+
+    importer = ixf.Importer()
+    decode = mocker.spy(importer, "decode")
+    fetched = importer.fetch(url)
+
+    assert requests_get.call_args.kwargs["headers"] == {}
+    assert fetched["pdb_hash"]
+    assert fetched["member_list"]
+
+    # not modified
+
+    requests_get.return_value = response(304, '"v1"')
+
+    assert importer.fetch(url) == fetched
+    assert requests_get.call_args.kwargs["headers"] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 05 Oct 2026 10:00:00 GMT",
+    }
+
+    # same content, new etag
+
+    requests_get.return_value = response(200, '"v2"')
+
+    assert importer.fetch(url) == fetched
+    assert decode.call_count == 1
+    assert cache.get(importer.cache_meta_key(url))["etag"] == '"v2"'
+
+
+@pytest.mark.django_db
+@override_settings(IXF_FETCH_MAX_SIZE=1024, IXF_MAX_MEMBERS=2)
+def test_fetch_limits(mocker):
+    """
+    Test that oversized and invalid IX-F exports are rejected while
+    they are downloaded and decoded
+    """
+
+    url = "http://www.localhost.com/ixf.json"
+    requests_get = mocker.patch("peeringdb_server.ixf.requests.get")
+    importer = ixf.Importer()
+
+    def fetch(chunks, headers=None):
+        chunks = iter(chunks)
+        requests_get.return_value = mocker.Mock(status_code=200, headers=headers or {})
+        requests_get.return_value.iter_content.return_value = chunks
+        return importer.fetch(url), chunks
+
+    # content length announced by the server is too big
+
+    data, _ = fetch([b"{}"], headers={"Content-Length": "2048"})
+    assert "maximum size of 1024 bytes" in data["pdb_error"]
+
+    # download is aborted once it grows too big
+
+    data, chunks = fetch([b" " * 1000, b" " * 1000, b"{}"])
+    assert "maximum size of 1024 bytes" in data["pdb_error"]
+    assert next(chunks) == b"{}"
+
+    # too many members
+
+    member_list = [{"asnum": asn} for asn in [1, 2, 3]]
+    data, _ = fetch([json.dumps({"member_list": member_list}).encode()])
+    assert "maximum of 2 members" in data["pdb_error"]
+
+    # unexpected schema versions are imported regardless
+
+    data, _ = fetch([b'{"version": "2.0", "member_list": []}'])
+    assert not data["pdb_error"]
+    assert data["version"] == "2.0"
+
+    # the declared encoding is used, otherwise it is detected
+
+    content = '{"member_list": [], "name": "Zürich"}'
+    data, _ = fetch(
+        [content.encode("latin-1")],
+        headers={"Content-Type": "application/json; charset=ISO-8859-1"},
+    )
+    assert data["name"] == "Zürich"
+
+    data, _ = fetch([content.encode("utf-16")])
+    assert data["name"] == "Zürich"
+
+    data, _ = fetch([content.encode("utf-8-sig")])
+    assert data["name"] == "Zürich"
+
+    # invalid member entry
+
+    data, _ = fetch([b'{"member_list": [{"asnum": 1}, {"asnum": "AS2"}]}'])
+    assert not data["pdb_error"]
+    assert [member["asnum"] for member in data["member_list"]] == [1]
+
+    data, _ = fetch([b'{"member_list": [{"asnum": 1, "connection_list": {}}]}'])
+    assert "connection_list is not a list" in data["pdb_error"]
+
+    # not json
+
+    data, _ = fetch([b'{"member_list": [}'])
+    assert data["pdb_error"] == "No JSON could be parsed"
+
+    # valid
+
+    data, _ = fetch([b'{"version": "1.0", ', b'"member_list": [{"asnum": 1}]}'])
+    assert not data["pdb_error"]
+    assert data["member_list"] == [{"asnum": 1}]
+
+
+@pytest.mark.django_db
+def test_skip_unchanged_import(entities, mocker):
+    """
+    Test that the import of unchanged IX-F data is skipped as long as
+    the peeringdb data it applies to has not changed either
+    """
+
+    data = setup_test_data("ixf.member.0")
+    data["pdb_hash"] = "hash"
+    ixlan = entities["ixlan"][0]
+
+    importer = ixf.Importer()
+    parse = mocker.spy(importer, "parse")
+
+    importer.update(ixlan, data=data)
+
+    assert parse.call_count == 1
+    assert NetworkIXLan.objects.filter(status="ok").count() == 1
+
+    ixlan.ix.refresh_from_db()
+    last_import = ixlan.ix.ixf_last_import
+    ixf_net_count = ixlan.ix.ixf_net_count
+
+    # nothing changed
+
+    assert importer.update(ixlan, data=data)
+    assert parse.call_count == 1
+
+    ixlan.ix.refresh_from_db()
+    assert ixlan.ix.ixf_last_import > last_import
+    assert ixlan.ix.ixf_net_count == ixf_net_count
+
+    # peeringdb data changed
+
+    netixlan = NetworkIXLan.objects.get(status="ok")
+    netixlan.speed = 1
+    netixlan.save()
+
+    importer.update(ixlan, data=data)
+    assert parse.call_count == 2
+    assert NetworkIXLan.objects.get(status="ok").speed == 10000
+
+    # IX-F data changed
+
+    data["pdb_hash"] = "other"
+    importer.update(ixlan, data=data)
+    assert parse.call_count == 3
+
+    # preview mode never skips
+
+    importer.update(ixlan, data=data, save=False)
+    assert parse.call_count == 4
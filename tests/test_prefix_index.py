@@ -0,0 +1,143 @@
+import ipaddress
+from datetime import timedelta
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from peeringdb_server import prefix_index
+from peeringdb_server.models import (
+    InternetExchange,
+    IXLanPrefix,
+    Network,
+    NetworkIXLan,
+    Organization,
+)
+from peeringdb_server.prefix_index import PrefixIndex, bump_prefix_index_generation
+
+pytestmark = pytest.mark.django_db
+
+
+def test_overlapping_and_containing():
+    index = PrefixIndex()
+    index.add("10.0.0.0/16", "a")
+    index.add("10.0.1.0/24", "b")
+    index.add("10.1.0.0/24", "c")
+    index.add("2001:db8::/48", "d")
+
+    assert index.overlapping("10.0.0.0/8") == {"a", "b", "c"}
+    assert index.overlapping("10.0.1.128/25") == {"a", "b"}
+    assert index.overlapping(ipaddress.ip_network("10.0.2.0/24")) == {"a"}
+    assert index.overlapping("10.2.0.0/24") == set()
+    assert index.overlapping("2001:db8::/32") == {"d"}
+
+    assert index.containing("10.0.1.1") == {"a", "b"}
+    assert index.containing("10.1.0.255") == {"c"}
+    assert index.containing("2001:db8::1") == {"d"}
+    assert index.containing("192.0.2.1") == set()
+
+    index.remove("10.0.0.0/16", "a")
+    assert index.containing("10.0.1.1") == {"b"}
+    assert index.overlapping("10.0.0.0/8") == {"b", "c"}
+    assert index.lengths[4] == {24: 2}
+
+
+def test_ixlan_prefix_index_follows_saves(django_capture_on_commit_callbacks):
+    org = Organization.objects.create(name="Test org", status="ok")
+    ix = InternetExchange.objects.create(name="Test exchange", status="ok", org=org)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ixpfx = IXLanPrefix.objects.create(
+            ixlan=ix.ixlan, protocol="IPv4", prefix="198.51.100.0/24", status="ok"
+        )
+    index = prefix_index.ixlan_prefix_index()
+    assert ixpfx.id in index.overlapping("198.51.100.0/25")
+
+    # a renumbered prefix is indexed under its new network only
+    with django_capture_on_commit_callbacks(execute=True):
+        ixpfx.prefix = "203.0.113.0/24"
+        ixpfx.save()
+    assert ixpfx.id in index.containing("203.0.113.10")
+    assert ixpfx.id not in index.containing("198.51.100.10")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ixpfx.status = "deleted"
+        ixpfx.save()
+    assert ixpfx.id not in index.containing("203.0.113.10")
+
+
+def test_ixlan_prefix_index_catches_up_with_other_processes():
+    org = Organization.objects.create(name="Test org", status="ok")
+    ix = InternetExchange.objects.create(name="Test exchange", status="ok", org=org)
+    index = prefix_index.ixlan_prefix_index()
+
+    # written without signals, as another process would
+    ixpfx = IXLanPrefix(
+        ixlan=ix.ixlan, protocol="IPv4", prefix="192.0.2.0/24", status="ok"
+    )
+    IXLanPrefix.objects.bulk_create([ixpfx])
+    ixpfx = IXLanPrefix.objects.get(prefix="192.0.2.0/24")
+    assert ixpfx.id not in index.containing("192.0.2.10")
+
+    bump_prefix_index_generation()
+    assert ixpfx.id in prefix_index.ixlan_prefix_index().containing("192.0.2.10")
+
+
+def test_ixlan_prefix_index_sees_long_transactions_of_other_processes():
+    org = Organization.objects.create(name="Test org", status="ok")
+    ix = InternetExchange.objects.create(name="Test exchange", status="ok", org=org)
+    gone = IXLanPrefix.objects.create(
+        ixlan=ix.ixlan, protocol="IPv4", prefix="203.0.113.0/24", status="ok"
+    )
+    index = prefix_index.ixlan_prefix_index()
+    assert gone.id in index.containing("203.0.113.10")
+
+    # another process saves a prefix early in a transaction that commits
+    # long after, then bumps the generation; and hard deletes another
+    IXLanPrefix.objects.bulk_create(
+        [
+            IXLanPrefix(
+                ixlan=ix.ixlan, protocol="IPv4", prefix="192.0.2.0/24", status="ok"
+            )
+        ]
+    )
+    IXLanPrefix.objects.filter(prefix="192.0.2.0/24").update(
+        updated=timezone.now() - timedelta(hours=1)
+    )
+    IXLanPrefix.objects.filter(id=gone.id).delete()
+    ixpfx = IXLanPrefix.objects.get(prefix="192.0.2.0/24")
+    bump_prefix_index_generation()
+
+    index = prefix_index.ixlan_prefix_index()
+    assert ixpfx.id in index.containing("192.0.2.10")
+    assert gone.id not in index.containing("203.0.113.10")
+
+
+def test_netixlan_address_validation_uses_ixlan_prefixes(django_assert_num_queries):
+    org = Organization.objects.create(name="Test org", status="ok")
+    ix = InternetExchange.objects.create(name="Test exchange", status="ok", org=org)
+    other = InternetExchange.objects.create(name="Other exchange", status="ok", org=org)
+    IXLanPrefix.objects.create(
+        ixlan=ix.ixlan, protocol="IPv4", prefix="198.51.100.0/24", status="ok"
+    )
+    IXLanPrefix.objects.create(
+        ixlan=other.ixlan, protocol="IPv4", prefix="203.0.113.0/24", status="ok"
+    )
+    net = Network.objects.create(org=org, name="net", asn=12345, status="ok")
+    ixlan = ix.ixlan
+
+    assert ixlan.test_ipv4_address("198.51.100.10")
+    # the network and broadcast addresses are not assignable
+    assert not ixlan.test_ipv4_address("198.51.100.255")
+    # in a prefix, but of another exchange
+    assert not ixlan.test_ipv4_address("203.0.113.10")
+
+    netixlan = NetworkIXLan(
+        network=net, ixlan=ixlan, asn=net.asn, speed=1000, ipaddr4="203.0.113.10"
+    )
+    with pytest.raises(ValidationError):
+        netixlan.validate_ipaddr4()
+
+    # nothing is loaded for an address outside every prefix
+    with django_assert_num_queries(0):
+        assert not ixlan.test_ipv4_address("192.0.2.10")
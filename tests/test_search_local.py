@@ -0,0 +1,248 @@
+import threading
+from unittest import mock
+
+import pytest
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+import peeringdb_server.models as models
+from peeringdb_server.search_local import LocalSearchBackend, parse_distance
+from peeringdb_server.search_v2 import bump_search_cache_generation
+
+
+@pytest.mark.django_db
+class LocalSearchBackendTestCase(TestCase):
+    """
+    Tests for the in-process search backend used without elasticsearch.
+    """
+
+    indexes = ["fac", "ix", "net", "org", "campus", "carrier"]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = models.Organization.objects.create(
+            name="Equinix Holdings", status="ok"
+        )
+        cls.fac = models.Facility.objects.create(
+            name="Equinix FR5",
+            org=cls.org,
+            status="ok",
+            city="Frankfurt",
+            country="DE",
+            latitude=50.1109,
+            longitude=8.6821,
+        )
+        cls.net = models.Network.objects.create(
+            name="Example Network",
+            aka="Sample Carrier",
+            asn=63311,
+            org=cls.org,
+            status="ok",
+        )
+        models.NetworkFacility.objects.create(
+            network=cls.net, facility=cls.fac, status="ok"
+        )
+        cls.ix = models.InternetExchange.objects.create(
+            name="Frankfurt Exchange", org=cls.org, status="ok"
+        )
+        cls.ixlan = cls.ix.ixlan
+        cls.ixlan.status = "ok"
+        cls.ixlan.save()
+        cls.netixlan = models.NetworkIXLan.objects.create(
+            network=cls.net,
+            ixlan=cls.ixlan,
+            asn=cls.net.asn,
+            speed=1000,
+            ipaddr4="195.69.147.250",
+            ipaddr6="2001:7f8:1::a506:3311:1",
+            status="ok",
+        )
+        models.Network.objects.create(
+            name="Deleted Network", asn=63312, org=cls.org, status="deleted"
+        )
+
+    def setUp(self):
+        self.backend = LocalSearchBackend()
+
+    def ids(self, result, tag):
+        return [item["id"] for item in result[tag]]
+
+    def test_autocomplete_prefix(self):
+        result = self.backend.autocomplete("equi", self.indexes, False)
+
+        self.assertEqual(self.ids(result, "org"), [self.org.id])
+        self.assertEqual(self.ids(result, "fac"), [self.fac.id])
+        self.assertEqual(result["net"], [])
+
+    def test_autocomplete_aka(self):
+        result = self.backend.autocomplete("sample car", self.indexes, False)
+
+        self.assertEqual(self.ids(result, "net"), [self.net.id])
+        self.assertEqual(result["net"][0]["extra"]["asn"], 63311)
+        self.assertEqual(result["net"][0]["org_id"], self.org.id)
+
+    def test_autocomplete_hide_ixs_without_fac(self):
+        result = self.backend.autocomplete("frankfurt", self.indexes, False)
+        self.assertEqual(self.ids(result, "ix"), [self.ix.id])
+
+        result = self.backend.autocomplete("frankfurt", self.indexes, True)
+        self.assertEqual(result["ix"], [])
+
+    def test_search_infix(self):
+        result = self.backend.search("quini", {}, self.indexes, None)
+
+        self.assertEqual(self.ids(result, "org"), [self.org.id])
+        self.assertEqual(self.ids(result, "fac"), [self.fac.id])
+
+    def test_search_and_or(self):
+        result = self.backend.search("equinix fr5", {}, self.indexes, None)
+        self.assertEqual(self.ids(result, "fac"), [self.fac.id])
+        self.assertEqual(result["org"], [])
+
+        result = self.backend.search("fr5 OR example", {}, self.indexes, None)
+        self.assertEqual(self.ids(result, "fac"), [self.fac.id])
+        self.assertEqual(self.ids(result, "net"), [self.net.id])
+
+    def test_search_asn(self):
+        result = self.backend.search("63311", {}, self.indexes, None)
+
+        self.assertEqual(self.ids(result, "net"), [self.net.id])
+        self.assertEqual(result["net"][0]["extra"]["_score"], 20.0)
+
+    def test_search_ip_addresses(self):
+        result = self.backend.search("195.69.147", {}, self.indexes, None)
+        self.assertEqual(self.ids(result, "net"), [self.net.id])
+        self.assertEqual(self.ids(result, "ix"), [self.ix.id])
+
+        result = self.backend.search("2001:7f8:1:", {}, self.indexes, None)
+        self.assertEqual(self.ids(result, "net"), [self.net.id])
+
+    def test_search_skips_deleted(self):
+        result = self.backend.search("deleted", {}, self.indexes, None)
+
+        self.assertEqual(result["net"], [])
+
+    def test_search_geo(self):
+        near = {"lat": "50.1", "long": "8.7", "dist": "20km"}
+        far = {"lat": "40.7128", "long": "-74.0060", "dist": "20km"}
+
+        result = self.backend.search("", near, self.indexes, None)
+        self.assertEqual(self.ids(result, "fac"), [self.fac.id])
+        # networks are located through their facilities
+        self.assertEqual(self.ids(result, "net"), [self.net.id])
+
+        result = self.backend.search("", far, self.indexes, None)
+        self.assertEqual(result["fac"], [])
+        self.assertEqual(result["net"], [])
+
+        result = self.backend.search("", {"country": "DE"}, self.indexes, None)
+        self.assertEqual(self.ids(result, "fac"), [self.fac.id])
+
+    @override_settings(SEARCH_RESULTS_AUTOCOMPLETE_LIMIT=1)
+    def test_autocomplete_limit(self):
+        result = self.backend.autocomplete("equi", self.indexes, False)
+
+        self.assertEqual(sum(len(items) for items in result.values()), 1)
+
+    def test_update(self):
+        self.backend.ensure_index()
+
+        self.net.name = "Renamed Network"
+        self.net.save()
+        self.backend.update(self.net)
+
+        result = self.backend.autocomplete("renamed", self.indexes, False)
+        self.assertEqual(self.ids(result, "net"), [self.net.id])
+        result = self.backend.autocomplete("example", self.indexes, False)
+        self.assertEqual(result["net"], [])
+
+        self.net.status = "deleted"
+        self.net.save()
+        self.backend.update(self.net)
+
+        result = self.backend.autocomplete("renamed", self.indexes, False)
+        self.assertEqual(result["net"], [])
+
+    def test_netixlan_update(self):
+        self.backend.ensure_index()
+
+        self.netixlan.ipaddr4 = "195.69.147.251"
+        self.netixlan.save()
+        self.backend.update(self.netixlan)
+
+        result = self.backend.search("195.69.147.251", {}, self.indexes, None)
+        self.assertEqual(self.ids(result, "net"), [self.net.id])
+        result = self.backend.search("195.69.147.250", {}, self.indexes, None)
+        self.assertEqual(result["net"], [])
+
+    def test_catch_up(self):
+        """
+        Changes made by another process are picked up once the search
+        generation moves.
+        """
+        self.backend.ensure_index()
+
+        # queryset updates fire no signals, like a save in another process
+        models.Network.objects.filter(id=self.net.id).update(
+            name="Caught Up", updated=timezone.now()
+        )
+        bump_search_cache_generation()
+
+        result = self.backend.autocomplete("caught", self.indexes, False)
+        self.assertEqual(self.ids(result, "net"), [self.net.id])
+
+    def test_update_keeps_other_process_changes(self):
+        """
+        A save in this process does not swallow a generation bump made
+        by another process before it.
+        """
+        self.backend.ensure_index()
+
+        models.Facility.objects.filter(id=self.fac.id).update(
+            name="Elsewhere FR5", updated=timezone.now()
+        )
+        bump_search_cache_generation()
+
+        self.net.name = "Renamed Network"
+        self.net.save()
+        self.backend.update(self.net)
+
+        self.assertEqual(self.backend.search_ids("elsewhere", "fac"), [self.fac.id])
+
+    def test_queries_hold_the_lock(self):
+        """
+        The index is not changed by other threads while a query reads it.
+        """
+        self.backend.ensure_index()
+        changed = threading.Event()
+        threads = []
+
+        def change():
+            with self.backend.lock:
+                self.backend.index.add(("org", 0), {}, ["equinix"], [])
+                changed.set()
+
+        score = self.backend.score
+
+        def score_while_changing(doc, words):
+            if not threads:
+                threads.append(threading.Thread(target=change))
+                threads[0].start()
+                self.assertFalse(changed.wait(0.2))
+            return score(doc, words)
+
+        with mock.patch.object(self.backend, "score", score_while_changing):
+            self.backend.autocomplete("equi", self.indexes, False)
+
+        threads[0].join()
+        self.assertTrue(changed.is_set())
+
+    def test_search_ids(self):
+        self.assertEqual(self.backend.search_ids("equinix", "fac"), [self.fac.id])
+        self.assertEqual(self.backend.search_ids("equinix", "net"), [])
+
+    def test_parse_distance(self):
+        self.assertEqual(parse_distance("20km"), 20)
+        self.assertEqual(parse_distance("1000m"), 1)
+        self.assertAlmostEqual(parse_distance("10mi"), 16.09344)
+        self.assertIsNone(parse_distance("far"))
@@ -5,7 +5,7 @@ import elasticsearch
 import pytest
 from django.conf import settings
 from django.core.management import call_command
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
 
 import peeringdb_server.models as models
 import peeringdb_server.views as views
@@ -14,6 +14,7 @@ from peeringdb_server.search_v2 import (
     add_and_between_keywords,
     autocomplete_v2,
     build_geo_filter,
+    bump_search_cache_generation,
     construct_ipv4_query,
     construct_ipv6_query,
     construct_query_body,
@@ -25,6 +26,9 @@ from peeringdb_server.search_v2 import (
     is_valid_longitude,
     order_results_alphabetically,
     process_search_results,
+    reset_search_cache_stats,
+    search_cache_stats,
+    search_ids,
     search_v2,
 )
 
@@ -801,6 +805,59 @@ class SearchV2TestCase(TestCase):
         self.assertEqual(len(result["net"]), 1)
         self.assertEqual(result["net"][0]["id"], 1)
 
+    @override_settings(SEARCH_RESULTS_LIMIT=3)
+    def test_search_v2_geo_only_single_msearch(self):
+        """
+        A geo search without a term gathers per-index counts and hits in
+        one msearch round-trip and splits the result limit by fair share.
+        """
+
+        def hit(index, pk):
+            return {
+                "_index": f"{index}-20260520043834",
+                "_id": str(pk),
+                "_score": 1.0,
+                "_source": {
+                    "name": f"{index} {pk}",
+                    "asn": pk,
+                    "status": "ok",
+                    "org": {"id": 10, "name": "Test Organization"},
+                },
+            }
+
+        def response(hits, total):
+            return {"hits": {"total": {"value": total}, "hits": hits}}
+
+        responses = []
+        for index in self.indexes:
+            if index == "fac":
+                responses.append(response([hit("fac", i) for i in range(1, 4)], 5))
+            elif index == "net":
+                responses.append(response([hit("net", 1)], 1))
+            else:
+                responses.append(response([], 0))
+
+        mock_es = MagicMock()
+        mock_es.msearch.return_value = {"responses": responses}
+
+        geo = {"lat": "40.7128", "long": "-74.0060", "dist": "50km"}
+
+        with patch(
+            "peeringdb_server.search_v2.new_elasticsearch", return_value=mock_es
+        ):
+            result = search_v2([], geo=geo)
+
+        mock_es.msearch.assert_called_once()
+        mock_es.search.assert_not_called()
+
+        searches = mock_es.msearch.call_args.kwargs["searches"]
+        self.assertEqual([header["index"] for header in searches[::2]], self.indexes)
+        self.assertTrue(all(body["size"] == 3 for body in searches[1::2]))
+
+        # net only has one match, fac gets the remaining two slots
+        self.assertEqual([r["id"] for r in result["net"]], [1])
+        self.assertEqual(sorted(r["id"] for r in result["fac"]), [1, 2])
+
     def test_is_matching_geo(self):
         sq = {
             "_index": "fac",
@@ -2042,3 +2099,107 @@ class SearchV2SpecificTestCase(TestCase):
 
         ix_names = [item["name"] for item in result["ix"]]
         self.assertIn(ix.name, ix_names, "Accented name should match unaccented query")
+
+
+@override_settings(
+    SEARCH_RESULT_CACHE_TTL=60,
+    SEARCH_BACKEND="peeringdb_server.search_v2.ElasticsearchBackend",
+)
+class SearchResultCacheTestCase(TestCase):
+    """
+    Result cache in front of autocomplete_v2 and search_v2, exercised
+    against a mocked Elasticsearch client.
+    """
+
+    def setUp(self):
+        reset_search_cache_stats()
+        self.mock_es = MagicMock()
+        self.mock_es.search.return_value = {
+            "hits": {
+                "total": {"value": 1, "relation": "eq"},
+                "hits": [
+                    {
+                        "_index": "net-20260520043834",
+                        "_id": "1",
+                        "_score": 1.0,
+                        "_source": {
+                            "name": "Equinix",
+                            "asn": 63311,
+                            "status": "ok",
+                            "org": {"id": 10, "name": "Test Organization"},
+                        },
+                    }
+                ],
+            }
+        }
+        patcher = patch(
+            "peeringdb_server.search_v2.new_elasticsearch", return_value=self.mock_es
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_autocomplete_v2_cached(self):
+        first = autocomplete_v2("equi")
+        second = autocomplete_v2("  EQUI ")
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.mock_es.search.call_count, 1)
+
+        stats = search_cache_stats()["autocomplete"]
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_autocomplete_v2_cache_keyed_on_hide_ixs_without_fac(self):
+        user = MagicMock()
+        user.hide_ixs_without_fac = True
+
+        autocomplete_v2("equi")
+        autocomplete_v2("equi", user=user)
+
+        self.assertEqual(self.mock_es.search.call_count, 2)
+
+    def test_search_v2_cached(self):
+        first = search_v2(["Equinix"])
+        second = search_v2(["Equinix"])
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.mock_es.search.call_count, 1)
+
+        # AND / OR are case sensitive, so the case of the term is kept
+        search_v2(["equinix"])
+        self.assertEqual(self.mock_es.search.call_count, 2)
+
+    def test_generation_bump_invalidates(self):
+        autocomplete_v2("equi")
+        bump_search_cache_generation()
+        autocomplete_v2("equi")
+
+        self.assertEqual(self.mock_es.search.call_count, 2)
+
+    @override_settings(SEARCH_RESULT_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        autocomplete_v2("equi")
+        autocomplete_v2("equi")
+
+        self.assertEqual(self.mock_es.search.call_count, 2)
+        self.assertEqual(search_cache_stats()["autocomplete"]["hits"], 0)
+
+    def test_search_ids(self):
+        first = search_ids("Equinix", "net")
+        second = search_ids(" Equinix ", "net")
+
+        self.assertEqual(first, [1])
+        self.assertEqual(first, second)
+        self.assertEqual(self.mock_es.search.call_count, 1)
+
+        # only the requested index is queried and no documents are fetched
+        kwargs = self.mock_es.search.call_args.kwargs
+        self.assertEqual(kwargs["index"], "net")
+        self.assertFalse(kwargs["body"]["_source"])
+        self.assertEqual(
+            kwargs["body"]["query"]["bool"]["filter"], {"term": {"status": "ok"}}
+        )
+
+        search_ids("Equinix", "org")
+        self.assertEqual(self.mock_es.search.call_count, 2)